@@ -14,3 +14,25 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'acftgestion.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+from django.views import static  # noqa: E402
+
+
+class ArchivosEstaticosHandler(ASGIStaticFilesHandler):
+    """Sirve los archivos ya reunidos por collectstatic en STATIC_ROOT.
+
+    En producción no se recorren los directorios de las aplicaciones: la
+    imagen los reúne al construirse.
+    """
+
+    def serve(self, request):
+        return static.serve(request, self.file_path(request.path), document_root=settings.STATIC_ROOT)
+
+
+if settings.DEBUG:
+    # Servir los archivos estáticos (admin) como lo hace runserver en desarrollo
+    application = ASGIStaticFilesHandler(application)
+else:
+    application = ArchivosEstaticosHandler(application)
@@ -10,20 +10,26 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Datos que se escriben en ejecución (base, caché, comprobantes, respaldos).
+# En el contenedor apunta al volumen /datos, fuera del código de la imagen.
+DATOS_DIR = Path(os.environ.get('ACFT_DATOS_DIR', BASE_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-^hj78yf5t$wi8)@i9fvst@ssq$vi&6j)g=^*ge^=32m6z=-x%d'
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'django-insecure-^hj78yf5t$wi8)@i9fvst@ssq$vi&6j)g=^*ge^=32m6z=-x%d')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# La imagen de producción define DJANGO_DEBUG=0
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = ["*"]
 
@@ -47,12 +53,18 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Elige la base del club según el host; antes de leer la sesión
+    'socios.clubes.club_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Guarda juntos al final de la petición los cambios auditados; necesita al usuario
+    'socios.auditoria.auditoria_middleware',
+    # Perfilado a pedido (?perfilar=1) para superusuarios; necesita al usuario
+    'socios.perfilado.perfilado_middleware',
 ]
 
 ROOT_URLCONF = 'acftgestion.urls'
@@ -81,11 +93,130 @@ WSGI_APPLICATION = 'acftgestion.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': DATOS_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # En modo WAL los lectores no bloquean a los escritores; permite
+            # además respaldar la base en caliente (manage.py respaldar_bd)
+            'init_command': 'PRAGMA journal_mode=WAL;',
+        },
+    },
+    # Réplica de solo lectura para informes, exportaciones y el panel
+    # (socios.replicas). En SQLite es una copia que renueva
+    # manage.py actualizar_replica; en PostgreSQL, una réplica por streaming.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': DATOS_DIR / 'replica.sqlite3',
+        'OPTIONS': {
+            # Cualquier escritura por esta conexión falla
+            'init_command': 'PRAGMA query_only=1;',
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+# Modo multi-club (socios/clubes.py): alias de cada club y los hosts que
+# atiende. Cada club tiene su propia base, así que la actividad de uno no
+# bloquea las escrituras de otro. Los alias 'default' y 'replica' están
+# reservados; los hosts no listados usan el club principal.
+# Ejemplo: CLUBES = {'ferroclub': ['ferroclub.ddns.net']}
+CLUBES = {}
+
+for _club, _hosts in CLUBES.items():
+    _base = dict(DATABASES['default'])
+    if _base['ENGINE'] == 'django.db.backends.postgresql':
+        # Un esquema por club en la misma base, con un pool de conexiones
+        # propio para que un club con mucha carga no agote el de los demás.
+        # public sigue en el search_path: ahí están pg_trgm y unaccent
+        _base['OPTIONS'] = {**_base.get('OPTIONS', {}), 'options': f'-c search_path={_club},public', 'pool': True}
+    else:
+        _base['NAME'] = DATOS_DIR / 'clubes' / f'{_club}.sqlite3'
+        # Conexiones persistentes, que se abren recién con la primera consulta
+        _base['CONN_MAX_AGE'] = 600
+        _base['CONN_HEALTH_CHECKS'] = True
+    DATABASES[_club] = _base
+    CSRF_TRUSTED_ORIGINS += [f"{esquema}://{host}" for host in _hosts for esquema in ('http', 'https')]
+
+DATABASE_ROUTERS = ['socios.clubes.ClubRouter', 'socios.replicas.ReplicaRouter']
+
+# Segundos de atraso tolerados antes de volver a leer de la base principal
+REPLICA_RETRASO_MAXIMO = 15 * 60
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Se usa un backend en archivos para que las versiones de los modelos
+# (socios/versiones.py) se compartan entre todos los procesos del servidor.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': DATOS_DIR / 'cache',
+        # Claves separadas por club (socios.clubes)
+        'KEY_FUNCTION': 'socios.clubes.clave_cache',
     }
 }
 
 
+# Tareas en segundo plano (socios.tareas, manage.py procesar_tareas): segundos
+# que un worker reserva una tarea en curso. Cada reportar_progreso renueva la
+# reserva; si vence (el worker se cayó o se reinició) otro worker la vuelve a
+# tomar, así que las tareas largas deben informar su progreso más seguido.
+
+TAREAS_RESERVA = 10 * 60
+
+# Segundos que espera la actualización del resumen del panel después de una
+# modificación, para recalcularlo una sola vez por cada ráfaga de cambios
+RESUMEN_DEMORA = 60
+
+
+# Email
+# https://docs.djangoproject.com/en/5.2/topics/email/
+# En producción reemplazar por 'django.core.mail.backends.smtp.EmailBackend'
+# y configurar EMAIL_HOST, EMAIL_PORT, EMAIL_HOST_USER y EMAIL_HOST_PASSWORD.
+
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+DEFAULT_FROM_EMAIL = 'Club de Ferromodelismo <no-responder@acftsocios.ddns.net>'
+
+# Recordatorios de pago: mensajes por lote y segundos de pausa entre lotes
+RECORDATORIOS_TAMANO_LOTE = 50
+
+RECORDATORIOS_PAUSA = 1
+
+
+# Comprobantes de pago en PDF, cacheados por hash de su contenido
+
+COMPROBANTES_DIR = DATOS_DIR / 'comprobantes'
+
+
+# Respaldos de la base SQLite (manage.py respaldar_bd / restaurar_bd)
+
+RESPALDOS_DIR = DATOS_DIR / 'respaldos'
+
+RESPALDOS_CONSERVAR = 7
+
+
+# Perfiles de peticiones (socios.perfilado): fracción de peticiones perfiladas
+# al azar (0 desactiva el muestreo) mientras no se guarde un Ajuste del
+# perfilado en el admin, y cantidad de perfiles conservados
+
+PERFILES_DIR = DATOS_DIR / 'perfiles'
+
+PERFILADO_MUESTREO = float(os.environ.get('ACFT_PERFILADO_MUESTREO', 0))
+
+PERFILADO_CONSERVAR = 200
+
+
+# Registro de auditoría (socios.auditoria): meses conservados en la tabla y
+# carpeta de los meses anteriores exportados por manage.py podar_auditoria
+
+AUDITORIA_DIR = DATOS_DIR / 'auditoria'
+
+AUDITORIA_MESES = 24
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -122,6 +253,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Se completa con collectstatic al construir la imagen
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Round
+
+from .auditoria import actualizar_auditado
+from .resumen import programar_actualizacion
+from .versiones import incrementar_version
+
+# Acciones masivas sobre socios y conceptos, usadas por el admin y por las
+# listas de la aplicación. Cada acción es un único UPDATE en una transacción;
+# como update() no emite señales, la versión de caché (y el resumen del panel
+# cuando corresponde) se actualiza una vez por lote y no por fila, y el
+# registro de auditoría se arma con actualizar_auditado().
+
+
+def _actualizar(queryset, nombre_modelo, **valores):
+    cantidad = actualizar_auditado(queryset, **valores)
+    if cantidad:
+        incrementar_version(nombre_modelo)
+    return cantidad
+
+
+def cambiar_categoria(socios, categoria):
+    """Asigna la categoría a los socios indicados y retorna cuántos cambiaron"""
+    cantidad = _actualizar(socios.exclude(categoria=categoria), 'Socio', categoria=categoria)
+    if cantidad:
+        # Los socios por categoría del panel cambiaron
+        programar_actualizacion()
+    return cantidad
+
+
+def cambiar_administrador(socios, es_administrador):
+    """Otorga o quita el permiso de administrador a los socios indicados"""
+    return _actualizar(socios.exclude(es_administrador=es_administrador), 'Socio', es_administrador=es_administrador)
+
+
+def aumentar_montos(conceptos, porcentaje):
+    """Aumenta el monto sugerido de los conceptos en el porcentaje indicado, redondeado a centavos"""
+    factor = 1 + Decimal(porcentaje) / 100
+    nuevo_monto = Round(F('monto_sugerido') * Value(factor, output_field=DecimalField()), 2, output_field=DecimalField(max_digits=10, decimal_places=2))
+    return _actualizar(conceptos, 'Concepto', monto_sugerido=nuevo_monto)
+
+
+def desactivar_conceptos(conceptos):
+    """Desactiva los conceptos indicados; dejan de ofrecerse al registrar pagos"""
+    return _actualizar(conceptos.filter(activo=True), 'Concepto', activo=False)
@@ -1,11 +1,47 @@
-from django.contrib import admin
-from .models import Socio, Categoria, Pago, Concepto
+from decimal import Decimal
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.db.models import Q
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .acciones import cambiar_categoria, cambiar_administrador, aumentar_montos, desactivar_conceptos
+from .busqueda import ids_socios, ids_pagos
+from .models import Socio, Categoria, Pago, Concepto, Tarea, Recordatorio, PagoArchivado, Cargo, Perfil, AjustePerfilado, ReglaPromocion, Promocion, RegistroCambio
+from .perfilado import ruta_archivo, tasa_muestreo
+
+class ConceptoActionForm(ActionForm):
+    porcentaje = forms.DecimalField(required=False, max_digits=5, decimal_places=2, min_value=Decimal("0.01"), label="Porcentaje")
+
 
 @admin.register(Concepto)
 class ConceptoAdmin(admin.ModelAdmin):
     list_display = ("nombre", "monto_sugerido", "activo", "descripcion")
     search_fields = ("nombre",)
     list_filter = ("activo",)
+    action_form = ConceptoActionForm
+    actions = ["aumentar_monto_sugerido", "desactivar"]
+    
+    # Las acciones masivas hacen un solo UPDATE (socios.acciones)
+    @admin.action(description="Aumentar el monto sugerido en el porcentaje indicado")
+    def aumentar_monto_sugerido(self, request, queryset):
+        # Las opciones de 'action' las completa el admin: solo interesa el porcentaje
+        form = ConceptoActionForm(request.POST)
+        form.full_clean()
+        porcentaje = form.cleaned_data.get('porcentaje')
+        if not porcentaje:
+            self.message_user(request, "Indique un porcentaje de aumento válido.", messages.ERROR)
+            return
+        cantidad = aumentar_montos(queryset, porcentaje)
+        self.message_user(request, f"Monto sugerido aumentado un {porcentaje}% en {cantidad} conceptos.", messages.SUCCESS)
+    
+    @admin.action(description="Desactivar los conceptos seleccionados")
+    def desactivar(self, request, queryset):
+        cantidad = desactivar_conceptos(queryset)
+        self.message_user(request, f"{cantidad} conceptos desactivados.", messages.SUCCESS)
 
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
@@ -17,12 +53,46 @@ class PagoInline(admin.TabularInline):
     extra = 0
     fields = ('fecha_pago', 'mes_correspondiente', 'monto', 'metodo_pago', 'comprobante')
 
+class SocioActionForm(ActionForm):
+    categoria = forms.ModelChoiceField(queryset=Categoria.objects.all(), required=False, label="Categoría")
+
+
 @admin.register(Socio)
 class SocioAdmin(admin.ModelAdmin):
     list_display = ("nombre", "apellido", "dni", "categoria", "email", "celular", "fecha_nacimiento", "fecha_alta", "estado_pagos")
     search_fields = ("nombre", "apellido", "dni", "email")
     list_filter = ("categoria",)
     inlines = [PagoInline]
+    action_form = SocioActionForm
+    actions = ["cambiar_a_categoria", "hacer_administradores", "quitar_administradores"]
+    
+    @admin.action(description="Cambiar a la categoría indicada")
+    def cambiar_a_categoria(self, request, queryset):
+        form = SocioActionForm(request.POST)
+        form.full_clean()
+        categoria = form.cleaned_data.get('categoria')
+        if not categoria:
+            self.message_user(request, "Indique la nueva categoría.", messages.ERROR)
+            return
+        cantidad = cambiar_categoria(queryset, categoria)
+        self.message_user(request, f"{cantidad} socios pasaron a la categoría {categoria}.", messages.SUCCESS)
+    
+    @admin.action(description="Hacer administradores a los socios seleccionados")
+    def hacer_administradores(self, request, queryset):
+        cantidad = cambiar_administrador(queryset, True)
+        self.message_user(request, f"{cantidad} socios ahora son administradores.", messages.SUCCESS)
+    
+    @admin.action(description="Quitar el permiso de administrador a los socios seleccionados")
+    def quitar_administradores(self, request, queryset):
+        cantidad = cambiar_administrador(queryset, False)
+        self.message_user(request, f"{cantidad} socios dejaron de ser administradores.", messages.SUCCESS)
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Usar el índice de búsqueda (sin acentos) en lugar de LIKE sobre cada campo
+        ids = ids_socios(search_term)
+        if ids is None or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=ids), False
     
     def estado_pagos(self, obj):
         return obj.get_estado_pagos()
@@ -34,4 +104,174 @@ class PagoAdmin(admin.ModelAdmin):
     list_display = ("socio", "concepto", "fecha_pago", "mes_correspondiente", "monto", "metodo_pago", "comprobante")
     list_filter = ("fecha_pago", "metodo_pago", "concepto")
     search_fields = ("socio__nombre", "socio__apellido", "socio__dni", "comprobante")
-    autocomplete_fields = ["socio", "concepto"]
\ No newline at end of file
+    autocomplete_fields = ["socio", "concepto"]
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Buscar por comprobante o por socio usando el índice de búsqueda
+        socios = ids_socios(search_term)
+        pagos = ids_pagos(search_term)
+        if socios is None or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(Q(pk__in=pagos) | Q(socio_id__in=socios)), False
+
+@admin.register(Cargo)
+class CargoAdmin(admin.ModelAdmin):
+    list_display = ("socio", "concepto", "fecha", "periodo", "monto", "descripcion")
+    list_filter = ("fecha", "concepto")
+    search_fields = ("socio__nombre", "socio__apellido", "socio__dni", "periodo")
+    autocomplete_fields = ["socio", "concepto"]
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "estado", "progreso", "mensaje", "intentos", "creada_por", "fecha_creacion", "fecha_fin")
+    list_filter = ("estado", "tipo")
+    readonly_fields = ("progreso", "mensaje", "resultado", "error", "intentos", "worker", "fecha_inicio", "reserva_hasta", "fecha_fin")
+
+@admin.register(Recordatorio)
+class RecordatorioAdmin(admin.ModelAdmin):
+    list_display = ("socio", "periodo", "estado_pagos", "email", "fecha_envio")
+    list_filter = ("periodo", "estado_pagos")
+    search_fields = ("socio__nombre", "socio__apellido", "email")
+
+@admin.register(PagoArchivado)
+class PagoArchivadoAdmin(admin.ModelAdmin):
+    list_display = ("socio", "concepto", "fecha_pago", "mes_correspondiente", "monto", "metodo_pago", "comprobante")
+    list_filter = ("fecha_pago", "metodo_pago")
+    search_fields = ("socio__nombre", "socio__apellido", "socio__dni", "comprobante")
+    
+    # Los pagos archivados solo se modifican restaurándolos con restaurar_pagos
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReglaPromocion)
+class ReglaPromocionAdmin(admin.ModelAdmin):
+    list_display = ("orden", "origen", "destino", "edad_minima", "antiguedad_minima", "activa")
+    list_display_links = ("origen",)
+    list_editable = ("orden", "activa")
+    list_filter = ("activa",)
+
+
+@admin.register(Promocion)
+class PromocionAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "origen", "destino", "condiciones", "fecha_referencia", "cantidad", "ejecutada_por")
+    list_filter = ("origen", "destino")
+    readonly_fields = ("regla", "origen", "destino", "condiciones", "fecha_referencia", "cantidad", "socios", "ejecutada_por")
+    
+    # Registro de auditoría: lo crea promover_socios y no se modifica
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RegistroCambio)
+class RegistroCambioAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "accion", "modelo", "objeto_id", "nombre_usuario")
+    list_filter = ("modelo", "accion")
+    search_fields = ("=objeto_id", "nombre_usuario")
+    date_hierarchy = "fecha"
+    readonly_fields = ("fecha", "usuario", "nombre_usuario", "modelo", "objeto_id", "accion", "antes", "despues")
+    
+    # Lo escribe socios.auditoria y solo se poda con podar_auditoria
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Perfil)
+class PerfilAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "metodo", "ruta", "estado", "duracion_ms", "tiempo_sql_ms", "tiempo_plantillas_ms", "cantidad_consultas", "muestreado", "usuario", "descarga")
+    list_filter = ("muestreado", "metodo")
+    search_fields = ("ruta",)
+    exclude = ("consultas", "resumen")
+    readonly_fields = ("descarga", "consultas_mas_lentas", "resumen_funciones")
+    
+    # Los perfiles los crea socios.perfilado y solo los ven los superusuarios
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+    
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
+    
+    def get_urls(self):
+        return [
+            path('<path:object_id>/descargar/', self.admin_site.admin_view(self.descargar), name='socios_perfil_descargar'),
+        ] + super().get_urls()
+    
+    def changelist_view(self, request, extra_context=None):
+        # La tasa vigente, que se cambia en Ajuste del perfilado
+        tasa = tasa_muestreo()
+        subtitulo = f"Muestreo en segundo plano: {tasa * 100:g} % de las peticiones" if tasa else "Muestreo en segundo plano desactivado"
+        return super().changelist_view(request, {'subtitle': subtitulo, **(extra_context or {})})
+    
+    def descargar(self, request, object_id):
+        if not request.user.is_superuser:
+            raise Http404
+        perfil = get_object_or_404(Perfil, pk=object_id)
+        ruta = ruta_archivo(perfil)
+        if not ruta.exists():
+            raise Http404("El archivo del perfil ya no existe.")
+        return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=perfil.archivo)
+    
+    def descarga(self, obj):
+        return format_html('<a href="{}">{}</a>', reverse('admin:socios_perfil_descargar', args=[obj.pk]), obj.archivo)
+    
+    descarga.short_description = "Archivo .prof"
+    
+    def consultas_mas_lentas(self, obj):
+        consultas = sorted(obj.consultas, key=lambda consulta: consulta['ms'], reverse=True)
+        return format_html(
+            '<table><tr><th>ms</th><th>Base</th><th>SQL</th><th>Origen</th></tr>{}</table>',
+            format_html_join('', '<tr><td>{}</td><td>{}</td><td><code>{}</code></td><td>{}</td></tr>', (
+                (consulta['ms'], consulta['alias'], consulta['sql'], ' ← '.join(consulta['origen']))
+                for consulta in consultas
+            )),
+        )
+    
+    consultas_mas_lentas.short_description = "Consultas (de la más lenta a la más rápida)"
+    
+    def resumen_funciones(self, obj):
+        return format_html('<pre>{}</pre>', obj.resumen)
+    
+    resumen_funciones.short_description = "Funciones con mayor tiempo acumulado"
+
+
+@admin.register(AjustePerfilado)
+class AjustePerfiladoAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "muestreo", "fecha_modificacion")
+    
+    # Una sola fila, solo para superusuarios; sin fila rige PERFILADO_MUESTREO
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+    
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+    
+    def has_add_permission(self, request):
+        return request.user.is_superuser and not AjustePerfilado.objects.exists()
+    
+    def has_change_permission(self, request, obj=None):
+        return request.user.is_superuser
+    
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
@@ -0,0 +1,143 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.gzip import gzip_page
+
+from .archivo import requiere_archivo
+from .models import Socio, Pago, PagoArchivado, Concepto, Categoria
+from .views import EsAdministradorMixin, LecturaReplicaMixin, filtrar_pagos
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+
+class ErrorApi(Exception):
+    pass
+
+
+def codificar_cursor(pk):
+    return base64.urlsafe_b64encode(json.dumps({'pk': pk}).encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))['pk'])
+    except (ValueError, KeyError, TypeError):
+        raise ErrorApi("Cursor inválido.")
+
+
+# Vista base de la API de solo lectura (v1).
+# Pagina por cursor sobre la clave primaria, de modo que cada página es una
+# búsqueda por índice sin OFFSET, y el parámetro fields= limita las columnas
+# del SELECT. Las exportaciones leen de la réplica si está vigente.
+@method_decorator(gzip_page, name='dispatch')
+class ApiListView(EsAdministradorMixin, LecturaReplicaMixin, View):
+    model = None
+    # Campos expuestos; las claves foráneas se devuelven como id
+    campos = ()
+
+    def handle_no_permission(self):
+        if not self.request.user.is_authenticated:
+            return JsonResponse({'error': 'No autorizado'}, status=401)
+        return JsonResponse({'error': 'No tienes permisos suficientes'}, status=403)
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    def get_campos(self):
+        fields = self.request.GET.get('fields')
+        if not fields:
+            return list(self.campos)
+        pedidos = [campo.strip() for campo in fields.split(',') if campo.strip()]
+        invalidos = [campo for campo in pedidos if campo not in self.campos]
+        if invalidos:
+            raise ErrorApi(f"Campos no disponibles: {', '.join(invalidos)}.")
+        # El id siempre se incluye porque es la base del cursor
+        return ['id'] + [campo for campo in pedidos if campo != 'id']
+
+    def get_limite(self):
+        try:
+            limite = int(self.request.GET.get('limit', LIMITE_POR_DEFECTO))
+        except ValueError:
+            raise ErrorApi("El parámetro limit debe ser un número.")
+        return max(1, min(limite, LIMITE_MAXIMO))
+
+    def leer_filas(self, queryset, campos, cantidad, despues_de=None):
+        """Primeras filas del queryset ordenadas por pk, a partir del cursor"""
+        if despues_de is not None:
+            queryset = queryset.filter(pk__gt=despues_de)
+        return list(queryset.order_by('pk').values(*campos)[:cantidad])
+
+    def get(self, request, *args, **kwargs):
+        try:
+            campos = self.get_campos()
+            limite = self.get_limite()
+            cursor = request.GET.get('cursor')
+            despues_de = decodificar_cursor(cursor) if cursor else None
+            # Se pide una fila de más para saber si existe una página siguiente
+            filas = self.leer_filas(self.get_queryset(), campos, limite + 1, despues_de)
+        except ValidationError as e:
+            return JsonResponse({'error': ' '.join(e.messages)}, status=400)
+        except (ErrorApi, ValueError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        siguiente = None
+        if len(filas) > limite:
+            filas = filas[:limite]
+            params = request.GET.copy()
+            params['cursor'] = codificar_cursor(filas[-1]['id'])
+            siguiente = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+        return JsonResponse({'results': filas, 'next': siguiente})
+
+
+class SocioApiView(ApiListView):
+    model = Socio
+    campos = (
+        'id', 'nombre', 'apellido', 'direccion', 'dni', 'categoria', 'email',
+        'celular', 'fecha_nacimiento', 'fecha_alta', 'es_administrador',
+    )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        categoria_id = self.request.GET.get('categoria')
+        if categoria_id:
+            queryset = queryset.filter(categoria_id=categoria_id)
+        return queryset
+
+
+class PagoApiView(ApiListView):
+    model = Pago
+    campos = (
+        'id', 'socio', 'concepto', 'monto', 'fecha_pago', 'mes_correspondiente',
+        'metodo_pago', 'comprobante', 'comentarios',
+    )
+
+    def get_queryset(self):
+        # Mismos filtros que PagoListView
+        return filtrar_pagos(super().get_queryset(), self.request.GET)
+
+    def leer_filas(self, queryset, campos, cantidad, despues_de=None):
+        filas = super().leer_filas(queryset, campos, cantidad, despues_de)
+        # Como PagoListView, incluye el archivo si el período llega a él. Los
+        # pagos archivados conservan su id, así que el cursor sirve para ambas
+        # tablas: se toman las primeras filas de cada una y se intercalan
+        if requiere_archivo(self.request.GET.get('fecha_desde')):
+            archivados = filtrar_pagos(PagoArchivado.objects.all(), self.request.GET)
+            filas += super().leer_filas(archivados, campos, cantidad, despues_de)
+            filas = sorted(filas, key=lambda fila: fila['id'])[:cantidad]
+        return filas
+
+
+class ConceptoApiView(ApiListView):
+    model = Concepto
+    campos = ('id', 'nombre', 'descripcion', 'monto_sugerido', 'activo')
+
+
+class CategoriaApiView(ApiListView):
+    model = Categoria
+    campos = ('id', 'nombre', 'descripcion')
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class SociosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'socios'
+
+    def ready(self):
+        # Registrar las señales que mantienen las versiones de los modelos
+        from . import signals  # noqa: F401
+        # Registrar las tareas en segundo plano definidas en la aplicación
+        from . import recordatorios, resumen  # noqa: F401
@@ -0,0 +1,143 @@
+import contextvars
+import datetime
+
+from django.db import router, transaction
+from django.db.models import Max, Sum, Value, BooleanField
+from django.utils import timezone
+
+from .auditoria import registrar_varios
+from .models import DIAS_ATRASO, Pago, PagoArchivado
+from .resumen import programar_actualizacion
+from .versiones import incrementar_version
+
+# Activo mientras _mover traslada pagos: delete() emite post_delete por cada
+# fila y los receptores de signals.py no deben repetir su trabajo por fila ni
+# registrar el pago archivado como dado de baja
+_moviendo = contextvars.ContextVar('socios_moviendo_pagos', default=False)
+
+
+def moviendo_pagos():
+    """Indica si el borrado en curso es parte de un archivo o restauración"""
+    return _moviendo.get()
+
+
+def _mover(origen, modelo_destino, tamano_lote):
+    """Mueve las filas de origen a modelo_destino en lotes transaccionales.
+
+    Cada lote deja en el registro de auditoría una entrada 'archivo' o
+    'restauracion' por pago, en lugar de la baja que anotaría delete().
+    Retorna la cantidad de filas movidas.
+    """
+    campos = PagoArchivado.CAMPOS_PAGO
+    accion = 'archivo' if modelo_destino is PagoArchivado else 'restauracion'
+    movidos = 0
+    token = _moviendo.set(True)
+    try:
+        while True:
+            alias = router.db_for_write(modelo_destino)
+            with transaction.atomic(using=alias):
+                filas = list(origen.order_by('pk').values(*campos)[:tamano_lote])
+                if not filas:
+                    break
+                ids = [fila['id'] for fila in filas]
+                modelo_destino.objects.bulk_create([modelo_destino(**fila) for fila in filas])
+                origen.model.objects.filter(pk__in=ids).delete()
+                registrar_varios(Pago, ids, accion, alias)
+            movidos += len(filas)
+    finally:
+        _moviendo.reset(token)
+    if movidos:
+        # bulk_create no emite señales y las de delete() se ignoran (ver
+        # moviendo_pagos): versión y resumen se actualizan una vez al final
+        incrementar_version('Pago')
+        programar_actualizacion()
+    return movidos
+
+
+def limite_archivo(hasta_anio):
+    """Primera fecha de pago que archivar_pagos(hasta_anio) deja en la tabla.
+
+    Los pagos de los últimos DIAS_ATRASO días se quedan aunque sean de un
+    ejercicio cerrado: el estado de pagos de los socios solo consulta la
+    tabla de pagos, y archivarlos volvería morosos a quienes están al día.
+    """
+    return min(datetime.date(hasta_anio + 1, 1, 1), timezone.localdate() - datetime.timedelta(days=DIAS_ATRASO))
+
+
+def archivar_pagos(hasta_anio, tamano_lote=1000):
+    """Mueve al archivo los pagos de los ejercicios cerrados hasta hasta_anio inclusive"""
+    if hasta_anio >= timezone.localdate().year:
+        raise ValueError("Solo se pueden archivar ejercicios cerrados (anteriores al año actual).")
+    pagos = Pago.objects.filter(fecha_pago__lt=limite_archivo(hasta_anio))
+    return _mover(pagos, PagoArchivado, tamano_lote)
+
+
+def restaurar_pagos(desde_anio, tamano_lote=1000):
+    """Devuelve a la tabla de pagos los pagos archivados desde desde_anio inclusive"""
+    archivados = PagoArchivado.objects.filter(fecha_pago__gte=datetime.date(desde_anio, 1, 1))
+    return _mover(archivados, Pago, tamano_lote)
+
+
+def ultima_fecha_archivada():
+    return PagoArchivado.objects.aggregate(ultima=Max('fecha_pago'))['ultima']
+
+
+def requiere_archivo(fecha_desde):
+    """Indica si un período que empieza en fecha_desde incluye pagos archivados.
+
+    Sin fecha_desde el período no tiene límite inferior y llega al archivo
+    cualquiera sea su fecha final. El archivo solo tiene pagos hasta
+    ultima_fecha_archivada(), así que la fecha final no decide nada más.
+    """
+    ultima = ultima_fecha_archivada()
+    if ultima is None:
+        return False
+    return not fecha_desde or str(fecha_desde) <= ultima.isoformat()
+
+
+class PagosConArchivo:
+    """Unión ordenada por fecha de pagos activos y archivados.
+
+    Se comporta como una secuencia perezosa compatible con Paginator: la unión
+    solo recorre claves (id, fecha) y los objetos completos se cargan para la
+    página pedida.
+    """
+
+    def __init__(self, pagos, archivados):
+        self.pagos = pagos
+        self.archivados = archivados
+        self.claves = (
+            pagos.order_by().values('pk', 'fecha_pago')
+            .annotate(archivado=Value(False, output_field=BooleanField()))
+            .union(
+                archivados.order_by().values('pk', 'fecha_pago')
+                .annotate(archivado=Value(True, output_field=BooleanField())),
+                all=True,
+            )
+            .order_by('-fecha_pago', '-pk')
+        )
+
+    def count(self):
+        return self.claves.count()
+
+    def __len__(self):
+        return self.count()
+
+    def total(self):
+        totales = [qs.aggregate(total=Sum('monto'))['total'] or 0 for qs in (self.pagos, self.archivados)]
+        return sum(totales)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, int):
+            return self[indice:indice + 1][0]
+        filas = list(self.claves[indice])
+        activos = self.pagos.select_related('socio', 'concepto').in_bulk(
+            [fila['pk'] for fila in filas if not fila['archivado']]
+        )
+        archivados = self.archivados.select_related('socio', 'concepto').in_bulk(
+            [fila['pk'] for fila in filas if fila['archivado']]
+        )
+        return [(archivados if fila['archivado'] else activos)[fila['pk']] for fila in filas]
+
+    def __iter__(self):
+        return iter(self[:])
@@ -0,0 +1,266 @@
+import contextvars
+import datetime
+import gzip
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router, transaction
+from django.utils import timezone
+from django.utils.decorators import sync_and_async_middleware
+
+from .clubes import club_actual
+from .models import RegistroCambio
+
+# Registro de auditoría de socios, pagos, conceptos y categorías.
+#
+# Las señales de signals.py anotan cada alta, modificación y baja con el
+# usuario, la fecha y los valores anteriores y nuevos. Las entradas no se
+# insertan una por una: se acumulan durante la petición y se guardan juntas
+# en un único INSERT al terminarla (auditoria_middleware). Fuera de una
+# petición se guardan en el momento, o al salir de agrupar_cambios().
+#
+# Cada entrada se acumula recién cuando se confirma la transacción del
+# cambio, así un cambio revertido no queda registrado.
+#
+# El registro solo crece; podar_registro() exporta los meses antiguos a un
+# archivo comprimido por mes en AUDITORIA_DIR y los elimina de la tabla.
+
+PREFIJO = 'cambios-'
+EXTENSION = '.jsonl.gz'
+
+# Entradas insertadas por sentencia
+TAMANO_LOTE = 500
+
+# Función que retorna el usuario y no el usuario: request.user es perezoso y
+# asgiref compara los valores del contexto al pasar entre hilos, lo que lo
+# resolvería (con una consulta) fuera de un hilo síncrono
+_usuario = contextvars.ContextVar('socios_auditoria_usuario', default=None)
+_pendientes = contextvars.ContextVar('socios_auditoria_pendientes', default=None)
+
+
+def valores(instancia):
+    """Valores de los campos de la instancia, por nombre de columna"""
+    return {campo.attname: campo.value_from_object(instancia) for campo in instancia._meta.concrete_fields}
+
+
+def estado_guardado(instancia, using):
+    """Valores actuales en la base de una instancia que se va a modificar"""
+    if instancia._state.adding or instancia.pk is None:
+        return None
+    campos = [campo.attname for campo in instancia._meta.concrete_fields]
+    return type(instancia)._default_manager.using(using).filter(pk=instancia.pk).values(*campos).first()
+
+
+def diferencias(modelo, antes, despues):
+    """Retorna (antes, despues) con solo los campos que cambiaron"""
+    cambiados = [
+        nombre for nombre, valor in despues.items()
+        # to_python iguala, por ejemplo, Decimal('10') y Decimal('10.00')
+        if nombre in antes and _normalizar(modelo, nombre, antes[nombre]) != _normalizar(modelo, nombre, valor)
+    ]
+    return {nombre: antes[nombre] for nombre in cambiados}, {nombre: despues[nombre] for nombre in cambiados}
+
+
+def _normalizar(modelo, attname, valor):
+    campo = next(campo for campo in modelo._meta.concrete_fields if campo.attname == attname)
+    return campo.to_python(valor)
+
+
+def _usuario_actual():
+    obtener_usuario = _usuario.get()
+    usuario = obtener_usuario() if obtener_usuario else None
+    if usuario is not None and usuario.is_authenticated:
+        return usuario.pk, usuario.get_username()
+    return None, ''
+
+
+def registrar(modelo, objeto_id, accion, antes, despues, using):
+    """Anota un cambio; se guarda al confirmarse la transacción y terminar la petición"""
+    usuario_id, nombre_usuario = _usuario_actual()
+    entrada = RegistroCambio(
+        fecha=timezone.now(),
+        usuario_id=usuario_id,
+        nombre_usuario=nombre_usuario,
+        modelo=modelo._meta.object_name,
+        objeto_id=objeto_id,
+        accion=accion,
+        antes=antes,
+        despues=despues,
+    )
+    transaction.on_commit(lambda: _encolar([entrada], using), using=using)
+
+
+def registrar_varios(modelo, objetos_ids, accion, using):
+    """Anota la misma acción, sin valores, sobre varios objetos de un lote"""
+    usuario_id, nombre_usuario = _usuario_actual()
+    fecha = timezone.now()
+    entradas = [
+        RegistroCambio(
+            fecha=fecha,
+            usuario_id=usuario_id,
+            nombre_usuario=nombre_usuario,
+            modelo=modelo._meta.object_name,
+            objeto_id=objeto_id,
+            accion=accion,
+        )
+        for objeto_id in objetos_ids
+    ]
+    transaction.on_commit(lambda: _encolar(entradas, using), using=using)
+
+
+def _encolar(entradas, using):
+    pendientes = _pendientes.get()
+    if pendientes is None:
+        guardar_pendientes([(using, entrada) for entrada in entradas])
+    else:
+        pendientes.extend((using, entrada) for entrada in entradas)
+
+
+def guardar_pendientes(pendientes):
+    """Inserta las entradas acumuladas, agrupadas por base de datos"""
+    por_base = defaultdict(list)
+    for using, entrada in pendientes:
+        por_base[using].append(entrada)
+    for using, entradas in por_base.items():
+        RegistroCambio.objects.using(using).bulk_create(entradas, batch_size=TAMANO_LOTE)
+    pendientes.clear()
+
+
+@contextmanager
+def _agrupar(obtener_usuario):
+    pendientes = []
+    token_pendientes = _pendientes.set(pendientes)
+    token_usuario = _usuario.set(obtener_usuario)
+    try:
+        yield pendientes
+    finally:
+        _usuario.reset(token_usuario)
+        _pendientes.reset(token_pendientes)
+        guardar_pendientes(pendientes)
+
+
+def agrupar_cambios(usuario=None):
+    """Acumula las entradas del bloque y las guarda juntas al salir"""
+    return _agrupar(lambda: usuario)
+
+
+@sync_and_async_middleware
+def auditoria_middleware(get_response):
+    """Guarda al final de la petición los cambios registrados durante ella.
+
+    Va después de AuthenticationMiddleware: el usuario se resuelve solo si
+    la petición modifica algún modelo auditado.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            pendientes = []
+            token_pendientes = _pendientes.set(pendientes)
+            token_usuario = _usuario.set(lambda: request.user)
+            try:
+                return await get_response(request)
+            finally:
+                _usuario.reset(token_usuario)
+                _pendientes.reset(token_pendientes)
+                if pendientes:
+                    await sync_to_async(guardar_pendientes)(pendientes)
+    else:
+        def middleware(request):
+            with _agrupar(lambda: request.user):
+                return get_response(request)
+    return middleware
+
+
+def actualizar_auditado(queryset, **nuevos_valores):
+    """queryset.update() que registra los valores anteriores y nuevos de cada fila.
+
+    Para las acciones masivas, que no emiten señales: dos SELECT y un UPDATE
+    por lote en una transacción. Retorna la cantidad de filas actualizadas.
+    """
+    modelo = queryset.model
+    # Mismos nombres que las entradas de las señales (categoria_id, no categoria)
+    campos = [modelo._meta.get_field(nombre).attname for nombre in nuevos_valores]
+    using = router.db_for_write(modelo)
+    with transaction.atomic(using=using):
+        antes = {fila.pop('pk'): fila for fila in queryset.values('pk', *campos)}
+        if not antes:
+            return 0
+        cantidad = modelo._default_manager.filter(pk__in=list(antes)).update(**nuevos_valores)
+        for fila in modelo._default_manager.filter(pk__in=list(antes)).values('pk', *campos):
+            pk = fila.pop('pk')
+            anterior, nuevo = antes[pk], fila
+            if anterior != nuevo:
+                registrar(modelo, pk, 'modificacion', anterior, nuevo, using)
+    return cantidad
+
+
+def historial(objeto):
+    """Cambios registrados de un objeto, del más reciente al más antiguo"""
+    return RegistroCambio.objects.filter(modelo=objeto._meta.object_name, objeto_id=objeto.pk)
+
+
+def _directorio():
+    club = club_actual()
+    return Path(settings.AUDITORIA_DIR) / 'clubes' / club if club else Path(settings.AUDITORIA_DIR)
+
+
+def _inicio_mes(fecha):
+    return fecha.replace(day=1)
+
+
+def _mes_siguiente(fecha):
+    return (fecha.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def podar_registro(meses=None, exportar=True, tamano_lote=5000):
+    """Quita de la tabla los meses anteriores a los últimos `meses` meses.
+
+    Cada mes se exporta primero (si exportar) a su propio archivo JSON Lines
+    comprimido, que funciona como partición histórica: se agrega al final,
+    de modo que repetir una poda interrumpida no pierde entradas. Las filas
+    se eliminan por lotes para no bloquear la base.
+
+    Retorna un dict {'AAAA-MM': entradas quitadas}.
+    """
+    meses = settings.AUDITORIA_MESES if meses is None else meses
+    limite = _inicio_mes(timezone.localdate())
+    for _ in range(meses):
+        limite = _inicio_mes(limite - datetime.timedelta(days=1))
+    limite = timezone.make_aware(datetime.datetime.combine(limite, datetime.time.min))
+
+    primera = RegistroCambio.objects.filter(fecha__lt=limite).order_by('fecha').values_list('fecha', flat=True).first()
+    resultado = {}
+    if primera is None:
+        return resultado
+    directorio = _directorio()
+    if exportar:
+        directorio.mkdir(parents=True, exist_ok=True)
+
+    mes = _inicio_mes(timezone.localtime(primera).date())
+    while True:
+        desde = timezone.make_aware(datetime.datetime.combine(mes, datetime.time.min))
+        if desde >= limite:
+            break
+        hasta = min(timezone.make_aware(datetime.datetime.combine(_mes_siguiente(mes), datetime.time.min)), limite)
+        entradas = RegistroCambio.objects.filter(fecha__gte=desde, fecha__lt=hasta).order_by('pk')
+        cantidad = 0
+        while True:
+            lote = list(entradas.values(
+                'pk', 'fecha', 'usuario_id', 'nombre_usuario', 'modelo', 'objeto_id', 'accion', 'antes', 'despues',
+            )[:tamano_lote])
+            if not lote:
+                break
+            if exportar:
+                with gzip.open(directorio / f"{PREFIJO}{mes:%Y-%m}{EXTENSION}", 'at', encoding='utf-8') as archivo:
+                    for fila in lote:
+                        archivo.write(json.dumps(fila, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+            RegistroCambio.objects.filter(pk__in=[fila['pk'] for fila in lote]).delete()
+            cantidad += len(lote)
+        if cantidad:
+            resultado[f"{mes:%Y-%m}"] = cantidad
+        mes = _mes_siguiente(mes)
+    return resultado
@@ -0,0 +1,200 @@
+import re
+
+from django.db import connection, connections, router
+from django.db.models import Q
+
+from .models import Socio, Pago
+
+# Índice de búsqueda global sobre Socio (nombre, dni, email) y Pago (comprobante).
+#
+# En SQLite se usa una tabla virtual FTS5 que ignora acentos (unicode61 con
+# remove_diacritics) y se mantiene con triggers. Cada fila usa como rowid
+# id * 2 para socios e id * 2 + 1 para pagos, de modo que los triggers
+# actualizan por clave primaria. En PostgreSQL se usan índices GIN de
+# trigramas sobre las columnas sin acentos, que no necesitan triggers.
+
+TABLA = 'socios_busqueda'
+
+SQLITE_INSTALAR = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA} USING fts5(
+        tipo UNINDEXED, objeto_id UNINDEXED, titulo, dni, email, comprobante,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA}_socio_ai AFTER INSERT ON socios_socio BEGIN
+        INSERT INTO {TABLA}(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        VALUES (new.id * 2, 'socio', new.id, new.nombre || ' ' || new.apellido, new.dni, new.email, '');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA}_socio_au AFTER UPDATE OF nombre, apellido, dni, email ON socios_socio BEGIN
+        DELETE FROM {TABLA} WHERE rowid = old.id * 2;
+        INSERT INTO {TABLA}(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        VALUES (new.id * 2, 'socio', new.id, new.nombre || ' ' || new.apellido, new.dni, new.email, '');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA}_socio_ad AFTER DELETE ON socios_socio BEGIN
+        DELETE FROM {TABLA} WHERE rowid = old.id * 2;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA}_pago_ai AFTER INSERT ON socios_pago
+    WHEN coalesce(new.comprobante, '') <> '' BEGIN
+        INSERT INTO {TABLA}(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        VALUES (new.id * 2 + 1, 'pago', new.id, '', '', '', new.comprobante);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA}_pago_au AFTER UPDATE OF comprobante ON socios_pago BEGIN
+        DELETE FROM {TABLA} WHERE rowid = old.id * 2 + 1;
+        INSERT INTO {TABLA}(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        SELECT new.id * 2 + 1, 'pago', new.id, '', '', '', new.comprobante
+        WHERE coalesce(new.comprobante, '') <> '';
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA}_pago_ad AFTER DELETE ON socios_pago BEGIN
+        DELETE FROM {TABLA} WHERE rowid = old.id * 2 + 1;
+    END""",
+]
+
+SQLITE_RECONSTRUIR = [
+    f"DELETE FROM {TABLA}",
+    f"""INSERT INTO {TABLA}(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        SELECT id * 2, 'socio', id, nombre || ' ' || apellido, dni, email, '' FROM socios_socio""",
+    f"""INSERT INTO {TABLA}(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        SELECT id * 2 + 1, 'pago', id, '', '', '', comprobante FROM socios_pago
+        WHERE coalesce(comprobante, '') <> ''""",
+    f"INSERT INTO {TABLA}({TABLA}) VALUES ('optimize')",
+]
+
+SQLITE_DESINSTALAR = [
+    f"DROP TABLE IF EXISTS {TABLA}",
+] + [
+    f"DROP TRIGGER IF EXISTS {TABLA}_{nombre}"
+    for nombre in ('socio_ai', 'socio_au', 'socio_ad', 'pago_ai', 'pago_au', 'pago_ad')
+]
+
+# Expresiones indexadas en PostgreSQL (deben coincidir con las de las consultas)
+PG_EXPR_SOCIO = "socios_unaccent(lower(nombre || ' ' || apellido || ' ' || dni || ' ' || email))"
+PG_EXPR_PAGO = "socios_unaccent(lower(coalesce(comprobante, '')))"
+
+POSTGRESQL_INSTALAR = [
+    # En public, que está en el search_path de todos los clubes
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public",
+    "CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA public",
+    # unaccent() no es IMMUTABLE y no puede usarse en un índice sin este envoltorio
+    """CREATE OR REPLACE FUNCTION socios_unaccent(text) RETURNS text AS
+        $$ SELECT public.unaccent('public.unaccent', $1) $$
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT""",
+    f"CREATE INDEX IF NOT EXISTS socios_socio_busqueda_trgm ON socios_socio USING gin ({PG_EXPR_SOCIO} gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS socios_pago_busqueda_trgm ON socios_pago USING gin ({PG_EXPR_PAGO} gin_trgm_ops)",
+]
+
+POSTGRESQL_DESINSTALAR = [
+    "DROP INDEX IF EXISTS socios_socio_busqueda_trgm",
+    "DROP INDEX IF EXISTS socios_pago_busqueda_trgm",
+    "DROP FUNCTION IF EXISTS socios_unaccent(text)",
+]
+
+
+def _ejecutar(conexion, sentencias):
+    with conexion.cursor() as cursor:
+        for sentencia in sentencias:
+            cursor.execute(sentencia)
+
+
+def instalar_indice(conexion=connection):
+    """Crea el índice y sus triggers si no existen (es idempotente)"""
+    if conexion.vendor == 'sqlite':
+        _ejecutar(conexion, SQLITE_INSTALAR)
+    elif conexion.vendor == 'postgresql':
+        _ejecutar(conexion, POSTGRESQL_INSTALAR)
+
+
+def reparar_indice(conexion=connection):
+    """Vuelve a crear los triggers si el índice existe.
+
+    SQLite reconstruye la tabla en muchas operaciones ALTER de las migraciones
+    y con ella se pierden sus triggers; se ejecuta después de cada migrate.
+    """
+    if conexion.vendor == 'sqlite' and TABLA in conexion.introspection.table_names():
+        _ejecutar(conexion, SQLITE_INSTALAR)
+
+
+def reconstruir_indice(conexion=connection):
+    """Vuelve a cargar el índice completo a partir de las tablas"""
+    if conexion.vendor == 'sqlite':
+        instalar_indice(conexion)
+        _ejecutar(conexion, SQLITE_RECONSTRUIR)
+
+
+def desinstalar_indice(conexion=connection):
+    if conexion.vendor == 'sqlite':
+        _ejecutar(conexion, SQLITE_DESINSTALAR)
+    elif conexion.vendor == 'postgresql':
+        _ejecutar(conexion, POSTGRESQL_DESINSTALAR)
+
+
+def _terminos(texto):
+    return re.findall(r'\w+', texto or '')
+
+
+def _consulta_fts(terminos, columnas):
+    # Cada término se busca como prefijo y todos deben aparecer
+    return f"{{{' '.join(columnas)}}} : (" + ' '.join(f'"{t}"*' for t in terminos) + ")"
+
+
+def _buscar_ids(tipo, texto, limite):
+    """Retorna [(id, rank)] de objetos del tipo indicado, del más al menos relevante.
+
+    Retorna None si la base de datos no tiene índice de búsqueda.
+    """
+    terminos = _terminos(texto)
+    if not terminos:
+        return []
+    conexion = connections[router.db_for_read(Socio)]
+    if conexion.vendor == 'sqlite':
+        columnas = ('titulo', 'dni', 'email') if tipo == 'socio' else ('comprobante',)
+        sql = (
+            f"SELECT objeto_id, bm25({TABLA}) AS rank FROM {TABLA} "
+            f"WHERE {TABLA} MATCH %s AND tipo = %s ORDER BY rank LIMIT %s"
+        )
+        parametros = [_consulta_fts(terminos, columnas), tipo, limite]
+    elif conexion.vendor == 'postgresql':
+        tabla, expr = ('socios_socio', PG_EXPR_SOCIO) if tipo == 'socio' else ('socios_pago', PG_EXPR_PAGO)
+        sql = (
+            f"SELECT id, -word_similarity(socios_unaccent(lower(%s)), {expr}) AS rank FROM {tabla} "
+            f"WHERE socios_unaccent(lower(%s)) <%% {expr} ORDER BY rank LIMIT %s"
+        )
+        consulta = ' '.join(terminos)
+        parametros = [consulta, consulta, limite]
+    else:
+        return None
+    with conexion.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return cursor.fetchall()
+
+
+def ids_socios(texto, limite=1000):
+    """Ids de socios que coinciden con el texto, o None si no hay índice"""
+    resultado = _buscar_ids('socio', texto, limite)
+    return None if resultado is None else [objeto_id for objeto_id, _ in resultado]
+
+
+def ids_pagos(texto, limite=1000):
+    """Ids de pagos cuyo comprobante coincide con el texto, o None si no hay índice"""
+    resultado = _buscar_ids('pago', texto, limite)
+    return None if resultado is None else [objeto_id for objeto_id, _ in resultado]
+
+
+def buscar(texto, limite=20):
+    """Búsqueda global: retorna [(tipo, objeto)] de socios y pagos ordenados por relevancia"""
+    socios = _buscar_ids('socio', texto, limite)
+    pagos = _buscar_ids('pago', texto, limite)
+    if socios is None:
+        # Sin índice: búsqueda simple por coincidencia parcial
+        socios = [(pk, 0) for pk in Socio.objects.filter(
+            Q(nombre__icontains=texto) | Q(apellido__icontains=texto) |
+            Q(dni__icontains=texto) | Q(email__icontains=texto)
+        ).values_list('pk', flat=True)[:limite]]
+        pagos = [(pk, 0) for pk in Pago.objects.filter(
+            comprobante__icontains=texto
+        ).values_list('pk', flat=True)[:limite]]
+
+    objetos_socios = Socio.objects.select_related('categoria').in_bulk([pk for pk, _ in socios])
+    objetos_pagos = Pago.objects.select_related('socio', 'concepto').in_bulk([pk for pk, _ in pagos])
+    resultados = [(rank, 'socio', objetos_socios.get(pk)) for pk, rank in socios]
+    resultados += [(rank, 'pago', objetos_pagos.get(pk)) for pk, rank in pagos]
+    resultados.sort(key=lambda resultado: resultado[0])
+    return [(tipo, objeto) for _, tipo, objeto in resultados[:limite] if objeto is not None]
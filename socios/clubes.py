@@ -0,0 +1,95 @@
+import contextvars
+import os
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http.request import split_domain_port
+from django.utils.decorators import sync_and_async_middleware
+
+# Modo multi-club: varios clubes en una misma instalación, cada uno con su
+# propia base de datos (archivo SQLite o esquema de PostgreSQL).
+#
+# settings.CLUBES asocia el alias de cada club con sus nombres de host, y
+# settings.py agrega una entrada en DATABASES por club. Los hosts que no
+# figuran en CLUBES, y la instalación sin clubes, usan 'default'.
+#
+# El club se elige por petición según el host (club_middleware) o, fuera de
+# una petición, con la variable de entorno ACFT_CLUB, por ejemplo para correr
+# un worker de tareas o un respaldo de un club:
+#     ACFT_CLUB=otroclub python manage.py procesar_tareas
+#
+# Los comandos de Django con opción --database la usan en lugar del club
+# activo: python manage.py createsuperuser --database otroclub
+
+_club_actual = contextvars.ContextVar('socios_club_actual', default=os.environ.get('ACFT_CLUB') or None)
+
+
+def club_por_host(host):
+    """Alias del club que atiende el host indicado, o None para el club principal"""
+    dominio, _ = split_domain_port(host)
+    for alias, hosts in settings.CLUBES.items():
+        if dominio in hosts:
+            return alias
+    return None
+
+
+def club_actual():
+    return _club_actual.get()
+
+
+@contextmanager
+def activar_club(alias):
+    """Ejecuta el bloque sobre la base del club indicado (None: club principal)"""
+    if alias is not None and alias not in settings.CLUBES:
+        raise LookupError(f"No existe el club '{alias}'.")
+    token = _club_actual.set(alias)
+    try:
+        yield alias
+    finally:
+        _club_actual.reset(token)
+
+
+@sync_and_async_middleware
+def club_middleware(get_response):
+    """Activa el club del host durante toda la petición, incluida la sesión"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with activar_club(club_por_host(request.get_host())):
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with activar_club(club_por_host(request.get_host())):
+                return get_response(request)
+    return middleware
+
+
+class ClubRouter:
+    """Envía todas las consultas del club activo a su base.
+
+    Va antes que ReplicaRouter: sin club activo no decide nada y las
+    lecturas pueden ir a la réplica del club principal.
+    """
+
+    def db_for_read(self, model, **hints):
+        return club_actual()
+
+    def db_for_write(self, model, **hints):
+        return club_actual()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Nunca relacionar objetos de clubes distintos
+        if obj1._state.db in settings.CLUBES or obj2._state.db in settings.CLUBES:
+            return obj1._state.db == obj2._state.db
+        return None
+
+
+def clave_cache(key, key_prefix, version):
+    """KEY_FUNCTION de la caché: separa las claves de cada club.
+
+    Las del club principal conservan el formato por defecto de Django.
+    """
+    club = club_actual()
+    if club is None:
+        return f"{key_prefix}:{version}:{key}"
+    return f"club-{club}:{key_prefix}:{version}:{key}"
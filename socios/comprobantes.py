@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from pathlib import Path
+
+from django.conf import settings
+
+# Cambiar al modificar el diseño del comprobante para invalidar la caché
+VERSION_DISENO = 1
+
+
+def datos_comprobante(pago):
+    """Datos del pago que se imprimen en el comprobante (y determinan su hash)"""
+    socio = pago.socio
+    return {
+        'pago': pago.pk,
+        'socio': f"{socio.nombre} {socio.apellido}",
+        'dni': socio.dni,
+        'concepto': pago.concepto.nombre if pago.concepto else '',
+        'monto': str(pago.monto),
+        'fecha_pago': pago.fecha_pago.strftime('%d/%m/%Y'),
+        'mes_correspondiente': pago.mes_correspondiente,
+        'metodo_pago': pago.get_metodo_pago_display(),
+        'comprobante': pago.comprobante or '',
+    }
+
+
+def hash_comprobante(datos):
+    contenido = json.dumps({'version': VERSION_DISENO, **datos}, sort_keys=True)
+    return hashlib.sha256(contenido.encode()).hexdigest()
+
+
+def ruta_comprobante(hash_contenido):
+    return Path(settings.COMPROBANTES_DIR) / hash_contenido[:2] / f"{hash_contenido}.pdf"
+
+
+def _escapar(texto):
+    return texto.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def generar_pdf(datos):
+    """Genera un PDF de una página con la fuente estándar Helvetica.
+
+    No depende de bibliotecas externas: el comprobante es solo texto, así que
+    alcanza con escribir los objetos PDF mínimos a mano.
+    """
+    lineas = [
+        (16, "Club de Ferromodelismo"),
+        (13, f"Comprobante de pago N.º {datos['pago']:06d}"),
+        (11, ""),
+        (11, f"Socio: {datos['socio']} (DNI {datos['dni']})"),
+        (11, f"Concepto: {datos['concepto'] or '-'}"),
+        (11, f"Mes correspondiente: {datos['mes_correspondiente']}"),
+        (11, f"Fecha de pago: {datos['fecha_pago']}"),
+        (11, f"Método de pago: {datos['metodo_pago']}"),
+        (11, f"Referencia: {datos['comprobante'] or '-'}"),
+        (11, ""),
+        (14, f"Monto: $ {datos['monto']}"),
+    ]
+    texto = ["BT", "50 780 Td"]
+    for tamano, linea in lineas:
+        texto.append(f"/F1 {tamano} Tf ({_escapar(linea)}) Tj 0 -{tamano + 10} Td")
+    texto.append("ET")
+    contenido = "\n".join(texto).encode('cp1252', errors='replace')
+
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n" % len(contenido) + contenido + b"\nendstream",
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    posiciones = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posiciones.append(len(pdf))
+        pdf += b"%d 0 obj\n" % numero + objeto + b"\nendobj\n"
+    inicio_xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for posicion in posiciones:
+        pdf += b"%010d 00000 n \n" % posicion
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+    return bytes(pdf)
+
+
+def _guardar(ruta, datos):
+    """Escribe el PDF de forma atómica para que nunca se sirva un archivo a medias"""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=ruta.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as archivo:
+        archivo.write(generar_pdf(datos))
+    os.replace(temporal, ruta)
+    return str(ruta)
+
+
+def obtener_comprobante(pago):
+    """Retorna (ruta, hash) del comprobante, generándolo solo si no está en caché"""
+    datos = datos_comprobante(pago)
+    hash_contenido = hash_comprobante(datos)
+    ruta = ruta_comprobante(hash_contenido)
+    if not ruta.exists():
+        _guardar(ruta, datos)
+    return ruta, hash_contenido
+
+
+def generar_lote(pagos, archivo_zip, procesos=None, al_avanzar=None, archivados=None):
+    """Genera los comprobantes de los pagos en procesos paralelos y los empaqueta en un ZIP.
+
+    archivados agrega los de un queryset de PagoArchivado. Los procesos solo
+    reciben datos planos y escriben archivos, sin acceder a la base de
+    datos. Retorna la cantidad de comprobantes incluidos.
+    """
+    consultas = [pagos] if archivados is None else [pagos, archivados]
+    pendientes = []
+    incluidos = []
+    for pago in chain.from_iterable(
+        consulta.select_related('socio', 'concepto').iterator(chunk_size=500) for consulta in consultas
+    ):
+        datos = datos_comprobante(pago)
+        ruta = ruta_comprobante(hash_comprobante(datos))
+        incluidos.append((ruta, f"comprobante_{pago.pk:06d}.pdf"))
+        if not ruta.exists():
+            pendientes.append((str(ruta), datos))
+
+    if pendientes:
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            for hechos, _ in enumerate(executor.map(_guardar, *zip(*pendientes), chunksize=20), start=1):
+                if al_avanzar:
+                    al_avanzar(hechos, len(pendientes))
+
+    with zipfile.ZipFile(archivo_zip, 'w', compression=zipfile.ZIP_DEFLATED) as zip_salida:
+        for ruta, nombre in incluidos:
+            zip_salida.write(ruta, nombre)
+    return len(incluidos)
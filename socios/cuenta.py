@@ -0,0 +1,143 @@
+import datetime
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import CharField, DecimalField, F, IntegerField, Value
+from django.db.models.functions import Coalesce, ExtractYear
+
+from .models import Cargo, Pago, PagoArchivado
+
+# Estado de cuenta de un socio: cargos (debe) y pagos, incluidos los
+# archivados (haber), con saldo acumulado y subtotales por año.
+#
+# Los movimientos de las tres tablas se unen con UNION ALL y el saldo se
+# calcula en la base con funciones de ventana. La vista pagina por año: cada
+# página lee solo los movimientos de ese año y parte del saldo al cierre del
+# año anterior, que sale del resumen anual (una fila por año).
+
+NOMBRES_MESES = (
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre',
+)
+
+# Columnas de cada movimiento, en el orden de la unión
+COLUMNAS = ('m_fecha', 'm_anio', 'm_orden', 'm_id', 'm_tipo', 'm_concepto', 'm_periodo', 'm_debe', 'm_haber')
+
+CENTAVOS = Decimal('0.01')
+
+
+def periodo_mes(fecha):
+    """Período en el formato de mes_correspondiente (ej: Octubre 2026)"""
+    return f"{NOMBRES_MESES[fecha.month - 1]} {fecha.year}"
+
+
+def _columnas(queryset, campo_fecha, orden, tipo, campo_periodo, debe, haber):
+    importe = DecimalField(max_digits=12, decimal_places=2)
+    return queryset.order_by().annotate(
+        m_fecha=F(campo_fecha),
+        m_anio=ExtractYear(campo_fecha),
+        # Los cargos de un día van antes que los pagos del mismo día
+        m_orden=Value(orden, output_field=IntegerField()),
+        m_id=F('pk'),
+        m_tipo=Value(tipo, output_field=CharField()),
+        m_concepto=Coalesce('concepto__nombre', Value('-'), output_field=CharField()),
+        m_periodo=F(campo_periodo),
+        m_debe=debe if debe is not None else Value(0, output_field=importe),
+        m_haber=haber if haber is not None else Value(0, output_field=importe),
+    ).values(*COLUMNAS)
+
+
+def _union(socio, anio=None):
+    filtro_pagos = {'socio': socio}
+    filtro_cargos = {'socio': socio}
+    if anio is not None:
+        # Rango de fechas y no ExtractYear, para usar los índices (socio, fecha)
+        desde, hasta = datetime.date(anio, 1, 1), datetime.date(anio + 1, 1, 1)
+        filtro_pagos.update(fecha_pago__gte=desde, fecha_pago__lt=hasta)
+        filtro_cargos.update(fecha__gte=desde, fecha__lt=hasta)
+    cargos = _columnas(Cargo.objects.filter(**filtro_cargos), 'fecha', 0, 'cargo', 'periodo', F('monto'), None)
+    pagos = _columnas(Pago.objects.filter(**filtro_pagos), 'fecha_pago', 1, 'pago', 'mes_correspondiente', None, F('monto'))
+    archivados = _columnas(
+        PagoArchivado.objects.filter(**filtro_pagos), 'fecha_pago', 1, 'pago', 'mes_correspondiente', None, F('monto'),
+    )
+    return cargos.union(pagos, archivados, all=True)
+
+
+def _consultar(union, sql_externo):
+    # La unión se compila con el ORM (ExtractYear, Coalesce dependen del
+    # motor) y se envuelve en la consulta con las funciones de ventana
+    sql, params = union.query.get_compiler(using=union.db).as_sql()
+    with connections[union.db].cursor() as cursor:
+        cursor.execute(sql_externo.format(movimientos=f"({sql}) movimientos"), params)
+        nombres = [columna[0] for columna in cursor.description]
+        return [dict(zip(nombres, fila)) for fila in cursor.fetchall()]
+
+
+def _importe(valor):
+    # SQLite devuelve los importes como float
+    return Decimal(str(valor or 0)).quantize(CENTAVOS)
+
+
+def _fecha(valor):
+    return valor if isinstance(valor, datetime.date) else datetime.date.fromisoformat(str(valor)[:10])
+
+
+def resumen_anual(socio):
+    """Cargos, pagos y saldo al cierre de cada año, del más antiguo al más reciente"""
+    filas = _consultar(_union(socio), """
+        SELECT m_anio AS anio, SUM(m_debe) AS debe, SUM(m_haber) AS haber,
+               SUM(SUM(m_haber) - SUM(m_debe)) OVER (ORDER BY m_anio) AS saldo
+        FROM {movimientos}
+        GROUP BY m_anio
+        ORDER BY m_anio
+    """)
+    return [
+        {'anio': int(fila['anio']), 'debe': _importe(fila['debe']), 'haber': _importe(fila['haber']), 'saldo': _importe(fila['saldo'])}
+        for fila in filas
+    ]
+
+
+def _movimiento(fila):
+    return {
+        'fecha': _fecha(fila['m_fecha']),
+        'anio': int(fila['m_anio']),
+        'tipo': fila['m_tipo'],
+        'id': fila['m_id'],
+        'concepto': fila['m_concepto'],
+        'periodo': fila['m_periodo'],
+        'debe': _importe(fila['m_debe']),
+        'haber': _importe(fila['m_haber']),
+        'saldo': _importe(fila['saldo']),
+        'debe_anio': _importe(fila.get('debe_anio')),
+        'haber_anio': _importe(fila.get('haber_anio')),
+    }
+
+
+def movimientos_anio(socio, anio, saldo_inicial=0):
+    """Movimientos de un año con el saldo acumulado a partir de saldo_inicial"""
+    filas = _consultar(_union(socio, anio), """
+        SELECT *, SUM(m_haber - m_debe) OVER (
+            ORDER BY m_fecha, m_orden, m_id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+        ) AS saldo
+        FROM {movimientos}
+        ORDER BY m_fecha, m_orden, m_id
+    """)
+    movimientos_del_anio = [_movimiento(fila) for fila in filas]
+    for movimiento in movimientos_del_anio:
+        movimiento['saldo'] += saldo_inicial
+    return movimientos_del_anio
+
+
+def movimientos(socio):
+    """Todos los movimientos con saldo acumulado y subtotales del año de cada uno"""
+    filas = _consultar(_union(socio), """
+        SELECT *,
+               SUM(m_haber - m_debe) OVER (
+                   ORDER BY m_fecha, m_orden, m_id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+               ) AS saldo,
+               SUM(m_debe) OVER (PARTITION BY m_anio) AS debe_anio,
+               SUM(m_haber) OVER (PARTITION BY m_anio) AS haber_anio
+        FROM {movimientos}
+        ORDER BY m_fecha, m_orden, m_id
+    """)
+    return [_movimiento(fila) for fila in filas]
@@ -1,7 +1,9 @@
 from django import forms
 from django.utils import timezone
 from .models import Socio, Categoria, Pago, Concepto
+from decimal import Decimal
 import calendar
+import uuid
 import locale
 
 class SocioForm(forms.ModelForm):
@@ -46,19 +48,74 @@ class CategoriaForm(forms.ModelForm):
 class ConceptoForm(forms.ModelForm):
     class Meta:
         model = Concepto
-        fields = ['nombre', 'descripcion', 'monto_sugerido', 'activo']
+        fields = ['nombre', 'descripcion', 'monto_sugerido', 'activo', 'unico_por_periodo']
         widgets = {
             'nombre': forms.TextInput(attrs={'class': 'form-control'}),
             'descripcion': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'monto_sugerido': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'activo': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'unico_por_periodo': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
+class AccionSociosForm(forms.Form):
+    """Acción masiva sobre los socios marcados en la lista"""
+    ACCIONES = (
+        ('cambiar_categoria', 'Cambiar categoría'),
+        ('hacer_administrador', 'Hacer administradores'),
+        ('quitar_administrador', 'Quitar permiso de administrador'),
+    )
+    
+    accion = forms.ChoiceField(choices=ACCIONES, widget=forms.Select(attrs={'class': 'form-select form-select-sm'}))
+    categoria = forms.ModelChoiceField(
+        queryset=Categoria.objects.all(), required=False, empty_label="Categoría...",
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'}),
+    )
+    socios = forms.ModelMultipleChoiceField(
+        queryset=Socio.objects.all(), widget=forms.CheckboxSelectMultiple,
+        error_messages={'required': "Seleccione al menos un socio."},
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('accion') == 'cambiar_categoria' and not cleaned_data.get('categoria'):
+            self.add_error('categoria', "Indique la nueva categoría.")
+        return cleaned_data
+
+class AccionConceptosForm(forms.Form):
+    """Acción masiva sobre los conceptos marcados en la lista"""
+    ACCIONES = (
+        ('aumentar_montos', 'Aumentar monto sugerido'),
+        ('desactivar', 'Desactivar'),
+    )
+    
+    accion = forms.ChoiceField(choices=ACCIONES, widget=forms.Select(attrs={'class': 'form-select form-select-sm'}))
+    porcentaje = forms.DecimalField(
+        required=False, max_digits=5, decimal_places=2, min_value=Decimal('0.01'),
+        widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.01', 'placeholder': '%'}),
+    )
+    conceptos = forms.ModelMultipleChoiceField(
+        queryset=Concepto.objects.all(), widget=forms.CheckboxSelectMultiple,
+        error_messages={'required': "Seleccione al menos un concepto."},
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('accion') == 'aumentar_montos' and not cleaned_data.get('porcentaje'):
+            self.add_error('porcentaje', "Indique el porcentaje de aumento.")
+        return cleaned_data
+
 class PagoForm(forms.ModelForm):
+    # Identifica cada formulario mostrado; un segundo envío con la misma clave
+    # devuelve el pago ya registrado en lugar de crear otro
+    clave_idempotencia = forms.UUIDField(widget=forms.HiddenInput(), required=False)
+    
     def __init__(self, *args, **kwargs):
         socio = kwargs.pop('socio', None)
         super().__init__(*args, **kwargs)
         
+        if not self.instance.pk:
+            self.fields['clave_idempotencia'].initial = uuid.uuid4()
+        
         if socio:
             self.fields['socio'].initial = socio
             self.fields['socio'].widget = forms.HiddenInput()
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from socios.replicas import actualizar_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia la base principal en la réplica SQLite usada por informes y exportaciones. "
+        "Con --intervalo se repite periódicamente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, help="Segundos entre actualizaciones (por defecto una sola vez)")
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        while True:
+            try:
+                segundos = actualizar_replica()
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f"Réplica actualizada en {segundos:.2f}s"))
+            if not intervalo:
+                break
+            # No mantener abierta la base principal entre copias
+            connections.close_all()
+            time.sleep(intervalo)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from socios.resumen import actualizar_resumen
+
+
+class Command(BaseCommand):
+    help = "Recalcula el resumen diario de indicadores del club (para ejecutar de forma programada)"
+
+    def handle(self, *args, **options):
+        resumen = actualizar_resumen()
+        self.stdout.write(self.style.SUCCESS(f"Resumen actualizado para {resumen.fecha}."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from socios.archivo import archivar_pagos
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve al archivo los pagos de los ejercicios cerrados hasta el año indicado inclusive, "
+        "salvo los de los últimos 90 días, que determinan el estado de pagos de los socios"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('hasta_anio', type=int, help="Último ejercicio a archivar")
+        parser.add_argument('--lote', type=int, default=1000, help="Pagos movidos por transacción")
+
+    def handle(self, *args, **options):
+        try:
+            movidos = archivar_pagos(options['hasta_anio'], tamano_lote=options['lote'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Pagos archivados: {movidos}"))
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import JsonResponse
+from django.test import AsyncRequestFactory, RequestFactory
+
+from socios.models import Concepto
+from socios.views import get_concepto_monto
+
+
+def get_concepto_monto_sync(request):
+    """Versión síncrona original, usada como referencia para la comparación"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'No autorizado'}, status=401)
+    es_admin = request.user.is_superuser or (hasattr(request.user, 'socio') and request.user.socio.es_administrador)
+    if not es_admin:
+        return JsonResponse({'error': 'No tienes permisos suficientes'}, status=403)
+    concepto_id = request.GET.get('concepto_id')
+    try:
+        concepto = Concepto.objects.get(pk=concepto_id)
+        return JsonResponse({'monto_sugerido': float(concepto.monto_sugerido)})
+    except (Concepto.DoesNotExist, ValueError):
+        return JsonResponse({'monto_sugerido': 0})
+
+
+class Command(BaseCommand):
+    help = "Compara la versión síncrona y la asíncrona de get_concepto_monto con peticiones concurrentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=500, help="Cantidad total de peticiones")
+        parser.add_argument('--concurrencia', type=int, default=50, help="Peticiones simultáneas")
+        parser.add_argument('--hilos', type=int, default=4, help="Hilos del servidor síncrono simulado")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_superuser=True).first()
+        concepto = Concepto.objects.first()
+        if user is None or concepto is None:
+            raise CommandError("Se necesita al menos un superusuario y un concepto para medir.")
+
+        url = f'/socios/pagos/concepto-monto/?concepto_id={concepto.pk}'
+        peticiones = options['peticiones']
+
+        tiempo_sync = self._medir_sync(url, user, peticiones, options['hilos'])
+        tiempo_async = self._medir_async(url, user, peticiones, options['concurrencia'])
+
+        for nombre, tiempo, hilos in (
+            ('sync', tiempo_sync, options['hilos']),
+            ('async', tiempo_async, 1),
+        ):
+            self.stdout.write(
+                f"{nombre:>5}: {peticiones} peticiones en {tiempo:.3f}s "
+                f"({peticiones / tiempo:.0f} req/s, {hilos} hilo(s) del servidor ocupados)"
+            )
+
+    def _medir_sync(self, url, user, peticiones, hilos):
+        factory = RequestFactory()
+
+        def atender(cantidad):
+            # Cada hilo del servidor reutiliza su conexión, como la versión
+            # async la del hilo de sync_to_async; se cierra al terminar
+            try:
+                for _ in range(cantidad):
+                    request = factory.get(url)
+                    request.user = user
+                    get_concepto_monto_sync(request)
+            finally:
+                connection.close()
+
+        reparto = [peticiones // hilos + (1 if i < peticiones % hilos else 0) for i in range(hilos)]
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=hilos) as executor:
+            list(executor.map(atender, reparto))
+        return time.perf_counter() - inicio
+
+    def _medir_async(self, url, user, peticiones, concurrencia):
+        factory = AsyncRequestFactory()
+
+        async def auser():
+            return user
+
+        async def ejecutar():
+            semaforo = asyncio.Semaphore(concurrencia)
+
+            async def atender():
+                async with semaforo:
+                    request = factory.get(url)
+                    request.auser = auser
+                    return (await get_concepto_monto(request)).status_code
+
+            await asyncio.gather(*(atender() for _ in range(peticiones)))
+
+        inicio = time.perf_counter()
+        asyncio.run(ejecutar())
+        return time.perf_counter() - inicio
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from socios.recordatorios import enviar_recordatorios, periodo_actual
+
+
+class Command(BaseCommand):
+    help = "Envía recordatorios de pago a los socios morosos o con atraso"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', default=None, help="Período de la campaña (AAAA-MM); por defecto el mes actual")
+        parser.add_argument('--lote', type=int, default=None, help="Mensajes por lote")
+        parser.add_argument('--pausa', type=float, default=None, help="Segundos de pausa entre lotes")
+        parser.add_argument('--dry-run', action='store_true', help="Solo informar cuántos recordatorios se enviarían")
+
+    def handle(self, *args, **options):
+        periodo = options['periodo'] or periodo_actual()
+
+        def al_avanzar(enviados, total):
+            self.stdout.write(f"{enviados}/{total} recordatorios enviados")
+
+        cantidad = enviar_recordatorios(
+            periodo=periodo,
+            tamano_lote=options['lote'],
+            pausa=options['pausa'],
+            dry_run=options['dry_run'],
+            al_avanzar=al_avanzar,
+        )
+        if options['dry_run']:
+            self.stdout.write(f"Se enviarían {cantidad} recordatorios para el período {periodo}.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Recordatorios enviados para el período {periodo}: {cantidad}"))
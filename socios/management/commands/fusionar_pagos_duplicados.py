@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from django.db.models import Count, Min
+
+from socios.models import Pago
+from socios.versiones import incrementar_version
+
+# Campos que coinciden en un pago registrado dos veces por un doble envío
+CLAVE_DUPLICADO = ('socio', 'concepto', 'mes_correspondiente', 'monto', 'fecha_pago', 'metodo_pago', 'comprobante')
+
+# Pagos de un concepto único por período que chocarían con la restricción
+CLAVE_PERIODO = ('socio', 'concepto', 'mes_correspondiente')
+
+
+def _filtro_grupo(grupo, campos):
+    # Los valores nulos deben compararse con __isnull
+    return {
+        (f"{campo}__isnull" if grupo[campo] is None else campo): (True if grupo[campo] is None else grupo[campo])
+        for campo in campos
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Busca pagos duplicados por doble envío y los fusiona conservando el primero. "
+        "Luego activa la restricción de un pago por período en los conceptos que la requieren."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aplicar', action='store_true', help="Aplicar los cambios (por defecto solo se informan)")
+        parser.add_argument('--lote', type=int, default=500, help="Pagos eliminados por sentencia")
+
+    def handle(self, *args, **options):
+        grupos = (
+            Pago.objects.values(*CLAVE_DUPLICADO)
+            .annotate(cantidad=Count('id'), primero=Min('id'))
+            .filter(cantidad__gt=1)
+            .order_by()
+        )
+        a_eliminar = []
+        for grupo in grupos:
+            a_eliminar += (
+                Pago.objects.filter(**_filtro_grupo(grupo, CLAVE_DUPLICADO))
+                .exclude(pk=grupo['primero'])
+                .values_list('pk', flat=True)
+            )
+        self.stdout.write(f"Pagos duplicados encontrados: {len(a_eliminar)}")
+
+        conflictos = list(
+            Pago.objects.filter(concepto__unico_por_periodo=True)
+            .exclude(pk__in=a_eliminar)
+            .values(*CLAVE_PERIODO)
+            .annotate(cantidad=Count('id'))
+            .filter(cantidad__gt=1)
+            .order_by()
+        )
+        for conflicto in conflictos:
+            # Pagos distintos del mismo período: requieren revisión manual
+            self.stdout.write(self.style.WARNING(
+                f"Revisar: socio {conflicto['socio']}, concepto {conflicto['concepto']}, "
+                f"{conflicto['mes_correspondiente']} tiene {conflicto['cantidad']} pagos distintos."
+            ))
+
+        if not options['aplicar']:
+            self.stdout.write("Ejecute con --aplicar para eliminar los duplicados.")
+            return
+
+        with transaction.atomic(using=router.db_for_write(Pago)):
+            for inicio in range(0, len(a_eliminar), options['lote']):
+                Pago.objects.filter(pk__in=a_eliminar[inicio:inicio + options['lote']]).delete()
+
+            # Marcar los pagos de conceptos únicos por período, salvo los conflictos
+            pendientes = Pago.objects.filter(concepto__unico_por_periodo=True, periodo_unico=False)
+            for conflicto in conflictos:
+                pendientes = pendientes.exclude(**_filtro_grupo(conflicto, CLAVE_PERIODO))
+            marcados = pendientes.update(periodo_unico=True)
+        incrementar_version('Pago')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pagos eliminados: {len(a_eliminar)}. Pagos con restricción por período activada: {marcados}."
+        ))
@@ -0,0 +1,57 @@
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from socios.cuenta import periodo_mes
+from socios.models import Cargo, Concepto, Socio
+from socios.versiones import incrementar_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un cargo del concepto indicado a cada socio para un período (por defecto el mes actual). "
+        "Puede repetirse: los socios que ya tienen el cargo del período no reciben otro."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('concepto', help="Nombre del concepto")
+        parser.add_argument('--periodo', help="Período del cargo, por ejemplo 'Octubre 2026' (por defecto el mes actual)")
+        parser.add_argument('--fecha', type=datetime.date.fromisoformat, help="Fecha del cargo (AAAA-MM-DD, por defecto hoy)")
+        parser.add_argument('--monto', help="Importe (por defecto el monto sugerido del concepto)")
+        parser.add_argument('--categoria', action='append', help="Solo socios de esta categoría (puede repetirse)")
+        parser.add_argument('--lote', type=int, default=500, help="Cargos insertados por sentencia")
+
+    def handle(self, *args, **options):
+        try:
+            concepto = Concepto.objects.get(nombre=options['concepto'])
+        except Concepto.DoesNotExist:
+            raise CommandError(f"No existe el concepto '{options['concepto']}'.")
+        try:
+            monto = Decimal(options['monto']) if options['monto'] else concepto.monto_sugerido
+        except InvalidOperation:
+            raise CommandError(f"Monto inválido: {options['monto']}")
+        fecha = options['fecha'] or timezone.localdate()
+        periodo = options['periodo'] or periodo_mes(fecha)
+
+        socios = Socio.objects.all()
+        if options['categoria']:
+            socios = socios.filter(categoria__nombre__in=options['categoria'])
+        cargos = Cargo.objects.filter(concepto=concepto, periodo=periodo)
+        existentes = cargos.count()
+
+        # La restricción cargo_unico_por_periodo descarta los ya generados
+        Cargo.objects.bulk_create(
+            [
+                Cargo(socio_id=socio_id, concepto=concepto, monto=monto, fecha=fecha, periodo=periodo)
+                for socio_id in socios.values_list('pk', flat=True).iterator()
+            ],
+            batch_size=options['lote'],
+            ignore_conflicts=True,
+        )
+        creados = cargos.count() - existentes
+        if creados:
+            # bulk_create no emite señales
+            incrementar_version('Cargo')
+        self.stdout.write(self.style.SUCCESS(f"Cargos de {concepto.nombre} para {periodo} generados: {creados}."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from socios.comprobantes import generar_lote
+from socios.models import Pago, PagoArchivado
+from socios.replicas import en_replica
+
+
+class Command(BaseCommand):
+    help = "Genera en paralelo los comprobantes PDF de los pagos de un mes y los empaqueta en un ZIP"
+
+    def add_arguments(self, parser):
+        parser.add_argument('periodo', help="Mes de los pagos según fecha de pago (AAAA-MM)")
+        parser.add_argument('--salida', default=None, help="Archivo ZIP de salida (por defecto comprobantes_AAAA-MM.zip)")
+        parser.add_argument('--procesos', type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+
+    def handle(self, *args, **options):
+        try:
+            anio, mes = (int(parte) for parte in options['periodo'].split('-'))
+        except ValueError:
+            raise CommandError("El período debe tener el formato AAAA-MM.")
+
+        salida = options['salida'] or f"comprobantes_{anio:04d}-{mes:02d}.zip"
+        filtro = {'fecha_pago__year': anio, 'fecha_pago__month': mes}
+        pagos = Pago.objects.filter(**filtro).order_by('pk')
+        # Un mes de un ejercicio cerrado puede estar en el archivo
+        archivados = PagoArchivado.objects.filter(**filtro).order_by('pk')
+        # Exportación de solo lectura: puede leer de la réplica
+        with en_replica():
+            cantidad = generar_lote(pagos, salida, procesos=options['procesos'], archivados=archivados)
+        self.stdout.write(self.style.SUCCESS(f"{cantidad} comprobantes guardados en {salida}"))
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from socios.clubes import activar_club
+
+
+def _preparar_base(alias):
+    """Crea el directorio del archivo SQLite o el esquema de PostgreSQL del club"""
+    conexion = connections[alias]
+    if conexion.vendor == 'sqlite':
+        Path(conexion.settings_dict['NAME']).parent.mkdir(parents=True, exist_ok=True)
+    elif conexion.vendor == 'postgresql':
+        with conexion.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{alias}"')
+
+
+class Command(BaseCommand):
+    help = "Aplica las migraciones en la base del club principal y en la de cada club de CLUBES"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--club', action='append', dest='clubes', help="Migrar solo este club (puede repetirse)")
+
+    def handle(self, *args, **options):
+        clubes = options['clubes'] or ['default', *settings.CLUBES]
+        desconocidos = [club for club in clubes if club != 'default' and club not in settings.CLUBES]
+        if desconocidos:
+            raise CommandError(f"Clubes no configurados: {', '.join(desconocidos)}.")
+
+        for alias in clubes:
+            if options['verbosity']:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"Club {alias}:"))
+            _preparar_base(alias)
+            # Las migraciones de datos que usan el ORM también van a la base del club
+            with activar_club(None if alias == 'default' else alias):
+                call_command('migrate', database=alias, interactive=False, verbosity=options['verbosity'])
+            # Cada club se migra una vez: no mantener abiertas sus conexiones
+            connections[alias].close()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from socios.auditoria import podar_registro
+
+
+class Command(BaseCommand):
+    help = (
+        "Quita del registro de auditoría las entradas anteriores a los últimos meses, "
+        "exportando cada mes a AUDITORIA_DIR/cambios-AAAA-MM.jsonl.gz"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, help="Meses conservados en la tabla (por defecto AUDITORIA_MESES)")
+        parser.add_argument('--sin-exportar', action='store_true', help="Eliminar sin exportar a archivo")
+        parser.add_argument('--lote', type=int, default=5000, help="Entradas eliminadas por sentencia")
+
+    def handle(self, *args, **options):
+        resultado = podar_registro(meses=options['meses'], exportar=not options['sin_exportar'], tamano_lote=options['lote'])
+        for mes, cantidad in resultado.items():
+            self.stdout.write(f"{mes}: {cantidad}")
+        self.stdout.write(self.style.SUCCESS(f"Entradas quitadas: {sum(resultado.values())}"))
@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from socios.tareas import ejecutar, tomar_siguiente
+
+
+def _bucle_worker(nombre, intervalo, una_vez):
+    """Bucle de un proceso worker: toma tareas hasta que se le pide terminar"""
+    detener = False
+
+    def pedir_detencion(*args):
+        nonlocal detener
+        detener = True
+
+    signal.signal(signal.SIGTERM, pedir_detencion)
+    signal.signal(signal.SIGINT, pedir_detencion)
+
+    procesadas = 0
+    while not detener:
+        tarea = tomar_siguiente(nombre)
+        if tarea is None:
+            if una_vez:
+                break
+            time.sleep(intervalo)
+            continue
+        ejecutar(tarea)
+        procesadas += 1
+    connections.close_all()
+    return procesadas
+
+
+class Command(BaseCommand):
+    help = "Ejecuta las tareas en segundo plano encoladas en la base de datos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=1, help="Cantidad de procesos worker")
+        parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos de espera cuando no hay tareas")
+        parser.add_argument('--una-vez', action='store_true', help="Terminar cuando no queden tareas pendientes")
+
+    def handle(self, *args, **options):
+        procesos = max(1, options['procesos'])
+        base = f"{socket.gethostname()}:{os.getpid()}"
+        argumentos = (options['intervalo'], options['una_vez'])
+
+        if procesos == 1:
+            procesadas = _bucle_worker(f"{base}:0", *argumentos)
+            self.stdout.write(self.style.SUCCESS(f"Tareas procesadas: {procesadas}"))
+            return
+
+        # Cada proceso debe abrir su propia conexión a la base de datos
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=_bucle_worker, args=(f"{base}:{i}", *argumentos))
+            for i in range(procesos)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"{procesos} workers iniciados.")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS("Workers finalizados."))
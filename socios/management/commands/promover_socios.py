@@ -0,0 +1,45 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from socios.models import Socio
+from socios.promociones import promover_socios
+
+
+def _fecha(valor):
+    try:
+        return datetime.date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Fecha inválida: {valor} (use AAAA-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Cambia la categoría de los socios según las reglas de promoción por edad y antigüedad. "
+        "Por defecto solo informa los cambios; pensado para ejecutarse periódicamente con --aplicar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aplicar', action='store_true', help="Aplicar los cambios (por defecto solo se informan)")
+        parser.add_argument('--fecha', type=_fecha, help="Fecha de referencia para edad y antigüedad (AAAA-MM-DD, por defecto hoy)")
+        parser.add_argument('--lote', type=int, default=500, help="Socios actualizados por sentencia")
+        parser.add_argument('--detalle', action='store_true', help="Listar cada socio promovido")
+
+    def handle(self, *args, **options):
+        resultado = promover_socios(fecha=options['fecha'], aplicar=options['aplicar'], tamano_lote=options['lote'])
+        if not resultado:
+            self.stdout.write("No hay reglas de promoción activas.")
+            return
+
+        total = 0
+        for regla, movidos in resultado:
+            total += len(movidos)
+            self.stdout.write(f"{regla.origen} → {regla.destino} ({regla.descripcion_condiciones()}): {len(movidos)} socios")
+            if options['detalle'] and movidos:
+                for socio in Socio.objects.filter(pk__in=movidos).order_by('apellido', 'nombre'):
+                    self.stdout.write(f"    {socio.apellido}, {socio.nombre} (DNI {socio.dni}, nacido el {socio.fecha_nacimiento:%d/%m/%Y}, alta {socio.fecha_alta:%d/%m/%Y})")
+
+        if not options['aplicar']:
+            self.stdout.write(f"Cambios de categoría: {total}. Ejecute con --aplicar para confirmar.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Cambios de categoría aplicados: {total}."))
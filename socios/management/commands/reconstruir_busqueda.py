@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, router
+
+from socios.busqueda import reconstruir_indice
+from socios.models import Socio
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de socios y comprobantes de pago"
+
+    def handle(self, *args, **options):
+        reconstruir_indice(connections[router.db_for_write(Socio)])
+        self.stdout.write(self.style.SUCCESS("Índice de búsqueda reconstruido."))
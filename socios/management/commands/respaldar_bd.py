@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from socios.respaldo import ErrorRespaldo, PAGINAS_POR_PASO, crear_respaldo
+
+
+def _mb(tamano):
+    return f"{tamano / (1024 * 1024):.1f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea un respaldo comprimido de la base SQLite sin detener la aplicación, "
+        "verifica su integridad y elimina los respaldos más antiguos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destino', help="Directorio de respaldos (por defecto RESPALDOS_DIR)")
+        parser.add_argument('--conservar', type=int, help="Cantidad de respaldos a conservar (por defecto RESPALDOS_CONSERVAR)")
+        parser.add_argument('--paginas', type=int, default=PAGINAS_POR_PASO, help="Páginas copiadas por paso")
+
+    def handle(self, *args, **options):
+        try:
+            resultado = crear_respaldo(options['destino'], options['conservar'], options['paginas'])
+        except ErrorRespaldo as e:
+            raise CommandError(str(e))
+
+        tiempos = resultado['tiempos']
+        self.stdout.write(
+            f"Copia: {tiempos['copia']:.1f}s, verificación: {tiempos['verificacion']:.1f}s, "
+            f"compresión: {tiempos['compresion']:.1f}s"
+        )
+        for ruta in resultado['eliminados']:
+            self.stdout.write(f"Eliminado: {ruta.name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Respaldo creado: {resultado['ruta']} "
+            f"({_mb(resultado['tamano_base'])} → {_mb(resultado['tamano_respaldo'])})"
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from socios.respaldo import ErrorRespaldo, PAGINAS_POR_PASO, listar_respaldos, restaurar_respaldo
+
+
+class Command(BaseCommand):
+    help = "Reemplaza el contenido de la base SQLite por el de un respaldo (por defecto el más reciente)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', nargs='?', help="Respaldo .sqlite3.gz a restaurar")
+        parser.add_argument('--paginas', type=int, default=PAGINAS_POR_PASO, help="Páginas copiadas por paso")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive', help="No pedir confirmación")
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        if not archivo:
+            respaldos = listar_respaldos()
+            if not respaldos:
+                raise CommandError("No hay respaldos disponibles.")
+            archivo = respaldos[0]
+
+        if options['interactive']:
+            respuesta = input(f"Se reemplazarán todos los datos actuales por los de {archivo}. Escriba 'si' para continuar: ")
+            if respuesta.strip().lower() not in ('si', 'sí'):
+                self.stdout.write("Restauración cancelada.")
+                return
+
+        try:
+            resultado = restaurar_respaldo(archivo, options['paginas'])
+        except (ErrorRespaldo, OSError) as e:
+            raise CommandError(str(e))
+
+        tiempos = resultado['tiempos']
+        self.stdout.write(
+            f"Descompresión: {tiempos['descompresion']:.1f}s, verificación: {tiempos['verificacion']:.1f}s, "
+            f"carga: {tiempos['carga']:.1f}s"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Base restaurada desde {resultado['ruta']}"))
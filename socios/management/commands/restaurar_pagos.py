@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from socios.archivo import restaurar_pagos
+
+
+class Command(BaseCommand):
+    help = "Devuelve a la tabla de pagos los pagos archivados desde el año indicado inclusive"
+
+    def add_arguments(self, parser):
+        parser.add_argument('desde_anio', type=int, help="Primer ejercicio a restaurar")
+        parser.add_argument('--lote', type=int, default=1000, help="Pagos movidos por transacción")
+
+    def handle(self, *args, **options):
+        movidos = restaurar_pagos(options['desde_anio'], tamano_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"Pagos restaurados: {movidos}"))
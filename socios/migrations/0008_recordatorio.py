@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0007_tarea'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recordatorio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(help_text='Período de la campaña (AAAA-MM)', max_length=7)),
+                ('estado_pagos', models.CharField(max_length=20)),
+                ('email', models.EmailField(max_length=254)),
+                ('fecha_envio', models.DateTimeField(default=django.utils.timezone.now)),
+                ('socio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recordatorios', to='socios.socio')),
+            ],
+            options={
+                'verbose_name': 'Recordatorio',
+                'verbose_name_plural': 'Recordatorios',
+                'ordering': ['-fecha_envio'],
+                'constraints': [models.UniqueConstraint(fields=('socio', 'periodo'), name='recordatorio_unico_por_periodo')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0008_recordatorio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PagoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('fecha_pago', models.DateField()),
+                ('mes_correspondiente', models.CharField(max_length=20)),
+                ('metodo_pago', models.CharField(choices=[('efectivo', 'Efectivo'), ('transferencia', 'Transferencia'), ('debito', 'Débito'), ('credito', 'Crédito')], default='efectivo', max_length=15)),
+                ('comprobante', models.CharField(blank=True, max_length=100, null=True)),
+                ('comentarios', models.TextField(blank=True, null=True)),
+                ('fecha_archivado', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Pago archivado',
+                'verbose_name_plural': 'Pagos archivados',
+                'ordering': ['-fecha_pago'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago'], name='pago_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='pagoarchivado',
+            name='concepto',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pagos_archivados', to='socios.concepto'),
+        ),
+        migrations.AddField(
+            model_name='pagoarchivado',
+            name='socio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pagos_archivados', to='socios.socio'),
+        ),
+        migrations.AddIndex(
+            model_name='pagoarchivado',
+            index=models.Index(fields=['fecha_pago'], name='pago_archivado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagoarchivado',
+            index=models.Index(fields=['socio', 'fecha_pago'], name='pago_archivado_socio_idx'),
+        ),
+    ]
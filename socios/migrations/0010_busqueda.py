@@ -0,0 +1,98 @@
+from django.db import migrations
+
+# Sentencias copiadas de socios/busqueda.py al crear esta migración. Se
+# congelan aquí para que cambios posteriores en ese módulo no alteren lo que
+# hace una migración ya aplicada.
+
+SQLITE_INSTALAR = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS socios_busqueda USING fts5(
+        tipo UNINDEXED, objeto_id UNINDEXED, titulo, dni, email, comprobante,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS socios_busqueda_socio_ai AFTER INSERT ON socios_socio BEGIN
+        INSERT INTO socios_busqueda(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        VALUES (new.id * 2, 'socio', new.id, new.nombre || ' ' || new.apellido, new.dni, new.email, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS socios_busqueda_socio_au AFTER UPDATE OF nombre, apellido, dni, email ON socios_socio BEGIN
+        DELETE FROM socios_busqueda WHERE rowid = old.id * 2;
+        INSERT INTO socios_busqueda(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        VALUES (new.id * 2, 'socio', new.id, new.nombre || ' ' || new.apellido, new.dni, new.email, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS socios_busqueda_socio_ad AFTER DELETE ON socios_socio BEGIN
+        DELETE FROM socios_busqueda WHERE rowid = old.id * 2;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS socios_busqueda_pago_ai AFTER INSERT ON socios_pago
+    WHEN coalesce(new.comprobante, '') <> '' BEGIN
+        INSERT INTO socios_busqueda(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        VALUES (new.id * 2 + 1, 'pago', new.id, '', '', '', new.comprobante);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS socios_busqueda_pago_au AFTER UPDATE OF comprobante ON socios_pago BEGIN
+        DELETE FROM socios_busqueda WHERE rowid = old.id * 2 + 1;
+        INSERT INTO socios_busqueda(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        SELECT new.id * 2 + 1, 'pago', new.id, '', '', '', new.comprobante
+        WHERE coalesce(new.comprobante, '') <> '';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS socios_busqueda_pago_ad AFTER DELETE ON socios_pago BEGIN
+        DELETE FROM socios_busqueda WHERE rowid = old.id * 2 + 1;
+    END""",
+    # Carga inicial con los socios y pagos existentes
+    "DELETE FROM socios_busqueda",
+    """INSERT INTO socios_busqueda(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        SELECT id * 2, 'socio', id, nombre || ' ' || apellido, dni, email, '' FROM socios_socio""",
+    """INSERT INTO socios_busqueda(rowid, tipo, objeto_id, titulo, dni, email, comprobante)
+        SELECT id * 2 + 1, 'pago', id, '', '', '', comprobante FROM socios_pago
+        WHERE coalesce(comprobante, '') <> ''""",
+    "INSERT INTO socios_busqueda(socios_busqueda) VALUES ('optimize')",
+]
+
+SQLITE_DESINSTALAR = [
+    "DROP TABLE IF EXISTS socios_busqueda",
+    "DROP TRIGGER IF EXISTS socios_busqueda_socio_ai",
+    "DROP TRIGGER IF EXISTS socios_busqueda_socio_au",
+    "DROP TRIGGER IF EXISTS socios_busqueda_socio_ad",
+    "DROP TRIGGER IF EXISTS socios_busqueda_pago_ai",
+    "DROP TRIGGER IF EXISTS socios_busqueda_pago_au",
+    "DROP TRIGGER IF EXISTS socios_busqueda_pago_ad",
+]
+
+POSTGRESQL_INSTALAR = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public",
+    "CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA public",
+    """CREATE OR REPLACE FUNCTION socios_unaccent(text) RETURNS text AS
+        $$ SELECT public.unaccent('public.unaccent', $1) $$
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT""",
+    "CREATE INDEX IF NOT EXISTS socios_socio_busqueda_trgm ON socios_socio USING gin "
+    "(socios_unaccent(lower(nombre || ' ' || apellido || ' ' || dni || ' ' || email)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS socios_pago_busqueda_trgm ON socios_pago USING gin "
+    "(socios_unaccent(lower(coalesce(comprobante, ''))) gin_trgm_ops)",
+]
+
+POSTGRESQL_DESINSTALAR = [
+    "DROP INDEX IF EXISTS socios_socio_busqueda_trgm",
+    "DROP INDEX IF EXISTS socios_pago_busqueda_trgm",
+    "DROP FUNCTION IF EXISTS socios_unaccent(text)",
+]
+
+
+def _ejecutar(schema_editor, sentencias):
+    for sentencia in sentencias.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sentencia)
+
+
+def instalar(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_INSTALAR, 'postgresql': POSTGRESQL_INSTALAR})
+
+
+def desinstalar(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_DESINSTALAR, 'postgresql': POSTGRESQL_DESINSTALAR})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0009_pagoarchivado'),
+    ]
+
+    operations = [
+        migrations.RunPython(instalar, desinstalar),
+    ]
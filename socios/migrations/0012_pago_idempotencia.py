@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0011_resumendiario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='concepto',
+            name='unico_por_periodo',
+            field=models.BooleanField(default=False, help_text='Solo se admite un pago de este concepto por socio y mes'),
+        ),
+        migrations.AddField(
+            model_name='pago',
+            name='clave_idempotencia',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='pago',
+            name='periodo_unico',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name='pago',
+            constraint=models.UniqueConstraint(condition=models.Q(('periodo_unico', True)), fields=('socio', 'concepto', 'mes_correspondiente'), name='pago_unico_por_periodo', violation_error_message='Este socio ya tiene registrado un pago de este concepto para ese mes.'),
+        ),
+    ]
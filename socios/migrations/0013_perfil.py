@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0012_pago_idempotencia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Perfil',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('metodo', models.CharField(max_length=10)),
+                ('ruta', models.CharField(max_length=500)),
+                ('estado', models.PositiveSmallIntegerField(help_text='Código de estado HTTP de la respuesta')),
+                ('muestreado', models.BooleanField(default=False, help_text='Tomado por muestreo y no a pedido')),
+                ('duracion_ms', models.FloatField()),
+                ('tiempo_sql_ms', models.FloatField()),
+                ('tiempo_plantillas_ms', models.FloatField(help_text='Renderizado de plantillas sin las consultas hechas desde ellas')),
+                ('cantidad_consultas', models.PositiveIntegerField()),
+                ('consultas', models.JSONField(default=list, help_text='SQL, milisegundos y líneas del proyecto que la originaron')),
+                ('resumen', models.TextField(help_text='Funciones con mayor tiempo acumulado')),
+                ('archivo', models.CharField(help_text='Estadísticas de cProfile en PERFILES_DIR', max_length=100)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='perfiles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Perfil',
+                'verbose_name_plural': 'Perfiles',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='perfil_fecha_idx')],
+            },
+        ),
+    ]
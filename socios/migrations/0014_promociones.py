@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0013_perfil'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReglaPromocion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('edad_minima', models.PositiveSmallIntegerField(blank=True, help_text='Años cumplidos a la fecha de referencia', null=True)),
+                ('antiguedad_minima', models.PositiveSmallIntegerField(blank=True, help_text='Años desde la fecha de alta', null=True)),
+                ('orden', models.PositiveSmallIntegerField(default=0, help_text='Las reglas se aplican de menor a mayor orden')),
+                ('activa', models.BooleanField(default=True)),
+                ('destino', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reglas_entrada', to='socios.categoria')),
+                ('origen', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reglas_salida', to='socios.categoria')),
+            ],
+            options={
+                'verbose_name': 'Regla de promoción',
+                'verbose_name_plural': 'Reglas de promoción',
+                'ordering': ['orden', 'pk'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Promocion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origen', models.CharField(max_length=50)),
+                ('destino', models.CharField(max_length=50)),
+                ('condiciones', models.CharField(max_length=100)),
+                ('fecha_referencia', models.DateField()),
+                ('cantidad', models.PositiveIntegerField()),
+                ('socios', models.JSONField(default=list, help_text='Ids de los socios promovidos')),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('ejecutada_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='promociones', to=settings.AUTH_USER_MODEL)),
+                ('regla', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='promociones', to='socios.reglapromocion')),
+            ],
+            options={
+                'verbose_name': 'Promoción',
+                'verbose_name_plural': 'Promociones',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
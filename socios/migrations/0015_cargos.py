@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0014_promociones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cargo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('fecha', models.DateField(default=django.utils.timezone.now)),
+                ('periodo', models.CharField(help_text='Mes al que corresponde el cargo (ej: Enero 2025)', max_length=20)),
+                ('descripcion', models.CharField(blank=True, max_length=200)),
+            ],
+            options={
+                'verbose_name': 'Cargo',
+                'verbose_name_plural': 'Cargos',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['socio', 'fecha_pago'], name='pago_socio_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='cargo',
+            name='concepto',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='cargos', to='socios.concepto'),
+        ),
+        migrations.AddField(
+            model_name='cargo',
+            name='socio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cargos', to='socios.socio'),
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['socio', 'fecha'], name='cargo_socio_fecha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cargo',
+            constraint=models.UniqueConstraint(fields=('socio', 'concepto', 'periodo'), name='cargo_unico_por_periodo'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0016_registro_cambios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pagoarchivado',
+            name='clave_idempotencia',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='pagoarchivado',
+            name='periodo_unico',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
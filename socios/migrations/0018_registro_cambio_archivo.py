@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0017_pago_archivado_periodo_unico'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='registrocambio',
+            name='accion',
+            field=models.CharField(choices=[('alta', 'Alta'), ('modificacion', 'Modificación'), ('baja', 'Baja'), ('archivo', 'Archivo'), ('restauracion', 'Restauración')], max_length=15),
+        ),
+    ]
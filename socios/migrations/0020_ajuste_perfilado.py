@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:41
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('socios', '0019_tarea_reserva'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AjustePerfilado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('muestreo', models.FloatField(help_text='Fracción de las peticiones perfiladas al azar en segundo plano (0,05 = 5 %); 0 desactiva el muestreo', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)])),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Ajuste del perfilado',
+                'verbose_name_plural': 'Ajuste del perfilado',
+            },
+        ),
+    ]
@@ -1,14 +1,22 @@
 
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 import datetime
 
+# Días hacia atrás en que un pago cuenta para el estado "Con atraso"; los
+# pagos más antiguos pueden archivarse sin cambiar el estado de nadie
+DIAS_ATRASO = 90
+
 class Concepto(models.Model):
     nombre = models.CharField(max_length=100, unique=True)
     descripcion = models.TextField(blank=True, null=True)
     monto_sugerido = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     activo = models.BooleanField(default=True)
+    unico_por_periodo = models.BooleanField(default=False, help_text="Solo se admite un pago de este concepto por socio y mes")
     
     def __str__(self):
         return f"{self.nombre} (${self.monto_sugerido})"
@@ -29,6 +37,28 @@ class Categoria(models.Model):
         verbose_name = "Categoría"
         verbose_name_plural = "Categorías"
 
+class SocioQuerySet(models.QuerySet):
+    def anotar_estado_pagos(self):
+        """Anota estado_pagos con el mismo criterio que Socio.get_estado_pagos,
+        resuelto en una sola consulta para todo el conjunto de socios"""
+        hoy = timezone.now().date()
+        tres_meses_atras = hoy - datetime.timedelta(days=DIAS_ATRASO)
+        pagos = Pago.objects.filter(socio=models.OuterRef('pk'))
+        return self.annotate(
+            estado_pagos=models.Case(
+                models.When(
+                    models.Exists(pagos.filter(fecha_pago__month=hoy.month, fecha_pago__year=hoy.year)),
+                    then=models.Value("Al día"),
+                ),
+                models.When(
+                    models.Exists(pagos.filter(fecha_pago__gte=tres_meses_atras)),
+                    then=models.Value("Con atraso"),
+                ),
+                default=models.Value("Moroso"),
+                output_field=models.CharField(),
+            )
+        )
+
 class Socio(models.Model):
     usuario = models.OneToOneField(User, on_delete=models.CASCADE, related_name='socio', null=True, blank=True)
     nombre = models.CharField(max_length=50)
@@ -43,6 +73,8 @@ class Socio(models.Model):
     # Campo para permisos especiales
     es_administrador = models.BooleanField(default=False)
     
+    objects = SocioQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.nombre} {self.apellido} ({self.dni})"
     
@@ -62,7 +94,7 @@ class Socio(models.Model):
             return "Al día"
         
         # Verificar pagos en los últimos 3 meses
-        tres_meses_atras = hoy - datetime.timedelta(days=90)
+        tres_meses_atras = hoy - datetime.timedelta(days=DIAS_ATRASO)
         pagos_recientes = self.pagos.filter(
             fecha_pago__gte=tres_meses_atras
         ).exists()
@@ -92,12 +124,343 @@ class Pago(models.Model):
     metodo_pago = models.CharField(max_length=15, choices=METODO_PAGO_CHOICES, default='efectivo')
     comprobante = models.CharField(max_length=100, blank=True, null=True, help_text="Número de comprobante o referencia")
     comentarios = models.TextField(blank=True, null=True)
+    # Copia de concepto.unico_por_periodo: la restricción de unicidad solo
+    # puede referirse a columnas de esta tabla
+    periodo_unico = models.BooleanField(default=False, editable=False)
+    # Clave enviada por el formulario para ignorar envíos repetidos
+    clave_idempotencia = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    
+    # Los pagos archivados no se pueden editar ni eliminar desde las vistas
+    archivado = False
     
     def __str__(self):
         concepto_str = f" - {self.concepto}" if self.concepto else ""
         return f"Pago {self.mes_correspondiente}{concepto_str} - {self.socio}"
     
+    def clean(self):
+        # Se asigna antes de validar las restricciones para que el formulario
+        # informe el pago duplicado en lugar de fallar al guardar
+        self.periodo_unico = bool(self.concepto and self.concepto.unico_por_periodo)
+
+    def validate_constraints(self, exclude=None):
+        # periodo_unico no está en el formulario pero clean() ya lo calculó;
+        # sin esto Django omite la restricción condicional
+        if exclude:
+            exclude = set(exclude) - {'periodo_unico'}
+        super().validate_constraints(exclude=exclude)
+
+    def save(self, *args, **kwargs):
+        self.periodo_unico = bool(self.concepto and self.concepto.unico_por_periodo)
+        super().save(*args, **kwargs)
+    
     class Meta:
         verbose_name = "Pago"
         verbose_name_plural = "Pagos"
-        ordering = ['-fecha_pago']
\ No newline at end of file
+        ordering = ['-fecha_pago']
+        indexes = [
+            models.Index(fields=['fecha_pago'], name='pago_fecha_idx'),
+            # Estado de cuenta de un socio por año (socios.cuenta)
+            models.Index(fields=['socio', 'fecha_pago'], name='pago_socio_fecha_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['socio', 'concepto', 'mes_correspondiente'],
+                condition=models.Q(periodo_unico=True),
+                name='pago_unico_por_periodo',
+                violation_error_message="Este socio ya tiene registrado un pago de este concepto para ese mes.",
+            ),
+        ]
+
+class PagoArchivado(models.Model):
+    """Pago de un ejercicio cerrado movido fuera de la tabla de pagos.
+
+    Conserva el id original para que pueda restaurarse sin cambiar referencias.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    socio = models.ForeignKey(Socio, on_delete=models.CASCADE, related_name='pagos_archivados')
+    concepto = models.ForeignKey(Concepto, on_delete=models.PROTECT, related_name='pagos_archivados', null=True)
+    monto = models.DecimalField(max_digits=10, decimal_places=2)
+    fecha_pago = models.DateField()
+    mes_correspondiente = models.CharField(max_length=20)
+    metodo_pago = models.CharField(max_length=15, choices=Pago.METODO_PAGO_CHOICES, default='efectivo')
+    comprobante = models.CharField(max_length=100, blank=True, null=True)
+    comentarios = models.TextField(blank=True, null=True)
+    # Se conservan para que el pago restaurado siga bajo pago_unico_por_periodo
+    # y un reenvío del formulario original no lo vuelva a registrar
+    periodo_unico = models.BooleanField(default=False, editable=False)
+    clave_idempotencia = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    fecha_archivado = models.DateTimeField(default=timezone.now)
+    
+    archivado = True
+    
+    # Campos copiados entre Pago y PagoArchivado al archivar o restaurar
+    CAMPOS_PAGO = (
+        'id', 'socio_id', 'concepto_id', 'monto', 'fecha_pago', 'mes_correspondiente',
+        'metodo_pago', 'comprobante', 'comentarios', 'periodo_unico', 'clave_idempotencia',
+    )
+    
+    def __str__(self):
+        concepto_str = f" - {self.concepto}" if self.concepto else ""
+        return f"Pago archivado {self.mes_correspondiente}{concepto_str} - {self.socio}"
+    
+    class Meta:
+        verbose_name = "Pago archivado"
+        verbose_name_plural = "Pagos archivados"
+        ordering = ['-fecha_pago']
+        indexes = [
+            models.Index(fields=['fecha_pago'], name='pago_archivado_fecha_idx'),
+            models.Index(fields=['socio', 'fecha_pago'], name='pago_archivado_socio_idx'),
+        ]
+
+
+class Cargo(models.Model):
+    """Importe adeudado por un socio (cuota, inscripción, etc.) en su estado de cuenta"""
+    socio = models.ForeignKey(Socio, on_delete=models.CASCADE, related_name='cargos')
+    concepto = models.ForeignKey(Concepto, on_delete=models.PROTECT, related_name='cargos', null=True)
+    monto = models.DecimalField(max_digits=10, decimal_places=2)
+    fecha = models.DateField(default=timezone.now)
+    periodo = models.CharField(max_length=20, help_text="Mes al que corresponde el cargo (ej: Enero 2025)")
+    descripcion = models.CharField(max_length=200, blank=True)
+    
+    def __str__(self):
+        concepto_str = f" - {self.concepto.nombre}" if self.concepto else ""
+        return f"Cargo {self.periodo}{concepto_str} - {self.socio}"
+    
+    class Meta:
+        verbose_name = "Cargo"
+        verbose_name_plural = "Cargos"
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['socio', 'fecha'], name='cargo_socio_fecha_idx'),
+        ]
+        constraints = [
+            # generar_cargos puede repetirse sin duplicar cargos
+            models.UniqueConstraint(fields=['socio', 'concepto', 'periodo'], name='cargo_unico_por_periodo'),
+        ]
+
+
+class ReglaPromocion(models.Model):
+    """Cambio automático de categoría por edad y antigüedad (manage.py promover_socios)"""
+    origen = models.ForeignKey(Categoria, on_delete=models.PROTECT, related_name='reglas_salida')
+    destino = models.ForeignKey(Categoria, on_delete=models.PROTECT, related_name='reglas_entrada')
+    edad_minima = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Años cumplidos a la fecha de referencia")
+    antiguedad_minima = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Años desde la fecha de alta")
+    orden = models.PositiveSmallIntegerField(default=0, help_text="Las reglas se aplican de menor a mayor orden")
+    activa = models.BooleanField(default=True)
+    
+    def __str__(self):
+        return f"{self.origen} → {self.destino}"
+    
+    def clean(self):
+        if self.origen_id and self.origen_id == self.destino_id:
+            raise ValidationError("La categoría de destino debe ser distinta de la de origen.")
+        if self.edad_minima is None and self.antiguedad_minima is None:
+            raise ValidationError("Indique una edad o una antigüedad mínima.")
+    
+    def descripcion_condiciones(self):
+        condiciones = []
+        if self.edad_minima is not None:
+            condiciones.append(f"edad ≥ {self.edad_minima}")
+        if self.antiguedad_minima is not None:
+            condiciones.append(f"antigüedad ≥ {self.antiguedad_minima}")
+        return " y ".join(condiciones)
+    
+    class Meta:
+        verbose_name = "Regla de promoción"
+        verbose_name_plural = "Reglas de promoción"
+        ordering = ['orden', 'pk']
+
+
+class Promocion(models.Model):
+    """Registro de auditoría de una regla aplicada por promover_socios"""
+    regla = models.ForeignKey(ReglaPromocion, on_delete=models.SET_NULL, null=True, blank=True, related_name='promociones')
+    # Nombres copiados: el registro se conserva aunque cambien las categorías
+    origen = models.CharField(max_length=50)
+    destino = models.CharField(max_length=50)
+    condiciones = models.CharField(max_length=100)
+    fecha_referencia = models.DateField()
+    cantidad = models.PositiveIntegerField()
+    socios = models.JSONField(default=list, help_text="Ids de los socios promovidos")
+    ejecutada_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='promociones')
+    fecha = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.origen} → {self.destino}: {self.cantidad} socios ({self.fecha:%d/%m/%Y})"
+    
+    class Meta:
+        verbose_name = "Promoción"
+        verbose_name_plural = "Promociones"
+        ordering = ['-fecha']
+
+
+class Tarea(models.Model):
+    """Trabajo en segundo plano ejecutado por el comando procesar_tareas"""
+    ESTADO_CHOICES = (
+        ('pendiente', 'Pendiente'),
+        ('en_curso', 'En curso'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    )
+    
+    tipo = models.CharField(max_length=100, help_text="Nombre de la tarea registrada en socios.tareas")
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=15, choices=ESTADO_CHOICES, default='pendiente')
+    progreso = models.PositiveSmallIntegerField(default=0, help_text="Porcentaje completado")
+    mensaje = models.CharField(max_length=200, blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=3)
+    creada_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='tareas')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    disponible_desde = models.DateTimeField(default=timezone.now)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    # Fin de la reserva del worker; se renueva con cada reportar_progreso.
+    # Vencida, otro worker vuelve a tomar la tarea (el primero se cayó)
+    reserva_hasta = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_estado_display()})"
+    
+    class Meta:
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            # Búsqueda de la próxima tarea pendiente por los workers
+            models.Index(fields=['estado', 'disponible_desde'], name='tarea_pendiente_idx'),
+            # Tareas en curso de un worker caído
+            models.Index(fields=['estado', 'reserva_hasta'], name='tarea_reserva_idx'),
+        ]
+
+
+class Recordatorio(models.Model):
+    """Registro de un recordatorio de pago enviado a un socio en un período"""
+    socio = models.ForeignKey(Socio, on_delete=models.CASCADE, related_name='recordatorios')
+    periodo = models.CharField(max_length=7, help_text="Período de la campaña (AAAA-MM)")
+    estado_pagos = models.CharField(max_length=20)
+    email = models.EmailField()
+    fecha_envio = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Recordatorio {self.periodo} - {self.socio}"
+    
+    class Meta:
+        verbose_name = "Recordatorio"
+        verbose_name_plural = "Recordatorios"
+        ordering = ['-fecha_envio']
+        constraints = [
+            # Un socio recibe a lo sumo un recordatorio por período
+            models.UniqueConstraint(fields=['socio', 'periodo'], name='recordatorio_unico_por_periodo'),
+        ]
+
+
+class ResumenDiario(models.Model):
+    """Indicadores del club precalculados, uno por día, para el panel de administración"""
+    fecha = models.DateField(unique=True)
+    datos = models.JSONField(encoder=DjangoJSONEncoder)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Resumen {self.fecha}"
+    
+    class Meta:
+        verbose_name = "Resumen diario"
+        verbose_name_plural = "Resúmenes diarios"
+        ordering = ['-fecha']
+
+
+class Perfil(models.Model):
+    """Perfil de una petición tomado con cProfile por socios.perfilado"""
+    fecha = models.DateTimeField(default=timezone.now)
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='perfiles')
+    metodo = models.CharField(max_length=10)
+    ruta = models.CharField(max_length=500)
+    estado = models.PositiveSmallIntegerField(help_text="Código de estado HTTP de la respuesta")
+    muestreado = models.BooleanField(default=False, help_text="Tomado por muestreo y no a pedido")
+    duracion_ms = models.FloatField()
+    tiempo_sql_ms = models.FloatField()
+    tiempo_plantillas_ms = models.FloatField(help_text="Renderizado de plantillas sin las consultas hechas desde ellas")
+    cantidad_consultas = models.PositiveIntegerField()
+    consultas = models.JSONField(default=list, help_text="SQL, milisegundos y líneas del proyecto que la originaron")
+    resumen = models.TextField(help_text="Funciones con mayor tiempo acumulado")
+    archivo = models.CharField(max_length=100, help_text="Estadísticas de cProfile en PERFILES_DIR")
+    
+    def __str__(self):
+        return f"{self.metodo} {self.ruta} ({self.duracion_ms:.0f} ms)"
+    
+    class Meta:
+        verbose_name = "Perfil"
+        verbose_name_plural = "Perfiles"
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['fecha'], name='perfil_fecha_idx'),
+        ]
+
+
+class AjustePerfilado(models.Model):
+    """Tasa de muestreo de socios.perfilado editable desde el admin; una sola fila.
+
+    Sin fila se usa PERFILADO_MUESTREO de settings.
+    """
+    muestreo = models.FloatField(
+        validators=[MinValueValidator(0), MaxValueValidator(1)],
+        help_text="Fracción de las peticiones perfiladas al azar en segundo plano (0,05 = 5 %); 0 desactiva el muestreo",
+    )
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Muestreo del {self.muestreo * 100:g} %"
+    
+    class Meta:
+        verbose_name = "Ajuste del perfilado"
+        verbose_name_plural = "Ajuste del perfilado"
+
+
+class RegistroCambio(models.Model):
+    """Entrada del registro de auditoría (socios.auditoria); nunca se modifica.
+
+    Solo se eliminan entradas antiguas con el comando podar_auditoria.
+    """
+    ACCION_CHOICES = (
+        ('alta', 'Alta'),
+        ('modificacion', 'Modificación'),
+        ('baja', 'Baja'),
+        # Pagos movidos a PagoArchivado y de vuelta (socios.archivo): no son bajas
+        ('archivo', 'Archivo'),
+        ('restauracion', 'Restauración'),
+    )
+    
+    fecha = models.DateTimeField(default=timezone.now)
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='cambios')
+    # Copia del nombre: se conserva aunque se elimine el usuario
+    nombre_usuario = models.CharField(max_length=150, blank=True)
+    modelo = models.CharField(max_length=50)
+    objeto_id = models.PositiveBigIntegerField()
+    accion = models.CharField(max_length=15, choices=ACCION_CHOICES)
+    # En las modificaciones solo los campos que cambiaron
+    antes = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    despues = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    
+    def __str__(self):
+        return f"{self.get_accion_display()} de {self.modelo} #{self.objeto_id} ({self.fecha:%d/%m/%Y %H:%M})"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("El registro de auditoría no admite modificaciones.")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError("El registro de auditoría no admite eliminaciones; use podar_auditoria.")
+    
+    class Meta:
+        verbose_name = "Registro de cambio"
+        verbose_name_plural = "Registro de cambios"
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['modelo', 'objeto_id', 'fecha'], name='cambio_objeto_idx'),
+            models.Index(fields=['usuario', 'fecha'], name='cambio_usuario_idx'),
+            models.Index(fields=['fecha'], name='cambio_fecha_idx'),
+        ]
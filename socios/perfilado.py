@@ -0,0 +1,245 @@
+import cProfile
+import io
+import logging
+import pstats
+import random
+import sys
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.template.base import Template
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.decorators import sync_and_async_middleware
+
+from .clubes import club_actual
+from .models import AjustePerfilado, Perfil
+
+# Perfilado de peticiones a pedido.
+#
+# Un superusuario agrega ?perfilar=1 a la URL (o envía la cabecera
+# X-Perfilar) y la petición se ejecuta con cProfile, registrando cada consulta
+# SQL con su duración y las líneas del proyecto que la originaron. Además se
+# perfila al azar una fracción de todas las peticiones: la del Ajuste del
+# perfilado del admin o, si no se guardó ninguno, PERFILADO_MUESTREO.
+#
+# Cada perfil queda en el admin (Perfiles) con el tiempo repartido entre SQL,
+# plantillas y Python, y el archivo .prof se descarga para abrirlo con pstats
+# o snakeviz. Sin pedido ni muestreo el middleware solo mira la URL, la
+# cabecera y la tasa guardada en memoria, que se relee cada
+# INTERVALO_MUESTREO segundos.
+#
+# Con ASGI la petición perfilada se ejecuta en un hilo, para que cProfile vea
+# las vistas sincrónicas; el código de las vistas async no queda en el perfil,
+# aunque sí sus consultas.
+
+logger = logging.getLogger(__name__)
+
+# Líneas del proyecto guardadas como origen de cada consulta
+PROFUNDIDAD_ORIGEN = 3
+
+# Funciones listadas en el resumen de cada perfil
+FUNCIONES_RESUMEN = 40
+
+# Segundos durante los que cada proceso reutiliza la tasa de muestreo leída
+# de la base; un cambio en el admin tarda a lo sumo esto en aplicarse
+INTERVALO_MUESTREO = 30
+
+# Tasa leída por club: {club: (tasa, vence)}
+_tasas = {}
+
+_RAIZ = str(settings.BASE_DIR)
+_RENDER = Template.render.__code__
+
+
+def _directorio():
+    return Path(settings.PERFILES_DIR)
+
+
+def _origen(marco):
+    # Líneas del proyecto más cercanas a la consulta, y si se hizo al
+    # renderizar una plantilla
+    lineas = []
+    en_plantilla = False
+    while marco is not None:
+        codigo = marco.f_code
+        if codigo is _RENDER:
+            en_plantilla = True
+        ruta = codigo.co_filename
+        if (len(lineas) < PROFUNDIDAD_ORIGEN and ruta.startswith(_RAIZ)
+                and 'site-packages' not in ruta and ruta != __file__):
+            lineas.append(f"{ruta[len(_RAIZ) + 1:]}:{marco.f_lineno} en {codigo.co_name}")
+        marco = marco.f_back
+    return lineas, en_plantilla
+
+
+class _RegistroConsultas:
+    """execute_wrapper que anota cada consulta de una conexión"""
+
+    def __init__(self, alias, consultas):
+        self.alias = alias
+        self.consultas = consultas
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = (time.perf_counter() - inicio) * 1000
+            origen, en_plantilla = _origen(sys._getframe(1))
+            self.consultas.append({
+                'alias': self.alias,
+                'sql': sql,
+                'ms': round(duracion, 3),
+                'origen': origen,
+                'en_plantilla': en_plantilla,
+            })
+
+
+def _tiempo_plantillas(perfil):
+    # Tiempo acumulado de Template.render; cProfile no suma dos veces las
+    # plantillas incluidas dentro de otras
+    clave = (_RENDER.co_filename, _RENDER.co_firstlineno, _RENDER.co_name)
+    estadistica = perfil.stats.get(clave)
+    return estadistica[3] * 1000 if estadistica else 0
+
+
+def _resumen(perfil):
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).strip_dirs().sort_stats('cumulative').print_stats(FUNCIONES_RESUMEN)
+    return salida.getvalue()
+
+
+def _guardar(request, response, perfil, consultas, duracion, muestreado):
+    perfil.create_stats()
+    directorio = _directorio()
+    directorio.mkdir(parents=True, exist_ok=True)
+    archivo = f"{timezone.localtime():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.prof"
+    perfil.dump_stats(directorio / archivo)
+
+    tiempo_sql = sum(consulta['ms'] for consulta in consultas)
+    sql_en_plantillas = sum(consulta['ms'] for consulta in consultas if consulta['en_plantilla'])
+    usuario = request.user if request.user.is_authenticated else None
+    registro = Perfil.objects.create(
+        usuario=usuario,
+        metodo=request.method,
+        ruta=request.get_full_path()[:500],
+        estado=response.status_code,
+        muestreado=muestreado,
+        duracion_ms=round(duracion * 1000, 3),
+        tiempo_sql_ms=round(tiempo_sql, 3),
+        tiempo_plantillas_ms=round(max(_tiempo_plantillas(perfil) - sql_en_plantillas, 0), 3),
+        cantidad_consultas=len(consultas),
+        consultas=consultas,
+        resumen=_resumen(perfil),
+        archivo=archivo,
+    )
+    rotar_perfiles()
+    return registro
+
+
+def rotar_perfiles(conservar=None):
+    """Elimina los perfiles más antiguos y sus archivos; retorna la cantidad eliminada"""
+    conservar = settings.PERFILADO_CONSERVAR if conservar is None else conservar
+    antiguos = list(Perfil.objects.order_by('-fecha', '-pk').values_list('pk', flat=True)[conservar:])
+    if not antiguos:
+        return 0
+    # Los archivos se borran con la señal post_delete de Perfil
+    Perfil.objects.filter(pk__in=antiguos).delete()
+    return len(antiguos)
+
+
+def ruta_archivo(registro):
+    return _directorio() / registro.archivo
+
+
+def perfilar(request, get_response, muestreado=False):
+    """Ejecuta la petición con cProfile y registro de SQL, y guarda el perfil"""
+    consultas = []
+    perfil = cProfile.Profile()
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(_RegistroConsultas(conexion.alias, consultas)))
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            response = get_response(request)
+        finally:
+            perfil.disable()
+        duracion = time.perf_counter() - inicio
+
+    try:
+        registro = _guardar(request, response, perfil, consultas, duracion, muestreado)
+    except (DatabaseError, OSError):
+        # La respuesta se entrega igual aunque el perfil no pueda guardarse
+        logger.exception("No se pudo guardar el perfil de %s", request.path)
+        return response
+    if not muestreado:
+        response['X-Perfil'] = reverse('admin:socios_perfil_change', args=[registro.pk])
+    return response
+
+
+def _pedido(request):
+    return 'perfilar' in request.GET or 'HTTP_X_PERFILAR' in request.META
+
+
+def _tasa_en_memoria():
+    # None si hay que volver a leerla de la base
+    tasa, vence = _tasas.get(club_actual(), (None, 0))
+    return tasa if time.monotonic() < vence else None
+
+
+def tasa_muestreo():
+    """Fracción de las peticiones que se perfilan al azar"""
+    tasa = _tasa_en_memoria()
+    if tasa is None:
+        try:
+            ajuste = AjustePerfilado.objects.first()
+        except DatabaseError:
+            ajuste = None
+        tasa = ajuste.muestreo if ajuste else settings.PERFILADO_MUESTREO
+        _tasas[club_actual()] = (tasa, time.monotonic() + INTERVALO_MUESTREO)
+    return tasa
+
+
+def olvidar_tasa():
+    """Descarta la tasa en memoria de este proceso para leerla de nuevo"""
+    _tasas.clear()
+
+
+def _muestreado(tasa):
+    return bool(tasa) and random.random() < tasa
+
+
+@sync_and_async_middleware
+def perfilado_middleware(get_response):
+    """Perfila las peticiones pedidas por un superusuario y las muestreadas.
+
+    Va después de AuthenticationMiddleware para conocer al usuario; solo se
+    consulta cuando la petición pide el perfil.
+    """
+    if iscoroutinefunction(get_response):
+        get_response_sincronico = async_to_sync(get_response)
+
+        async def middleware(request):
+            if _pedido(request) and (await request.auser()).is_superuser:
+                return await sync_to_async(perfilar)(request, get_response_sincronico)
+            tasa = _tasa_en_memoria()
+            if tasa is None:
+                tasa = await sync_to_async(tasa_muestreo)()
+            if _muestreado(tasa):
+                return await sync_to_async(perfilar)(request, get_response_sincronico, muestreado=True)
+            return await get_response(request)
+    else:
+        def middleware(request):
+            if _pedido(request) and request.user.is_superuser:
+                return perfilar(request, get_response)
+            if _muestreado(tasa_muestreo()):
+                return perfilar(request, get_response, muestreado=True)
+            return get_response(request)
+    return middleware
@@ -0,0 +1,94 @@
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import Socio, ReglaPromocion, Promocion
+from .resumen import programar_actualizacion
+from .versiones import incrementar_version
+
+# Promoción de categoría por edad y antigüedad.
+#
+# Cada ReglaPromocion activa mueve a los socios de su categoría de origen que
+# cumplen las condiciones a la de destino. Las reglas se aplican en orden, así
+# una misma ejecución puede encadenar varias (Cadete → Juvenil → Activo).
+#
+# Edad y antigüedad se comparan como fechas límite, por lo que cada regla es
+# un UPDATE sobre los socios que cumplen el filtro, sin recorrerlos uno a uno.
+
+
+def restar_anios(fecha, anios):
+    """La misma fecha anios atrás; el 29 de febrero pasa al 28 en años no bisiestos"""
+    try:
+        return fecha.replace(year=fecha.year - anios)
+    except ValueError:
+        return fecha.replace(year=fecha.year - anios, day=28)
+
+
+def candidatos(regla, fecha):
+    """Socios de la categoría de origen que cumplen la regla a la fecha indicada"""
+    socios = Socio.objects.filter(categoria=regla.origen_id)
+    if regla.edad_minima is not None:
+        socios = socios.filter(fecha_nacimiento__lte=restar_anios(fecha, regla.edad_minima))
+    if regla.antiguedad_minima is not None:
+        socios = socios.filter(fecha_alta__lte=restar_anios(fecha, regla.antiguedad_minima))
+    return socios
+
+
+def _aplicar_regla(regla, fecha, tamano_lote):
+    ids = list(candidatos(regla, fecha).order_by('pk').values_list('pk', flat=True))
+    movidos = []
+    for inicio in range(0, len(ids), tamano_lote):
+        with transaction.atomic(using=router.db_for_write(Socio)):
+            # Se vuelve a filtrar por origen por si alguien cambió la
+            # categoría a mano desde la consulta de candidatos
+            lote = list(
+                Socio.objects.filter(pk__in=ids[inicio:inicio + tamano_lote], categoria=regla.origen_id)
+                .values_list('pk', flat=True)
+            )
+            Socio.objects.filter(pk__in=lote).update(categoria=regla.destino_id)
+        movidos += lote
+    return movidos
+
+
+def _aplicar_reglas(reglas, fecha, tamano_lote):
+    return [(regla, _aplicar_regla(regla, fecha, tamano_lote)) for regla in reglas]
+
+
+def promover_socios(fecha=None, aplicar=False, tamano_lote=500, usuario=None):
+    """Aplica las reglas de promoción activas en orden.
+
+    Sin aplicar, los mismos UPDATE se ejecutan dentro de una transacción que
+    se revierte: el resultado informa exactamente lo que haría la ejecución
+    real, incluidas las reglas encadenadas. Al aplicar, cada lote se confirma
+    por separado y cada regla que mueve socios deja un registro Promocion.
+
+    Retorna una lista de (regla, ids de los socios promovidos).
+    """
+    fecha = fecha or timezone.localdate()
+    reglas = list(ReglaPromocion.objects.filter(activa=True).select_related('origen', 'destino'))
+
+    if not aplicar:
+        alias = router.db_for_write(Socio)
+        with transaction.atomic(using=alias):
+            resultado = _aplicar_reglas(reglas, fecha, tamano_lote)
+            transaction.set_rollback(True, using=alias)
+        return resultado
+
+    resultado = _aplicar_reglas(reglas, fecha, tamano_lote)
+    Promocion.objects.bulk_create([
+        Promocion(
+            regla=regla,
+            origen=regla.origen.nombre,
+            destino=regla.destino.nombre,
+            condiciones=regla.descripcion_condiciones(),
+            fecha_referencia=fecha,
+            cantidad=len(movidos),
+            socios=movidos,
+            ejecutada_por=usuario,
+        )
+        for regla, movidos in resultado if movidos
+    ])
+    if any(movidos for _, movidos in resultado):
+        # update() no emite señales: caché y resumen se actualizan una vez
+        incrementar_version('Socio')
+        programar_actualizacion()
+    return resultado
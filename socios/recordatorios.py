@@ -0,0 +1,148 @@
+import smtplib
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Socio, Recordatorio
+from .tareas import tarea, reportar_progreso
+
+ESTADOS_CON_DEUDA = ("Moroso", "Con atraso")
+
+
+def periodo_actual():
+    return timezone.localdate().strftime('%Y-%m')
+
+
+def seleccionar_destinatarios(periodo):
+    """Socios con deuda y email que todavía no recibieron recordatorio en el período"""
+    return (
+        Socio.objects
+        .anotar_estado_pagos()
+        .filter(estado_pagos__in=ESTADOS_CON_DEUDA)
+        .exclude(email='')
+        .exclude(recordatorios__periodo=periodo)
+        .only('id', 'nombre', 'apellido', 'email')
+        .order_by('pk')
+    )
+
+
+def crear_mensaje(socio, periodo, connection):
+    contexto = {'socio': socio, 'estado_pagos': socio.estado_pagos, 'periodo': periodo}
+    asunto = render_to_string('socios/email/recordatorio_asunto.txt', contexto).strip()
+    cuerpo = render_to_string('socios/email/recordatorio.txt', contexto)
+    return EmailMessage(asunto, cuerpo, to=[socio.email], connection=connection)
+
+
+def _enviar_lote(connection, mensajes, reintentos, espera):
+    """Envía cada mensaje del lote por la conexión abierta.
+
+    mensajes asocia el id de cada socio con su mensaje. Si el servidor falla,
+    la conexión se reabre y se reintentan solo los mensajes no entregados.
+    Retorna (ids de los socios sin enviar, último error).
+    """
+    pendientes = dict(mensajes)
+    error = None
+    for intento in range(reintentos + 1):
+        for socio_id, mensaje in list(pendientes.items()):
+            try:
+                connection.send_messages([mensaje])
+            except (smtplib.SMTPException, OSError) as e:
+                error = e
+            else:
+                del pendientes[socio_id]
+        if not pendientes or intento == reintentos:
+            break
+        connection.close()
+        time.sleep(espera * 2 ** intento)
+        try:
+            connection.open()
+        except (smtplib.SMTPException, OSError) as e:
+            # El próximo intento vuelve a fallar y cuenta como reintento
+            error = e
+    return set(pendientes), error
+
+
+def enviar_recordatorios(periodo=None, tamano_lote=None, pausa=None, reintentos=3, dry_run=False, al_avanzar=None):
+    """Envía los recordatorios del período en lotes por una única conexión SMTP.
+
+    Cada lote se registra en Recordatorio antes de enviarse, de modo que un
+    socio nunca recibe dos recordatorios del mismo período aunque el proceso
+    se interrumpa. Los mensajes se envían y reintentan uno por uno: si alguno
+    falla definitivamente solo se elimina su registro, para que la próxima
+    ejecución lo vuelva a intentar, y la campaña sigue con el resto; al
+    terminar se informa el error. Si no se entrega ningún mensaje de un lote
+    el servidor no está disponible y el envío se interrumpe.
+    Retorna la cantidad de recordatorios enviados (o a enviar en dry_run).
+    """
+    periodo = periodo or periodo_actual()
+    tamano_lote = tamano_lote or settings.RECORDATORIOS_TAMANO_LOTE
+    pausa = settings.RECORDATORIOS_PAUSA if pausa is None else pausa
+
+    destinatarios = seleccionar_destinatarios(periodo)
+    total = destinatarios.count()
+    if dry_run or total == 0:
+        return total
+
+    enviados = 0
+    sin_enviar = 0
+    ultimo_error = None
+    connection = get_connection()
+    connection.open()
+    try:
+        # Se itera por clave primaria para no cargar todos los socios en memoria
+        ultimo_pk = 0
+        while True:
+            lote = list(destinatarios.filter(pk__gt=ultimo_pk)[:tamano_lote])
+            if not lote:
+                break
+            ultimo_pk = lote[-1].pk
+
+            # La marca de tiempo identifica los registros creados por esta
+            # ejecución: si otra ejecución concurrente ya registró a un socio,
+            # el conflicto se ignora y ese socio no se incluye en el envío.
+            marca = timezone.now()
+            Recordatorio.objects.bulk_create(
+                [
+                    Recordatorio(socio=socio, periodo=periodo, estado_pagos=socio.estado_pagos,
+                                 email=socio.email, fecha_envio=marca)
+                    for socio in lote
+                ],
+                ignore_conflicts=True,
+            )
+            registros = Recordatorio.objects.filter(periodo=periodo, fecha_envio=marca, socio__in=[s.pk for s in lote])
+            propios = set(registros.values_list('socio_id', flat=True))
+            mensajes = {socio.pk: crear_mensaje(socio, periodo, connection) for socio in lote if socio.pk in propios}
+            fallidos, error = _enviar_lote(connection, mensajes, reintentos, max(pausa, 1))
+            if fallidos:
+                # Los mensajes entregados conservan su registro
+                registros.filter(socio__in=fallidos).delete()
+                if len(fallidos) == len(mensajes):
+                    raise error
+                ultimo_error = error
+
+            enviados += len(mensajes) - len(fallidos)
+            sin_enviar += len(fallidos)
+            if al_avanzar:
+                al_avanzar(enviados, total)
+            if pausa:
+                time.sleep(pausa)
+    finally:
+        connection.close()
+    if sin_enviar:
+        raise smtplib.SMTPException(
+            f"Se enviaron {enviados} recordatorios y {sin_enviar} fallaron; "
+            f"se reintentarán en la próxima ejecución. Último error: {ultimo_error}"
+        )
+    return enviados
+
+
+@tarea('enviar_recordatorios')
+def tarea_enviar_recordatorios(tarea, periodo=None):
+    def al_avanzar(enviados, total):
+        reportar_progreso(tarea, enviados * 100 / total, f"{enviados} de {total} recordatorios enviados")
+
+    enviados = enviar_recordatorios(periodo=periodo, al_avanzar=al_avanzar)
+    return {'enviados': enviados, 'periodo': periodo or periodo_actual()}
@@ -0,0 +1,175 @@
+import contextvars
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .clubes import club_actual
+from .respaldo import copiar_base
+from .versiones import obtener_versiones
+
+# Lecturas pesadas (informes, exportaciones, panel) en una réplica de solo lectura.
+#
+# Las vistas y tareas que toleran datos levemente atrasados se ejecutan dentro
+# de en_replica(); el resto del código sigue leyendo y escribiendo en default.
+# Si la réplica no existe o está más atrasada que REPLICA_RETRASO_MAXIMO, las
+# lecturas vuelven a la base principal. Las escrituras nunca van a la réplica.
+
+REPLICA = 'replica'
+
+# Segundos durante los que se reutiliza la marca de la réplica en PostgreSQL,
+# para no consultar el retraso en cada lectura
+INTERVALO_CONSULTA = 5
+
+_alias_lectura = contextvars.ContextVar('socios_alias_lectura', default=None)
+_marca_cacheada = {'marca': None, 'vence': 0}
+
+
+class ReplicaRouter:
+    """Envía a la réplica las lecturas hechas dentro de en_replica().
+
+    Solo se desvían los modelos de socios: sesiones y usuarios se leen
+    siempre de la base principal para no perder un inicio de sesión reciente.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'socios':
+            return _alias_lectura.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica y principal tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
+
+
+def _consultar_marca(conexion):
+    if conexion.vendor == 'sqlite':
+        # La copia se reemplaza de forma atómica: su fecha de modificación
+        # es el momento de la última actualización. Un archivo vacío es el
+        # que crea SQLite al conectarse a una réplica que todavía no existe.
+        try:
+            estado = os.stat(conexion.settings_dict['NAME'])
+        except OSError:
+            return None
+        return estado.st_mtime if estado.st_size else None
+    if conexion.vendor == 'postgresql':
+        # Sin WAL pendiente de aplicar la réplica está al día aunque la
+        # última transacción sea antigua
+        with conexion.cursor() as cursor:
+            cursor.execute("""
+                SELECT extract(epoch FROM CASE
+                    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN now()
+                    ELSE pg_last_xact_replay_timestamp()
+                END)
+            """)
+            marca = cursor.fetchone()[0]
+        return float(marca) if marca is not None else None
+    return None
+
+
+def marca_replica():
+    """Momento (segundos desde epoch) hasta el que la réplica tiene los datos, o None"""
+    if REPLICA not in settings.DATABASES:
+        return None
+    conexion = connections[REPLICA]
+    if conexion.vendor == 'sqlite':
+        return _consultar_marca(conexion)
+    if time.monotonic() >= _marca_cacheada['vence']:
+        try:
+            _marca_cacheada['marca'] = _consultar_marca(conexion)
+        except DatabaseError:
+            _marca_cacheada['marca'] = None
+        _marca_cacheada['vence'] = time.monotonic() + INTERVALO_CONSULTA
+    return _marca_cacheada['marca']
+
+
+def replica_vigente(*nombres_modelos):
+    """Indica si la réplica puede usarse.
+
+    Debe estar dentro del retraso máximo y, si se indican modelos, incluir
+    su última modificación.
+    """
+    marca = marca_replica()
+    if marca is None or time.time() - marca > settings.REPLICA_RETRASO_MAXIMO:
+        return False
+    return all(version / 1e9 <= marca for version in obtener_versiones(*nombres_modelos))
+
+
+def _renovar_conexion():
+    # Una conexión SQLite abierta antes de reemplazar la copia sigue leyendo
+    # el archivo anterior (por ejemplo, en un worker de tareas): se reabre
+    conexion = connections[REPLICA]
+    if conexion.vendor != 'sqlite':
+        return
+    marca = marca_replica()
+    if getattr(conexion, 'marca_socios', None) != marca:
+        conexion.close()
+        conexion.marca_socios = marca
+
+
+@contextmanager
+def en_replica(*nombres_modelos):
+    """Ejecuta las lecturas del bloque en la réplica si está vigente.
+
+    La decisión se toma una sola vez al entrar, así todas las consultas del
+    bloque ven los mismos datos. Retorna el alias usado para las lecturas.
+    """
+    # La réplica es del club principal; los demás clubes leen de su base
+    usar_replica = club_actual() is None and replica_vigente(*nombres_modelos)
+    alias = REPLICA if usar_replica else 'default'
+    if alias == REPLICA:
+        _renovar_conexion()
+    token = _alias_lectura.set(alias)
+    try:
+        yield alias
+    finally:
+        _alias_lectura.reset(token)
+
+
+def actualizar_replica():
+    """Vuelve a copiar la base principal en la réplica SQLite.
+
+    La copia se arma en un archivo temporal y reemplaza a la anterior de
+    forma atómica; las conexiones abiertas terminan su lectura sobre la copia
+    previa. Retorna los segundos que tomó la copia.
+    """
+    origen, destino = connections['default'], connections[REPLICA]
+    if origen.vendor != 'sqlite' or destino.vendor != 'sqlite':
+        raise ValueError("Solo las réplicas SQLite se actualizan por copia; en PostgreSQL use replicación.")
+    ruta = Path(destino.settings_dict['NAME'])
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    inicio = time.perf_counter()
+    instante = time.time()
+    origen.ensure_connection()
+    fd, temporal = tempfile.mkstemp(dir=ruta.parent, suffix='.sqlite3.tmp')
+    os.close(fd)
+    try:
+        copia = sqlite3.connect(temporal)
+        try:
+            copiar_base(origen.connection, copia, paginas=-1)
+            # La réplica es de solo lectura: no necesita WAL
+            copia.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            copia.close()
+        # La marca de la réplica es el comienzo de la copia: lo escrito
+        # mientras se copiaba puede no estar incluido
+        os.utime(temporal, (instante, instante))
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+    return time.perf_counter() - inicio
@@ -0,0 +1,216 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, router
+from django.utils import timezone
+
+from .clubes import club_actual
+from .models import Pago
+from .versiones import MODELOS_VERSIONADOS, incrementar_version
+
+PREFIJO = 'acftgestion-'
+EXTENSION = '.sqlite3.gz'
+
+# Páginas copiadas por paso de la API de backup; entre pasos la base queda
+# libre para que la aplicación siga escribiendo
+PAGINAS_POR_PASO = 1024
+
+# Reinicios por escrituras concurrentes tolerados en la copia por pasos
+MAX_REINICIOS = 3
+
+# Bloques de 1 MiB al comprimir y descomprimir
+TAMANO_BLOQUE = 1024 * 1024
+
+# Nivel 1 de gzip: con una base de 3,5 GB comprime tres veces más rápido que
+# el nivel 6 y el archivo resulta apenas un 10 % más grande
+NIVEL_COMPRESION = 1
+
+
+class ErrorRespaldo(Exception):
+    pass
+
+
+def _conexion_sqlite():
+    # La base del club activo (socios.clubes)
+    conexion = connections[router.db_for_write(Pago)]
+    if conexion.vendor != 'sqlite':
+        raise ErrorRespaldo("Los respaldos solo están disponibles con SQLite; en otros motores use su herramienta nativa.")
+    conexion.ensure_connection()
+    return conexion
+
+
+def _directorio(directorio=None):
+    # Los respaldos de cada club se guardan y rotan por separado
+    if directorio:
+        return Path(directorio)
+    club = club_actual()
+    return Path(settings.RESPALDOS_DIR) / 'clubes' / club if club else Path(settings.RESPALDOS_DIR)
+
+
+def verificar_integridad(ruta):
+    """Ejecuta PRAGMA integrity_check sobre una base SQLite y retorna los errores encontrados"""
+    conexion = sqlite3.connect(ruta)
+    try:
+        filas = [fila[0] for fila in conexion.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        # Un archivo que no es una base SQLite falla antes de poder verificarse
+        return [str(e)]
+    finally:
+        conexion.close()
+    return [] if filas == ['ok'] else filas
+
+
+class _CopiaReiniciada(Exception):
+    pass
+
+
+def copiar_base(origen, destino, paginas, al_avanzar=None):
+    """Copia la base origen en destino con la API de backup.
+
+    En modo WAL la lectura no bloquea a los escritores, así que se copia una
+    instantánea en un solo paso. En los demás modos se copia por pasos para
+    liberar la base entre uno y otro; SQLite reinicia la copia cada vez que
+    otra conexión escribe, y tras MAX_REINICIOS reinicios se completa en un
+    solo paso para no copiar indefinidamente.
+    """
+    if origen.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal':
+        paginas = -1
+    anterior = {'restantes': None, 'reinicios': 0}
+
+    def progreso(estado, restantes, total):
+        if anterior['restantes'] is not None and restantes > anterior['restantes']:
+            anterior['reinicios'] += 1
+            if anterior['reinicios'] > MAX_REINICIOS:
+                raise _CopiaReiniciada
+        anterior['restantes'] = restantes
+        if al_avanzar:
+            al_avanzar(total - restantes, total)
+
+    try:
+        origen.backup(destino, pages=paginas, progress=progreso)
+    except _CopiaReiniciada:
+        origen.backup(destino, pages=-1)
+
+
+def _temporal(directorio, sufijo):
+    fd, ruta = tempfile.mkstemp(dir=directorio, suffix=sufijo)
+    os.close(fd)
+    return Path(ruta)
+
+
+def listar_respaldos(directorio=None):
+    """Respaldos del directorio, del más reciente al más antiguo"""
+    directorio = _directorio(directorio)
+    return sorted(directorio.glob(f"{PREFIJO}*{EXTENSION}"), reverse=True)
+
+
+def rotar_respaldos(directorio=None, conservar=None):
+    """Elimina los respaldos más antiguos y retorna las rutas eliminadas"""
+    conservar = settings.RESPALDOS_CONSERVAR if conservar is None else conservar
+    eliminados = listar_respaldos(directorio)[conservar:]
+    for ruta in eliminados:
+        ruta.unlink()
+    return eliminados
+
+
+def crear_respaldo(directorio=None, conservar=None, paginas=PAGINAS_POR_PASO, al_avanzar=None):
+    """Crea un respaldo comprimido y verificado de la base en uso.
+
+    La copia se hace con la API de backup de SQLite, que produce una imagen
+    consistente aunque haya escrituras en curso. La API solo escribe en otra
+    base SQLite, así que se copia a un archivo temporal, se verifica y luego
+    se comprime por bloques hacia el destino final.
+
+    Retorna un dict con la ruta, los tamaños y los segundos de cada etapa.
+    """
+    origen = _conexion_sqlite().connection
+    directorio = _directorio(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    nombre = f"{PREFIJO}{timezone.localtime():%Y%m%d-%H%M%S}{EXTENSION}"
+    destino = directorio / nombre
+    tiempos = {}
+
+    copia = _temporal(directorio, '.sqlite3.tmp')
+    comprimido = None
+    try:
+        inicio = time.perf_counter()
+        conexion_copia = sqlite3.connect(copia)
+        try:
+            copiar_base(origen, conexion_copia, paginas, al_avanzar)
+        finally:
+            conexion_copia.close()
+        tiempos['copia'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        errores = verificar_integridad(copia)
+        tiempos['verificacion'] = time.perf_counter() - inicio
+        if errores:
+            raise ErrorRespaldo("La copia no pasó la verificación de integridad: " + "; ".join(errores[:5]))
+
+        inicio = time.perf_counter()
+        comprimido = _temporal(directorio, '.gz.tmp')
+        with open(copia, 'rb') as entrada, gzip.open(comprimido, 'wb', compresslevel=NIVEL_COMPRESION) as salida:
+            shutil.copyfileobj(entrada, salida, TAMANO_BLOQUE)
+        os.replace(comprimido, destino)
+        comprimido = None
+        tiempos['compresion'] = time.perf_counter() - inicio
+
+        tamano_base = copia.stat().st_size
+    finally:
+        copia.unlink(missing_ok=True)
+        if comprimido:
+            comprimido.unlink(missing_ok=True)
+
+    return {
+        'ruta': destino,
+        'tamano_base': tamano_base,
+        'tamano_respaldo': destino.stat().st_size,
+        'tiempos': tiempos,
+        'eliminados': rotar_respaldos(directorio, conservar),
+    }
+
+
+def restaurar_respaldo(archivo, paginas=PAGINAS_POR_PASO, al_avanzar=None):
+    """Reemplaza el contenido de la base en uso por el de un respaldo.
+
+    El respaldo se descomprime y verifica antes de tocar la base. La carga usa
+    la misma API de backup en sentido inverso, de modo que las conexiones
+    abiertas ven el contenido restaurado sin reiniciar la aplicación.
+    """
+    conexion = _conexion_sqlite()
+    destino = conexion.connection
+    archivo = Path(archivo)
+    tiempos = {}
+
+    copia = _temporal(Path(conexion.settings_dict['NAME']).parent, '.sqlite3.tmp')
+    try:
+        inicio = time.perf_counter()
+        with gzip.open(archivo, 'rb') as entrada, open(copia, 'wb') as salida:
+            shutil.copyfileobj(entrada, salida, TAMANO_BLOQUE)
+        tiempos['descompresion'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        errores = verificar_integridad(copia)
+        tiempos['verificacion'] = time.perf_counter() - inicio
+        if errores:
+            raise ErrorRespaldo("El respaldo está dañado: " + "; ".join(errores[:5]))
+
+        inicio = time.perf_counter()
+        origen = sqlite3.connect(copia)
+        try:
+            copiar_base(origen, destino, paginas, al_avanzar)
+        finally:
+            origen.close()
+        tiempos['carga'] = time.perf_counter() - inicio
+    finally:
+        copia.unlink(missing_ok=True)
+
+    # Las versiones cacheadas ya no corresponden al contenido restaurado
+    incrementar_version(*MODELOS_VERSIONADOS)
+    return {'ruta': archivo, 'tiempos': tiempos}
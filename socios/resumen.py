@@ -0,0 +1,132 @@
+import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Socio, Pago, ResumenDiario, Tarea
+from .replicas import en_replica
+from .tareas import tarea, encolar
+
+ESTADOS_PAGO = ("Al día", "Con atraso", "Moroso")
+
+# Días de historial mostrados en las tendencias del panel
+DIAS_HISTORIAL = 30
+
+# Presente mientras hay una actualización programada que todavía no empezó
+CLAVE_PROGRAMADA = 'socios:resumen:programado'
+
+
+def _rango_mes(fecha):
+    inicio = fecha.replace(day=1)
+    fin = (inicio + datetime.timedelta(days=32)).replace(day=1)
+    return inicio, fin
+
+
+def _monto(valor):
+    # Los montos se guardan como texto con dos decimales en el JSON
+    return f"{Decimal(valor or 0):.2f}"
+
+
+def _recaudacion(inicio, fin):
+    return _monto(Pago.objects.filter(fecha_pago__gte=inicio, fecha_pago__lt=fin).aggregate(total=Sum('monto'))['total'])
+
+
+def calcular_resumen():
+    """Calcula los indicadores del club con consultas agregadas"""
+    hoy = timezone.localdate()
+    inicio_mes, fin_mes = _rango_mes(hoy)
+    inicio_mes_anterior, _ = _rango_mes(inicio_mes - datetime.timedelta(days=1))
+
+    por_categoria = (
+        Socio.objects.values('categoria__nombre')
+        .annotate(cantidad=Count('id'))
+        .order_by('-cantidad')
+    )
+    por_estado = (
+        Socio.objects.anotar_estado_pagos()
+        .values('estado_pagos')
+        .annotate(cantidad=Count('id'))
+        .order_by()
+    )
+    top_conceptos = (
+        Pago.objects.filter(fecha_pago__gte=inicio_mes, fecha_pago__lt=fin_mes)
+        .values('concepto__nombre')
+        .annotate(total=Sum('monto'), cantidad=Count('id'))
+        .order_by('-total')[:5]
+    )
+
+    cantidades_estado = {fila['estado_pagos']: fila['cantidad'] for fila in por_estado}
+
+    return {
+        'total_socios': Socio.objects.count(),
+        'socios_por_categoria': [
+            {'categoria': fila['categoria__nombre'] or 'Sin categoría', 'cantidad': fila['cantidad']}
+            for fila in por_categoria
+        ],
+        'socios_por_estado': [
+            {'estado': estado, 'cantidad': cantidades_estado.get(estado, 0)}
+            for estado in ESTADOS_PAGO
+        ],
+        'recaudacion_mes': _recaudacion(inicio_mes, fin_mes),
+        'recaudacion_mes_anterior': _recaudacion(inicio_mes_anterior, inicio_mes),
+        'top_conceptos': [
+            {'concepto': fila['concepto__nombre'] or 'Sin concepto', 'total': _monto(fila['total']), 'cantidad': fila['cantidad']}
+            for fila in top_conceptos
+        ],
+        'nuevos_socios_mes': Socio.objects.filter(fecha_alta__gte=inicio_mes, fecha_alta__lt=fin_mes).count(),
+        'nuevos_socios_mes_anterior': Socio.objects.filter(fecha_alta__gte=inicio_mes_anterior, fecha_alta__lt=inicio_mes).count(),
+    }
+
+
+def actualizar_resumen():
+    """Recalcula y guarda el resumen del día; los días anteriores quedan como historial"""
+    # La réplica solo se usa si ya incluye las últimas altas y pagos
+    with en_replica('Socio', 'Pago'):
+        datos = calcular_resumen()
+    resumen, _ = ResumenDiario.objects.update_or_create(
+        fecha=timezone.localdate(),
+        defaults={'datos': datos},
+    )
+    return resumen
+
+
+def obtener_historial():
+    """Resúmenes de los últimos días, del más reciente al más antiguo.
+
+    Si todavía no existe el resumen de hoy se calcula en el momento.
+    """
+    historial = list(ResumenDiario.objects.order_by('-fecha')[:DIAS_HISTORIAL])
+    if not historial or historial[0].fecha != timezone.localdate():
+        historial.insert(0, actualizar_resumen())
+        historial = historial[:DIAS_HISTORIAL]
+    return historial
+
+
+def programar_actualizacion(using=None):
+    """Programa una actualización del resumen dentro de RESUMEN_DEMORA segundos.
+
+    Las escrituras de ese intervalo se agrupan en la misma tarea: la primera
+    la encola y las siguientes solo consultan una clave de la caché, sin
+    tocar la base. El estado de pagos de los socios depende de la fecha y de
+    todos sus pagos, así que el resumen se recalcula completo en lugar de
+    ajustarse por cada cambio. La tarea se encola después del commit de la
+    transacción que originó la escritura.
+    """
+    def encolar_si_no_existe():
+        demora = settings.RESUMEN_DEMORA
+        if not cache.add(CLAVE_PROGRAMADA, True, timeout=demora):
+            return
+        if not Tarea.objects.filter(tipo='actualizar_resumen', estado='pendiente').exists():
+            encolar('actualizar_resumen', max_intentos=1, demora=demora)
+
+    transaction.on_commit(encolar_si_no_existe, using=using or router.db_for_write(Tarea))
+
+
+@tarea('actualizar_resumen')
+def tarea_actualizar_resumen(tarea):
+    resumen = actualizar_resumen()
+    return {'fecha': resumen.fecha.isoformat()}
@@ -0,0 +1,89 @@
+from django.db import connections
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+from django.core.signals import setting_changed
+
+from .models import AjustePerfilado, Socio, Pago, Concepto, Categoria, Cargo, Perfil
+from .archivo import moviendo_pagos
+from .auditoria import diferencias, estado_guardado, registrar, valores
+from .busqueda import reparar_indice
+from .perfilado import olvidar_tasa, ruta_archivo
+from .resumen import programar_actualizacion
+from .versiones import incrementar_version
+
+
+@receiver([post_save, post_delete], sender=Socio)
+@receiver([post_save, post_delete], sender=Pago)
+@receiver([post_save, post_delete], sender=Concepto)
+@receiver([post_save, post_delete], sender=Categoria)
+@receiver([post_save, post_delete], sender=Cargo)
+def actualizar_version_modelo(sender, using, **kwargs):
+    if not moviendo_pagos():
+        incrementar_version(sender.__name__, using=using)
+
+
+@receiver([post_save, post_delete], sender=Socio)
+@receiver([post_save, post_delete], sender=Pago)
+def actualizar_resumen_club(sender, using, **kwargs):
+    if not moviendo_pagos():
+        programar_actualizacion(using)
+
+
+@receiver(pre_save, sender=Socio)
+@receiver(pre_save, sender=Pago)
+@receiver(pre_save, sender=Concepto)
+@receiver(pre_save, sender=Categoria)
+def leer_estado_anterior(sender, instance, raw, using, **kwargs):
+    if not raw:
+        instance._auditoria_antes = estado_guardado(instance, using)
+
+
+@receiver(post_save, sender=Socio)
+@receiver(post_save, sender=Pago)
+@receiver(post_save, sender=Concepto)
+@receiver(post_save, sender=Categoria)
+def auditar_guardado(sender, instance, created, raw, using, **kwargs):
+    if raw:
+        return
+    antes = getattr(instance, '_auditoria_antes', None)
+    instance._auditoria_antes = None
+    if created or antes is None:
+        registrar(sender, instance.pk, 'alta', None, valores(instance), using)
+        return
+    antes, despues = diferencias(sender, antes, valores(instance))
+    if despues:
+        registrar(sender, instance.pk, 'modificacion', antes, despues, using)
+
+
+@receiver(post_delete, sender=Socio)
+@receiver(post_delete, sender=Pago)
+@receiver(post_delete, sender=Concepto)
+@receiver(post_delete, sender=Categoria)
+def auditar_baja(sender, instance, using, **kwargs):
+    if moviendo_pagos():
+        # Archivado y no eliminado: _mover lo registra como 'archivo'
+        return
+    registrar(sender, instance.pk, 'baja', valores(instance), None, using)
+
+
+@receiver(post_delete, sender=Perfil)
+def eliminar_archivo_perfil(sender, instance, **kwargs):
+    ruta_archivo(instance).unlink(missing_ok=True)
+
+
+@receiver([post_save, post_delete], sender=AjustePerfilado)
+def aplicar_ajuste_perfilado(sender, **kwargs):
+    # Los demás procesos lo leen al vencer su copia (INTERVALO_MUESTREO)
+    olvidar_tasa()
+
+
+@receiver(setting_changed)
+def aplicar_muestreo_configurado(setting, **kwargs):
+    if setting == 'PERFILADO_MUESTREO':
+        olvidar_tasa()
+
+
+@receiver(post_migrate)
+def reparar_indice_busqueda(sender, using, **kwargs):
+    if sender.name == 'socios':
+        reparar_indice(connections[using])
@@ -0,0 +1,128 @@
+import datetime
+import traceback
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Tarea
+
+# Registro de funciones ejecutables como tareas: nombre -> función(tarea, **parametros)
+REGISTRO = {}
+
+# Segundos de espera antes del reintento n: ESPERA_BASE * 2 ** (n - 1)
+ESPERA_BASE = 30
+
+
+def tarea(nombre):
+    """Decorador que registra una función como tarea en segundo plano"""
+    def registrar(funcion):
+        REGISTRO[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def encolar(nombre, usuario=None, max_intentos=3, demora=0, **parametros):
+    """Crea una tarea pendiente, ejecutable dentro de demora segundos, y la retorna"""
+    if nombre not in REGISTRO:
+        raise ValueError(f"No existe una tarea registrada con el nombre '{nombre}'.")
+    return Tarea.objects.create(
+        tipo=nombre,
+        parametros=parametros,
+        creada_por=usuario if usuario and usuario.is_authenticated else None,
+        max_intentos=max_intentos,
+        disponible_desde=timezone.now() + datetime.timedelta(seconds=demora),
+    )
+
+
+def _fin_reserva():
+    return timezone.now() + datetime.timedelta(seconds=settings.TAREAS_RESERVA)
+
+
+def _de_este_worker(tarea):
+    # Si la reserva venció y otra ejecución tomó la tarea, esta ya no la modifica
+    return Tarea.objects.filter(pk=tarea.pk, estado='en_curso', worker=tarea.worker)
+
+
+def reportar_progreso(tarea, progreso, mensaje=''):
+    """Actualiza el progreso visible en la interfaz sin tocar el resto de la fila.
+
+    Renueva además la reserva de la tarea: mientras informe su progreso,
+    ningún otro worker la considera abandonada.
+    """
+    tarea.progreso = max(0, min(int(progreso), 100))
+    tarea.mensaje = mensaje[:200]
+    tarea.reserva_hasta = _fin_reserva()
+    _de_este_worker(tarea).update(progreso=tarea.progreso, mensaje=tarea.mensaje, reserva_hasta=tarea.reserva_hasta)
+
+
+def tomar_siguiente(worker):
+    """Reserva la próxima tarea disponible para el worker indicado.
+
+    La reserva es un UPDATE condicionado al estado, así que dos workers nunca
+    ejecutan la misma tarea aunque la base de datos no soporte SELECT FOR UPDATE.
+    Las tareas en curso con la reserva vencida (su worker se cayó o se
+    reinició) vuelven a tomarse, o fallan si ya agotaron sus intentos.
+    """
+    ahora = timezone.now()
+    Tarea.objects.filter(estado='en_curso', reserva_hasta__lt=ahora, intentos__gte=F('max_intentos')).update(
+        estado='fallida',
+        error="El worker dejó de responder y la tarea agotó sus intentos.",
+        fecha_fin=ahora,
+    )
+    disponibles = Q(estado='pendiente', disponible_desde__lte=ahora) | Q(estado='en_curso', reserva_hasta__lt=ahora)
+    while True:
+        candidata = (
+            Tarea.objects
+            .filter(disponibles)
+            .order_by('disponible_desde', 'pk')
+            .values('pk', 'estado', 'reserva_hasta')
+            .first()
+        )
+        if candidata is None:
+            return None
+        # Con la reserva anterior en la condición, solo un worker retoma una
+        # tarea abandonada
+        reservada = Tarea.objects.filter(**candidata).update(
+            estado='en_curso',
+            worker=worker,
+            fecha_inicio=timezone.now(),
+            reserva_hasta=_fin_reserva(),
+            intentos=F('intentos') + 1,
+        )
+        if reservada:
+            return Tarea.objects.get(pk=candidata['pk'])
+
+
+def ejecutar(tarea):
+    """Ejecuta una tarea reservada y registra su resultado o programa un reintento"""
+    funcion = REGISTRO.get(tarea.tipo)
+    try:
+        if funcion is None:
+            raise LookupError(f"No existe una tarea registrada con el nombre '{tarea.tipo}'.")
+        # Sin transacción envolvente: el progreso debe verse mientras se ejecuta
+        resultado = funcion(tarea, **tarea.parametros)
+    except Exception:
+        tarea.error = traceback.format_exc()
+        if funcion is not None and tarea.intentos < tarea.max_intentos:
+            espera = ESPERA_BASE * 2 ** (tarea.intentos - 1)
+            tarea.estado = 'pendiente'
+            tarea.disponible_desde = timezone.now() + datetime.timedelta(seconds=espera)
+            tarea.mensaje = f"Reintento {tarea.intentos + 1} de {tarea.max_intentos} en {espera} segundos"
+        else:
+            tarea.estado = 'fallida'
+            tarea.fecha_fin = timezone.now()
+        _de_este_worker(tarea).update(
+            estado=tarea.estado, error=tarea.error, disponible_desde=tarea.disponible_desde,
+            mensaje=tarea.mensaje, fecha_fin=tarea.fecha_fin,
+        )
+        return False
+
+    tarea.estado = 'completada'
+    tarea.progreso = 100
+    tarea.resultado = resultado
+    tarea.fecha_fin = timezone.now()
+    _de_este_worker(tarea).update(
+        estado=tarea.estado, progreso=tarea.progreso, resultado=tarea.resultado, fecha_fin=tarea.fecha_fin,
+    )
+    return True
@@ -1,3 +1,1132 @@
-from django.test import TestCase
+import datetime
+import csv
+import gzip
+import io
+import json
+import smtplib
+import tempfile
+import time
+import uuid
+import zipfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import IntegrityError, OperationalError, connections, router, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.http import http_date
+
+from acftgestion.asgi import ArchivosEstaticosHandler
+
+from . import comprobantes
+from .acciones import cambiar_administrador, cambiar_categoria, desactivar_conceptos
+from .auditoria import agrupar_cambios, historial, podar_registro
+from .archivo import PagosConArchivo, archivar_pagos, limite_archivo, requiere_archivo, restaurar_pagos
+from .busqueda import buscar, ids_socios
+from .clubes import activar_club, club_actual, club_middleware, club_por_host
+from .comprobantes import generar_lote, obtener_comprobante
+from .cuenta import movimientos, movimientos_anio, periodo_mes, resumen_anual
+from .models import (
+    DIAS_ATRASO, AjustePerfilado, Cargo, Categoria, Concepto, Pago, PagoArchivado, Perfil, Promocion, Recordatorio, ReglaPromocion,
+    RegistroCambio, ResumenDiario, Socio, Tarea,
+)
+from .recordatorios import enviar_recordatorios
+from .perfilado import olvidar_tasa, rotar_perfiles, ruta_archivo, tasa_muestreo
+from .promociones import promover_socios, restar_anios
+from .replicas import REPLICA, en_replica
+from .respaldo import ErrorRespaldo, crear_respaldo, listar_respaldos, restaurar_respaldo, rotar_respaldos
+from .resumen import calcular_resumen
+from .tareas import ESPERA_BASE, REGISTRO, ejecutar, encolar, reportar_progreso, tomar_siguiente
+
+# Las versiones de los modelos (socios.versiones) se guardan en la caché: las
+# pruebas usan una caché en memoria y no la de archivos del proyecto
+CACHE_PRUEBAS = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'KEY_FUNCTION': 'socios.clubes.clave_cache',
+    }
+}
+
+
+def crear_socio(numero, categoria, **campos):
+    datos = {
+        'nombre': f'Nombre{numero}',
+        'apellido': f'Apellido{numero}',
+        'direccion': 'Calle 123',
+        'dni': str(30000000 + numero),
+        'categoria': categoria,
+        'email': f'socio{numero}@example.com',
+        'celular': '1155550000',
+        'fecha_nacimiento': datetime.date(1990, 1, 1),
+    }
+    datos.update(campos)
+    return Socio.objects.create(**datos)
+
+
+def crear_datos(destino):
+    """Administrador, dos categorías, un concepto y tres socios con un pago cada uno"""
+    destino.admin = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+    destino.categoria = Categoria.objects.create(nombre='Activo')
+    destino.otra_categoria = Categoria.objects.create(nombre='Cadete')
+    destino.concepto = Concepto.objects.create(nombre='Cuota', monto_sugerido=1000)
+    destino.socios = [crear_socio(numero, destino.categoria) for numero in range(3)]
+    destino.pagos = [
+        Pago.objects.create(socio=socio, concepto=destino.concepto, monto=1000, mes_correspondiente='Enero 2026')
+        for socio in destino.socios
+    ]
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class PruebaSocios(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_datos(cls)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def directorio_temporal(self, ajuste):
+        """Directorio vacío asignado al ajuste indicado durante la prueba"""
+        directorio = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(self.settings(**{ajuste: directorio}))
+        return directorio
+
+
+# La réplica es un espejo de default (TEST MIRROR), así que lee los mismos
+# datos. Las pruebas confirman sus transacciones para que la conexión de la
+# réplica los vea.
+@override_settings(CACHES=CACHE_PRUEBAS)
+class ReplicaTests(TransactionTestCase):
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        crear_datos(self)
+        self.client.force_login(self.admin)
+        # Réplica al día: copiada después de la última escritura
+        marca = mock.patch('socios.replicas.marca_replica', return_value=time.time() + 60)
+        marca.start()
+        self.addCleanup(marca.stop)
+
+    def test_router_lee_de_la_replica_y_escribe_en_default(self):
+        with en_replica('Socio') as alias:
+            self.assertEqual(alias, REPLICA)
+            self.assertEqual(router.db_for_read(Socio), REPLICA)
+            self.assertEqual(router.db_for_write(Socio), 'default')
+            self.assertEqual(Socio.objects.get(pk=self.socios[0].pk)._state.db, REPLICA)
+            socio = crear_socio(10, self.categoria)
+        self.assertEqual(socio._state.db, 'default')
+
+    def test_replica_atrasada_lee_de_default(self):
+        with mock.patch('socios.replicas.marca_replica', return_value=time.time() - 24 * 3600):
+            with en_replica() as alias:
+                self.assertEqual(alias, 'default')
+                self.assertEqual(router.db_for_read(Socio), 'default')
+
+    def test_replica_sin_los_ultimos_cambios_lee_de_default(self):
+        with mock.patch('socios.replicas.marca_replica', return_value=time.time() - 60):
+            Pago.objects.create(socio=self.socios[0], concepto=self.concepto, monto=5, mes_correspondiente='Enero 2026')
+            with en_replica('Pago') as alias:
+                self.assertEqual(alias, 'default')
+
+    def test_vistas_de_lectura_nunca_escriben_en_la_replica(self):
+        urls = [
+            reverse('socios:listar_pagos'),
+            reverse('socios:api_pagos'),
+            reverse('socios:api_socios'),
+            reverse('socios:cuenta_socio', args=[self.socios[0].pk]),
+            reverse('socios:cuenta_socio', args=[self.socios[0].pk]) + '?formato=csv',
+        ]
+        for url in urls:
+            with self.subTest(url=url), CaptureQueriesContext(connections[REPLICA]) as consultas:
+                self.assertEqual(self.client.get(url).status_code, 200)
+                sentencias = [consulta['sql'].lstrip().split()[0].upper() for consulta in consultas]
+                self.assertIn('SELECT', sentencias)
+                self.assertEqual(set(sentencias) - {'SELECT'}, set())
+
+    def test_escrituras_de_vistas_de_lectura_van_a_default(self):
+        # LecturaReplicaMixin solo usa la réplica en GET y HEAD
+        with CaptureQueriesContext(connections[REPLICA]) as consultas:
+            respuesta = self.client.post(reverse('socios:listar_pagos'))
+        self.assertNotEqual(respuesta.status_code, 500)
+        self.assertEqual(len(consultas), 0)
+
+
+class RespuestasCondicionalesTests(PruebaSocios):
+    def test_responde_304_si_los_modelos_no_cambiaron(self):
+        url = reverse('socios:listar')
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('ETag', respuesta)
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+        repetida = self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+
+    def test_una_modificacion_invalida_el_etag(self):
+        url = reverse('socios:detalle_socio', args=[self.socios[0].pk])
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pagos[0].monto = 1500
+            self.pagos[0].save()
+            # Hasta el commit la versión no cambia: otra conexión todavía
+            # leería los datos anteriores
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_el_etag_depende_del_usuario(self):
+        url = reverse('socios:listar')
+        etag = self.client.get(url)['ETag']
+        otro = User.objects.create_superuser('otro', 'otro@example.com', 'clave')
+        self.client.force_login(otro)
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_un_nuevo_inicio_de_sesion_invalida_el_etag(self):
+        # La copia guardada tiene el token CSRF de la sesión anterior
+        self.client.logout()
+        self.client.login(username='admin', password='clave')
+        url = reverse('socios:listar')
+        respuesta = self.client.get(url)
+        self.assertContains(respuesta, 'csrfmiddlewaretoken')
+        self.client.logout()
+        self.client.login(username='admin', password='clave')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 200)
+
+    def test_if_modified_since_no_produce_304(self):
+        url = reverse('socios:listar')
+        respuesta = self.client.get(url)
+        self.assertNotIn('Last-Modified', respuesta)
+        futuro = http_date(time.time() + 3600)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=futuro).status_code, 200)
+
+
+class ConsultaMontoAsincronaTests(PruebaSocios):
+    url = reverse_lazy('socios:get_concepto_monto')
+
+    async def test_devuelve_el_monto_sugerido(self):
+        await self.async_client.aforce_login(self.admin)
+        respuesta = await self.async_client.get(self.url, {'concepto_id': self.concepto.pk})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {'monto_sugerido': 1000.0})
+
+    async def test_concepto_inexistente_o_invalido_devuelve_cero(self):
+        await self.async_client.aforce_login(self.admin)
+        for concepto_id in ('999999', 'abc'):
+            respuesta = await self.async_client.get(self.url, {'concepto_id': concepto_id})
+            self.assertEqual(respuesta.json(), {'monto_sugerido': 0})
+
+    async def test_sin_sesion_responde_401(self):
+        respuesta = await self.async_client.get(self.url, {'concepto_id': self.concepto.pk})
+        self.assertEqual(respuesta.status_code, 401)
+
+    def test_socio_sin_permisos_responde_403(self):
+        usuario = User.objects.create_user('socio', 'socio@example.com', 'clave')
+        crear_socio(50, self.categoria, usuario=usuario)
+        self.client.force_login(usuario)
+        respuesta = self.client.get(self.url, {'concepto_id': self.concepto.pk})
+        self.assertEqual(respuesta.status_code, 403)
+
+
+class ApiTests(PruebaSocios):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.socios += [crear_socio(numero, cls.otra_categoria) for numero in range(3, 8)]
+
+    def test_el_cursor_recorre_todas_las_filas_sin_repetir(self):
+        url = reverse('socios:api_socios') + '?limit=3'
+        ids = []
+        paginas = 0
+        while url:
+            datos = self.client.get(url).json()
+            ids += [fila['id'] for fila in datos['results']]
+            url = datos['next']
+            paginas += 1
+        self.assertEqual(ids, sorted(socio.pk for socio in self.socios))
+        self.assertEqual(paginas, 3)
+
+    def test_el_cursor_conserva_los_filtros(self):
+        respuesta = self.client.get(reverse('socios:api_socios'), {'categoria': self.otra_categoria.pk, 'limit': 2})
+        siguiente = self.client.get(respuesta.json()['next']).json()
+        self.assertTrue(all(fila['categoria'] == self.otra_categoria.pk for fila in siguiente['results']))
+
+    def test_fields_limita_las_columnas_e_incluye_el_id(self):
+        datos = self.client.get(reverse('socios:api_socios'), {'fields': 'nombre,dni'}).json()
+        self.assertEqual(set(datos['results'][0]), {'id', 'nombre', 'dni'})
+
+    def test_parametros_invalidos_responden_400(self):
+        for parametros in ({'fields': 'clave'}, {'cursor': 'no-es-un-cursor'}, {'limit': 'mucho'}):
+            with self.subTest(parametros=parametros):
+                respuesta = self.client.get(reverse('socios:api_pagos'), parametros)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('error', respuesta.json())
+
+    def test_sin_sesion_responde_401(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('socios:api_pagos')).status_code, 401)
+
+
+class TareasTests(PruebaSocios):
+    def setUp(self):
+        super().setUp()
+        # Los pagos de los datos de prueba encolan la actualización del resumen
+        Tarea.objects.all().delete()
+        self.llamadas = []
+
+        def correcta(tarea, valor):
+            self.llamadas.append(valor)
+            return {'valor': valor}
+
+        def fallida(tarea):
+            raise RuntimeError("falla de prueba")
+
+        registro = mock.patch.dict(REGISTRO, {'correcta': correcta, 'fallida': fallida})
+        registro.start()
+        self.addCleanup(registro.stop)
+
+    def en(self, segundos):
+        return mock.patch('django.utils.timezone.now', return_value=timezone.now() + datetime.timedelta(seconds=segundos))
+
+    def test_encolar_una_tarea_no_registrada_falla(self):
+        with self.assertRaises(ValueError):
+            encolar('inexistente')
+
+    def test_una_tarea_reservada_no_la_toma_otro_worker(self):
+        tarea = encolar('correcta', valor=1)
+        reservada = tomar_siguiente('w1')
+        self.assertEqual(reservada.pk, tarea.pk)
+        self.assertEqual((reservada.estado, reservada.worker, reservada.intentos), ('en_curso', 'w1', 1))
+        self.assertIsNone(tomar_siguiente('w2'))
+
+    def test_ejecutar_guarda_el_resultado(self):
+        tarea = encolar('correcta', valor=7)
+        self.assertTrue(ejecutar(tomar_siguiente('w1')))
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.progreso, tarea.resultado), ('completada', 100, {'valor': 7}))
+        self.assertEqual(self.llamadas, [7])
+
+    def test_una_falla_se_reintenta_con_espera_creciente(self):
+        tarea = encolar('fallida', max_intentos=3)
+        self.assertFalse(ejecutar(tomar_siguiente('w1')))
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'pendiente')
+        self.assertIn('falla de prueba', tarea.error)
+        # No se vuelve a tomar antes de la espera
+        self.assertIsNone(tomar_siguiente('w1'))
+        with self.en(ESPERA_BASE + 1):
+            self.assertFalse(ejecutar(tomar_siguiente('w1')))
+        tarea.refresh_from_db()
+        self.assertGreaterEqual(tarea.disponible_desde - timezone.now(), datetime.timedelta(seconds=2 * ESPERA_BASE))
+        with self.en(10 * ESPERA_BASE):
+            ejecutar(tomar_siguiente('w1'))
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('fallida', 3))
+
+    def test_la_tarea_de_un_worker_caido_se_retoma_al_vencer_la_reserva(self):
+        tarea = encolar('correcta', valor=1)
+        abandonada = tomar_siguiente('w1')
+        with self.en(settings.TAREAS_RESERVA - 10):
+            self.assertIsNone(tomar_siguiente('w2'))
+        with self.en(settings.TAREAS_RESERVA + 10):
+            retomada = tomar_siguiente('w2')
+            self.assertEqual((retomada.pk, retomada.worker, retomada.intentos), (tarea.pk, 'w2', 2))
+            # El worker original ya no puede modificarla
+            reportar_progreso(abandonada, 50)
+            ejecutar(abandonada)
+            tarea.refresh_from_db()
+            self.assertEqual((tarea.estado, tarea.progreso), ('en_curso', 0))
+            ejecutar(retomada)
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.worker), ('completada', 'w2'))
+
+    def test_reportar_progreso_renueva_la_reserva(self):
+        encolar('correcta', valor=1)
+        tarea = tomar_siguiente('w1')
+        with self.en(settings.TAREAS_RESERVA - 10):
+            reportar_progreso(tarea, 40, "Procesando")
+        with self.en(settings.TAREAS_RESERVA + 10):
+            self.assertIsNone(tomar_siguiente('w2'))
+
+    def test_una_tarea_abandonada_sin_intentos_queda_fallida(self):
+        tarea = encolar('correcta', max_intentos=1, valor=1)
+        tomar_siguiente('w1')
+        with self.en(settings.TAREAS_RESERVA + 10):
+            self.assertIsNone(tomar_siguiente('w2'))
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'fallida')
+
+
+class RecordatoriosTests(PruebaSocios):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.moroso = crear_socio(10, cls.categoria)
+        cls.con_atraso = crear_socio(11, cls.categoria)
+        Pago.objects.create(
+            socio=cls.con_atraso, concepto=cls.concepto, monto=1000, mes_correspondiente='Atrasado',
+            fecha_pago=timezone.localdate() - datetime.timedelta(days=60),
+        )
+        cls.deudores = {cls.moroso.email, cls.con_atraso.email}
+
+    def setUp(self):
+        super().setUp()
+        pausa = mock.patch('socios.recordatorios.time.sleep')
+        pausa.start()
+        self.addCleanup(pausa.stop)
+
+    def fallar(self, fallas):
+        """Hace fallar el envío a cada dirección la cantidad de veces indicada (None: siempre)"""
+        enviar = EmailBackend.send_messages
+
+        def send_messages(backend, mensajes):
+            destinatario = mensajes[0].to[0]
+            if destinatario in fallas:
+                if fallas[destinatario] is None:
+                    raise smtplib.SMTPRecipientsRefused({destinatario: (550, b'rechazado')})
+                if fallas[destinatario] > 0:
+                    fallas[destinatario] -= 1
+                    raise smtplib.SMTPServerDisconnected("conexión perdida")
+            return enviar(backend, mensajes)
+
+        return mock.patch.object(EmailBackend, 'send_messages', send_messages)
+
+    def test_envia_solo_a_socios_con_deuda_una_vez_por_periodo(self):
+        self.assertEqual(enviar_recordatorios(dry_run=True), 2)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(enviar_recordatorios(pausa=0), 2)
+        self.assertEqual({mensaje.to[0] for mensaje in mail.outbox}, self.deudores)
+        self.assertEqual(set(Recordatorio.objects.values_list('email', flat=True)), self.deudores)
+        self.assertEqual(enviar_recordatorios(pausa=0), 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_un_error_transitorio_reintenta_solo_el_mensaje_fallido(self):
+        with self.fallar({self.moroso.email: 1}):
+            self.assertEqual(enviar_recordatorios(tamano_lote=10, pausa=0), 2)
+        destinatarios = sorted(mensaje.to[0] for mensaje in mail.outbox)
+        self.assertEqual(destinatarios, sorted(self.deudores))
+
+    def test_un_mensaje_que_falla_siempre_no_borra_los_entregados(self):
+        with self.fallar({self.moroso.email: None}), self.assertRaises(smtplib.SMTPException):
+            enviar_recordatorios(tamano_lote=10, pausa=0, reintentos=2)
+        self.assertEqual([mensaje.to[0] for mensaje in mail.outbox], [self.con_atraso.email])
+        self.assertEqual(list(Recordatorio.objects.values_list('email', flat=True)), [self.con_atraso.email])
+        # La próxima ejecución solo intenta el mensaje pendiente
+        self.assertEqual(enviar_recordatorios(pausa=0), 1)
+        self.assertEqual(mail.outbox[-1].to, [self.moroso.email])
+
+    def test_sin_servidor_no_queda_ningun_registro(self):
+        with self.fallar(dict.fromkeys(self.deudores, None)), self.assertRaises(smtplib.SMTPException):
+            enviar_recordatorios(tamano_lote=10, pausa=0, reintentos=1)
+        self.assertFalse(Recordatorio.objects.exists())
+
+
+class ComprobantesTests(PruebaSocios):
+    def setUp(self):
+        super().setUp()
+        self.directorio = self.directorio_temporal('COMPROBANTES_DIR')
+
+    def test_la_descarga_responde_304_mientras_el_pago_no_cambia(self):
+        url = reverse('socios:comprobante_pago', args=[self.pagos[0].pk])
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(b''.join(respuesta.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 304)
+        self.pagos[0].monto = 1500
+        self.pagos[0].save()
+        cambiada = self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(cambiada.status_code, 200)
+        self.assertNotEqual(cambiada['ETag'], respuesta['ETag'])
+
+    def test_el_comprobante_se_genera_una_vez_por_contenido(self):
+        with mock.patch('socios.comprobantes._guardar', wraps=comprobantes._guardar) as guardar:
+            ruta, hash_contenido = obtener_comprobante(self.pagos[0])
+            self.assertEqual(obtener_comprobante(self.pagos[0]), (ruta, hash_contenido))
+            self.assertEqual(guardar.call_count, 1)
+        self.assertTrue(ruta.is_relative_to(self.directorio))
+        self.pagos[0].comprobante = 'TRX-1'
+        self.assertNotEqual(obtener_comprobante(self.pagos[0])[1], hash_contenido)
+
+    def test_un_socio_no_descarga_comprobantes_ajenos(self):
+        usuario = User.objects.create_user('socio', 'socio@example.com', 'clave')
+        crear_socio(50, self.categoria, usuario=usuario)
+        self.client.force_login(usuario)
+        respuesta = self.client.get(reverse('socios:comprobante_pago', args=[self.pagos[0].pk]))
+        self.assertRedirects(respuesta, reverse('socios:mi_perfil'), fetch_redirect_response=False)
+
+    def test_generar_lote_empaqueta_un_pdf_por_pago(self):
+        archivo_zip = self.directorio / 'lote.zip'
+        self.assertEqual(generar_lote(Pago.objects.all(), archivo_zip, procesos=2), 3)
+        with zipfile.ZipFile(archivo_zip) as contenido:
+            self.assertEqual(sorted(contenido.namelist()), sorted(f"comprobante_{pago.pk:06d}.pdf" for pago in self.pagos))
+            self.assertTrue(all(contenido.read(nombre).startswith(b'%PDF') for nombre in contenido.namelist()))
+
+
+class ArchivoTests(PruebaSocios):
+    def setUp(self):
+        super().setUp()
+        self.hoy = timezone.localdate()
+        self.antiguo = Pago.objects.create(
+            socio=self.socios[0], concepto=self.concepto, monto=800,
+            fecha_pago=datetime.date(self.hoy.year - 2, 3, 1), mes_correspondiente='Marzo',
+        )
+
+    def test_archivar_mueve_los_ejercicios_cerrados_y_restaurar_los_devuelve(self):
+        self.assertEqual(archivar_pagos(self.hoy.year - 1), 1)
+        self.assertFalse(Pago.objects.filter(pk=self.antiguo.pk).exists())
+        archivado = PagoArchivado.objects.get()
+        self.assertEqual((archivado.pk, archivado.monto), (self.antiguo.pk, 800))
+        self.assertEqual(Pago.objects.count(), 3)
+        self.assertTrue(requiere_archivo(datetime.date(self.hoy.year - 2, 1, 1)))
+        self.assertFalse(requiere_archivo(self.hoy))
+
+        self.assertEqual(restaurar_pagos(self.hoy.year - 2), 1)
+        self.assertFalse(PagoArchivado.objects.exists())
+        self.assertEqual(Pago.objects.get(pk=self.antiguo.pk).fecha_pago, self.antiguo.fecha_pago)
+
+    def test_no_se_archiva_el_ejercicio_en_curso(self):
+        with self.assertRaises(ValueError):
+            archivar_pagos(self.hoy.year)
+        self.assertEqual(Pago.objects.count(), 4)
+
+    def test_los_pagos_recientes_de_un_ejercicio_cerrado_no_se_archivan(self):
+        # A mediados de enero, un pago de diciembre todavía mantiene al socio
+        # "Con atraso" y no debe salir de la tabla de pagos
+        mediados_enero = datetime.date(self.hoy.year, 1, 15)
+        diciembre = Pago.objects.create(
+            socio=self.socios[1], concepto=self.concepto, monto=1000,
+            fecha_pago=datetime.date(self.hoy.year - 1, 12, 20), mes_correspondiente='Diciembre',
+        )
+        with mock.patch('django.utils.timezone.localdate', return_value=mediados_enero):
+            self.assertEqual(limite_archivo(self.hoy.year - 1), mediados_enero - datetime.timedelta(days=DIAS_ATRASO))
+            self.assertEqual(archivar_pagos(self.hoy.year - 1), 1)
+        self.assertTrue(Pago.objects.filter(pk=diciembre.pk).exists())
+        self.assertFalse(Pago.objects.filter(pk=self.antiguo.pk).exists())
+
+    def test_pagos_con_archivo_une_ambas_tablas_por_fecha(self):
+        archivar_pagos(self.hoy.year - 1)
+        union = PagosConArchivo(Pago.objects.all(), PagoArchivado.objects.all())
+        self.assertEqual(len(union), 4)
+        self.assertEqual(union.total(), 3800)
+        self.assertEqual(
+            [(pago.pk, pago.archivado) for pago in union],
+            [(pago.pk, False) for pago in sorted(self.pagos, key=lambda pago: pago.pk, reverse=True)]
+            + [(self.antiguo.pk, True)],
+        )
+        self.assertEqual(union[3].pk, self.antiguo.pk)
+
+    def test_la_lista_incluye_el_archivo_si_el_periodo_llega_a_el(self):
+        archivar_pagos(self.hoy.year - 1)
+        url = reverse('socios:listar_pagos')
+        cierre = f'{self.hoy.year - 2}-12-31'
+        for filtros, cantidad in [({'fecha_hasta': cierre}, 1), ({'fecha_desde': f'{self.hoy.year - 2}-01-01'}, 4), ({}, 4)]:
+            with self.subTest(filtros=filtros):
+                respuesta = self.client.get(url, filtros)
+                self.assertEqual(respuesta.context['paginator'].count, cantidad)
+        self.assertEqual(self.client.get(url, {'fecha_hasta': cierre}).context['total_pagos'], 800)
+        self.assertEqual(self.client.get(url, {'fecha_desde': self.hoy.isoformat()}).context['paginator'].count, 3)
+
+    def test_la_api_exporta_los_pagos_archivados(self):
+        archivar_pagos(self.hoy.year - 1)
+        url = reverse('socios:api_pagos')
+        respuesta = self.client.get(url, {'fecha_hasta': f'{self.hoy.year - 2}-12-31'}).json()
+        self.assertEqual([fila['id'] for fila in respuesta['results']], [self.antiguo.pk])
+        # El cursor recorre ambas tablas en orden de id
+        ids = []
+        siguiente = f'{url}?limit=2'
+        while siguiente:
+            respuesta = self.client.get(siguiente).json()
+            ids += [fila['id'] for fila in respuesta['results']]
+            siguiente = respuesta['next']
+        self.assertEqual(ids, sorted([pago.pk for pago in self.pagos] + [self.antiguo.pk]))
+
+    def test_los_pagos_archivados_conservan_su_comprobante(self):
+        directorio = self.directorio_temporal('COMPROBANTES_DIR')
+        archivar_pagos(self.hoy.year - 1)
+        respuesta = self.client.get(reverse('socios:comprobante_pago', args=[self.antiguo.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(b''.join(respuesta.streaming_content).startswith(b'%PDF'))
+
+        salida = directorio / 'lote.zip'
+        call_command('generar_comprobantes', f'{self.hoy.year - 2}-03', salida=salida, procesos=1, stdout=io.StringIO())
+        with zipfile.ZipFile(salida) as contenido:
+            self.assertEqual(contenido.namelist(), [f'comprobante_{self.antiguo.pk:06d}.pdf'])
+
+
+class BusquedaTests(PruebaSocios):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.jose = crear_socio(10, cls.categoria, nombre='José', apellido='Pérez')
+        cls.pago = Pago.objects.create(
+            socio=cls.jose, concepto=cls.concepto, monto=1000, mes_correspondiente='Febrero 2026', comprobante='TRX-98765',
+        )
+
+    def test_la_busqueda_ignora_acentos_y_mayusculas(self):
+        self.assertEqual(ids_socios('jose perez'), [self.jose.pk])
+        self.assertEqual(ids_socios('PÉREZ'), [self.jose.pk])
+
+    def test_los_terminos_se_buscan_como_prefijo(self):
+        self.assertEqual(ids_socios('Per'), [self.jose.pk])
+        self.assertEqual(len(ids_socios('300000')), 4)
+        self.assertIn(self.jose.pk, ids_socios('socio10'))
+
+    def test_el_indice_sigue_las_modificaciones(self):
+        self.jose.apellido = 'Gómez'
+        self.jose.save()
+        self.assertEqual(ids_socios('perez'), [])
+        self.assertEqual(ids_socios('gomez'), [self.jose.pk])
+        self.jose.delete()
+        self.assertEqual(ids_socios('gomez'), [])
+
+    def test_buscar_incluye_socios_y_pagos_por_comprobante(self):
+        self.assertEqual(buscar('98765'), [('pago', self.pago)])
+        self.assertIn(('socio', self.jose), buscar('José'))
+        respuesta = self.client.get(reverse('socios:buscar'), {'q': 'jose'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'Pérez')
+
+
+class ResumenTests(PruebaSocios):
+    def setUp(self):
+        super().setUp()
+        Tarea.objects.all().delete()
+
+    def registrar_pagos(self, cantidad):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(cantidad):
+                Pago.objects.create(socio=self.socios[0], concepto=self.concepto, monto=500, mes_correspondiente='Extra')
+
+    def test_calcular_resumen(self):
+        datos = calcular_resumen()
+        self.assertEqual(datos['total_socios'], 3)
+        self.assertEqual(datos['socios_por_categoria'], [{'categoria': 'Activo', 'cantidad': 3}])
+        self.assertEqual(datos['socios_por_estado'][0], {'estado': 'Al día', 'cantidad': 3})
+        self.assertEqual(datos['recaudacion_mes'], '3000.00')
+        self.assertEqual(datos['top_conceptos'], [{'concepto': 'Cuota', 'total': '3000.00', 'cantidad': 3}])
+
+    def test_las_escrituras_seguidas_encolan_una_sola_actualizacion_demorada(self):
+        antes = timezone.now()
+        self.registrar_pagos(3)
+        tarea = Tarea.objects.get(tipo='actualizar_resumen')
+        self.assertGreaterEqual(tarea.disponible_desde, antes + datetime.timedelta(seconds=settings.RESUMEN_DEMORA))
+        # Vencida la clave de la caché, la tarea pendiente sigue agrupando las escrituras
+        cache.clear()
+        self.registrar_pagos(1)
+        self.assertEqual(Tarea.objects.filter(tipo='actualizar_resumen').count(), 1)
+
+    def test_la_tarea_guarda_el_resumen_del_dia(self):
+        self.registrar_pagos(1)
+        ahora = timezone.now() + datetime.timedelta(seconds=settings.RESUMEN_DEMORA + 1)
+        with mock.patch('django.utils.timezone.now', return_value=ahora):
+            tarea = tomar_siguiente('worker-1')
+            self.assertTrue(ejecutar(tarea))
+        resumen = ResumenDiario.objects.get(fecha=timezone.localdate())
+        self.assertEqual(resumen.datos['recaudacion_mes'], '3500.00')
+
+    def test_el_panel_calcula_el_resumen_si_falta(self):
+        respuesta = self.client.get(reverse('socios:panel'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['datos']['total_socios'], 3)
+        self.assertTrue(ResumenDiario.objects.filter(fecha=timezone.localdate()).exists())
+
+
+class PagosDuplicadosTests(PruebaSocios):
+    def setUp(self):
+        super().setUp()
+        self.mensual = Concepto.objects.create(nombre='Cuota mensual', monto_sugerido=1000, unico_por_periodo=True)
+        self.url = reverse('socios:crear_pago', args=[self.socios[0].pk])
+
+    def datos_formulario(self, **campos):
+        datos = {
+            'socio': self.socios[0].pk,
+            'concepto': self.concepto.pk,
+            'monto': '1000.00',
+            'fecha_pago': timezone.localdate().isoformat(),
+            'mes_correspondiente': 'Marzo 2026',
+            'metodo_pago': 'efectivo',
+            'clave_idempotencia': str(uuid.uuid4()),
+        }
+        datos.update(campos)
+        return datos
+
+    def test_reenviar_el_formulario_no_duplica_el_pago(self):
+        datos = self.datos_formulario()
+        destino = reverse('socios:detalle_socio', args=[self.socios[0].pk])
+        self.assertRedirects(self.client.post(self.url, datos), destino, fetch_redirect_response=False)
+        respuesta = self.client.post(self.url, datos, follow=True)
+        self.assertRedirects(respuesta, destino)
+        self.assertContains(respuesta, "no se creó un duplicado")
+        self.assertEqual(Pago.objects.filter(clave_idempotencia=datos['clave_idempotencia']).count(), 1)
+
+    def test_dos_envios_simultaneos_responden_con_el_mismo_pago(self):
+        # El segundo envío pasa la consulta previa antes de que el primero
+        # confirme y choca con la clave única al guardar
+        datos = self.datos_formulario()
+        existente = Pago.objects.create(
+            socio=self.socios[0], concepto=self.concepto, monto=1000,
+            mes_correspondiente='Marzo 2026', clave_idempotencia=datos['clave_idempotencia'],
+        )
+        with mock.patch('socios.views.PagoCreateView._pago_ya_registrado', side_effect=[None, existente]):
+            respuesta = self.client.post(self.url, datos)
+        self.assertRedirects(respuesta, reverse('socios:detalle_socio', args=[self.socios[0].pk]), fetch_redirect_response=False)
+        self.assertEqual(Pago.objects.filter(mes_correspondiente='Marzo 2026').count(), 1)
+
+    def test_un_concepto_unico_por_periodo_admite_un_pago_por_mes(self):
+        self.client.post(self.url, self.datos_formulario(concepto=self.mensual.pk))
+        respuesta = self.client.post(self.url, self.datos_formulario(concepto=self.mensual.pk))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, "ya tiene registrado un pago de este concepto para ese mes")
+        self.assertEqual(Pago.objects.filter(concepto=self.mensual).count(), 1)
+        # Los conceptos sin la marca admiten varios pagos en el mismo mes
+        self.client.post(self.url, self.datos_formulario())
+        self.client.post(self.url, self.datos_formulario())
+        self.assertEqual(Pago.objects.filter(concepto=self.concepto, mes_correspondiente='Marzo 2026').count(), 2)
+
+    def test_archivar_y_restaurar_conserva_las_protecciones(self):
+        anterior = timezone.localdate().year - 2
+        clave = uuid.uuid4()
+        pago = Pago.objects.create(
+            socio=self.socios[0], concepto=self.mensual, monto=1000, fecha_pago=datetime.date(anterior, 3, 1),
+            mes_correspondiente=f'Marzo {anterior}', clave_idempotencia=clave,
+        )
+        archivar_pagos(anterior)
+        archivado = PagoArchivado.objects.get(pk=pago.pk)
+        self.assertEqual((archivado.periodo_unico, archivado.clave_idempotencia), (True, clave))
+
+        restaurar_pagos(anterior)
+        restaurado = Pago.objects.get(pk=pago.pk)
+        self.assertEqual((restaurado.periodo_unico, restaurado.clave_idempotencia), (True, clave))
+        with self.assertRaises(IntegrityError):
+            Pago.objects.create(
+                socio=self.socios[0], concepto=self.mensual, monto=1000, mes_correspondiente=f'Marzo {anterior}',
+            )
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class RespaldoTests(TransactionTestCase):
+    # La copia y la carga usan la API de backup de SQLite sobre la conexión,
+    # que no puede estar dentro de la transacción de un TestCase
+    def setUp(self):
+        cache.clear()
+        crear_datos(self)
+        self.directorio = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+    def test_restaurar_devuelve_la_base_al_estado_respaldado(self):
+        respaldo = crear_respaldo(self.directorio)
+        self.assertEqual(listar_respaldos(self.directorio), [respaldo['ruta']])
+        self.assertLess(respaldo['tamano_respaldo'], respaldo['tamano_base'])
+
+        Pago.objects.all().delete()
+        crear_socio(10, self.categoria)
+        restaurar_respaldo(respaldo['ruta'])
+        self.assertEqual(Pago.objects.count(), 3)
+        self.assertEqual(Socio.objects.count(), 3)
+
+    def test_comandos_respaldar_y_restaurar(self):
+        # Sin archivo, restaurar_bd usa el respaldo más reciente
+        call_command('respaldar_bd', destino=self.directorio, paginas=1, stdout=io.StringIO())
+        Pago.objects.all().delete()
+        with self.settings(RESPALDOS_DIR=self.directorio):
+            call_command('restaurar_bd', interactive=False, paginas=1, stdout=io.StringIO())
+        self.assertEqual(Pago.objects.count(), 3)
+
+    def test_un_respaldo_danado_no_toca_la_base(self):
+        danado = self.directorio / 'danado.sqlite3.gz'
+        with gzip.open(danado, 'wb') as archivo:
+            archivo.write(b'no es una base')
+        with self.assertRaises(ErrorRespaldo):
+            restaurar_respaldo(danado)
+        self.assertEqual(Pago.objects.count(), 3)
+
+    def test_rotar_conserva_los_mas_recientes(self):
+        nombres = [f'acftgestion-2026010{dia}-000000.sqlite3.gz' for dia in range(1, 5)]
+        for nombre in nombres:
+            (self.directorio / nombre).touch()
+        eliminados = rotar_respaldos(self.directorio, conservar=2)
+        self.assertEqual([ruta.name for ruta in eliminados], [nombres[1], nombres[0]])
+        self.assertEqual([ruta.name for ruta in listar_respaldos(self.directorio)], [nombres[3], nombres[2]])
+
+
+class SaludTests(PruebaSocios):
+    def test_responde_sin_sesion(self):
+        self.client.logout()
+        respuesta = self.client.get(reverse('socios:salud'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {'estado': 'ok'})
+
+    def test_sin_base_de_datos_responde_503(self):
+        with mock.patch('django.db.backends.base.base.BaseDatabaseWrapper.cursor', side_effect=OperationalError):
+            respuesta = self.client.get(reverse('socios:salud'))
+        self.assertEqual(respuesta.status_code, 503)
+        self.assertEqual(respuesta.json(), {'estado': 'error'})
+
+    def test_fuera_de_debug_se_sirven_los_archivos_reunidos(self):
+        directorio = self.directorio_temporal('STATIC_ROOT')
+        (directorio / 'admin').mkdir()
+        (directorio / 'admin' / 'base.css').write_text('body {}')
+        handler = ArchivosEstaticosHandler(mock.Mock())
+        respuesta = handler.serve(RequestFactory().get(f'{settings.STATIC_URL}admin/base.css'))
+        self.assertEqual(b''.join(respuesta.streaming_content), b'body {}')
+
+
+# Las pruebas no crean las bases de los clubes: solo verifican a qué base y
+# a qué claves de caché se dirigiría cada consulta
+@override_settings(CLUBES={'ferroclub': ['ferroclub.example.com', 'ferro.example.com']}, ALLOWED_HOSTS=['*'])
+class ClubesTests(PruebaSocios):
+    def test_club_por_host(self):
+        self.assertEqual(club_por_host('ferroclub.example.com'), 'ferroclub')
+        self.assertEqual(club_por_host('ferro.example.com:8000'), 'ferroclub')
+        self.assertIsNone(club_por_host('acft.example.com'))
+
+    def test_activar_club(self):
+        with self.assertRaises(LookupError):
+            with activar_club('otroclub'):
+                pass
+        with activar_club('ferroclub'):
+            self.assertEqual(club_actual(), 'ferroclub')
+            with activar_club(None):
+                self.assertIsNone(club_actual())
+            self.assertEqual(club_actual(), 'ferroclub')
+        self.assertIsNone(club_actual())
+
+    def test_el_router_usa_la_base_del_club_activo(self):
+        with activar_club('ferroclub'):
+            self.assertEqual(router.db_for_read(Socio), 'ferroclub')
+            self.assertEqual(router.db_for_write(Pago), 'ferroclub')
+        self.assertEqual(router.db_for_write(Pago), 'default')
+        socio_club = Socio(pk=1)
+        socio_club._state.db = 'ferroclub'
+        self.assertFalse(router.allow_relation(socio_club, self.socios[0]))
+
+    def test_el_middleware_activa_el_club_del_host(self):
+        clubes = []
+        middleware = club_middleware(lambda request: clubes.append(club_actual()))
+        middleware(RequestFactory().get('/', HTTP_HOST='ferroclub.example.com'))
+        middleware(RequestFactory().get('/', HTTP_HOST='acft.example.com'))
+        self.assertEqual(clubes, ['ferroclub', None])
+        self.assertIsNone(club_actual())
+
+    def test_la_cache_separa_las_claves_de_cada_club(self):
+        cache.set('clave', 'principal')
+        with activar_club('ferroclub'):
+            self.assertIsNone(cache.get('clave'))
+            cache.set('clave', 'ferroclub')
+        self.assertEqual(cache.get('clave'), 'principal')
+
+    def test_migrar_clubes_rechaza_clubes_no_configurados(self):
+        with self.assertRaisesMessage(CommandError, 'otroclub'):
+            call_command('migrar_clubes', club=['otroclub'])
+
+
+class PerfiladoTests(PruebaSocios):
+    def setUp(self):
+        super().setUp()
+        self.directorio = self.directorio_temporal('PERFILES_DIR')
+        self.url = reverse('socios:listar')
+
+    def test_un_superusuario_pide_el_perfil_de_una_peticion(self):
+        respuesta = self.client.get(self.url, {'perfilar': 1})
+        self.assertEqual(respuesta.status_code, 200)
+        perfil = Perfil.objects.get()
+        self.assertEqual(respuesta['X-Perfil'], reverse('admin:socios_perfil_change', args=[perfil.pk]))
+        self.assertEqual((perfil.usuario, perfil.ruta, perfil.muestreado), (self.admin, f'{self.url}?perfilar=1', False))
+        self.assertEqual(perfil.cantidad_consultas, len(perfil.consultas))
+        self.assertTrue(any(consulta['origen'] for consulta in perfil.consultas))
+        self.assertTrue(ruta_archivo(perfil).is_file())
+
+        descarga = self.client.get(reverse('admin:socios_perfil_descargar', args=[perfil.pk]))
+        self.assertEqual(b''.join(descarga.streaming_content), ruta_archivo(perfil).read_bytes())
+
+    def test_la_cabecera_tambien_pide_el_perfil(self):
+        self.assertIn('X-Perfil', self.client.get(self.url, HTTP_X_PERFILAR='1'))
+
+    def test_sin_pedido_o_sin_superusuario_no_se_perfila(self):
+        self.client.get(self.url)
+        usuario = User.objects.create_user('staff', 'staff@example.com', 'clave', is_staff=True)
+        crear_socio(10, self.categoria, usuario=usuario, es_administrador=True)
+        self.client.force_login(usuario)
+        self.assertNotIn('X-Perfil', self.client.get(self.url, {'perfilar': 1}))
+        self.assertFalse(Perfil.objects.exists())
+
+    @override_settings(PERFILADO_MUESTREO=1)
+    def test_las_peticiones_muestreadas_no_exponen_el_perfil(self):
+        self.assertNotIn('X-Perfil', self.client.get(self.url))
+        self.assertTrue(Perfil.objects.get().muestreado)
+
+    def test_la_tasa_del_admin_reemplaza_a_la_de_settings(self):
+        # El rollback de la prueba no emite post_delete: la tasa en memoria
+        # no debe pasar a las pruebas siguientes
+        self.addCleanup(olvidar_tasa)
+        respuesta = self.client.get(reverse('admin:socios_perfil_changelist'))
+        self.assertContains(respuesta, "Muestreo en segundo plano desactivado")
+
+        respuesta = self.client.post(reverse('admin:socios_ajusteperfilado_add'), {'muestreo': '1'})
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertNotIn('X-Perfil', self.client.get(self.url))
+        self.assertTrue(Perfil.objects.get().muestreado)
+        respuesta = self.client.get(reverse('admin:socios_perfil_changelist'))
+        self.assertContains(respuesta, "Muestreo en segundo plano: 100 % de las peticiones")
+        # Hay una sola fila de ajuste
+        self.assertEqual(self.client.get(reverse('admin:socios_ajusteperfilado_add')).status_code, 403)
+
+        AjustePerfilado.objects.update(muestreo=0.5)
+        with mock.patch('socios.perfilado.AjustePerfilado.objects.first') as leer:
+            self.assertEqual(tasa_muestreo(), 1)
+            leer.assert_not_called()
+
+    def test_rotar_borra_los_perfiles_antiguos_y_sus_archivos(self):
+        for _ in range(3):
+            self.client.get(self.url, {'perfilar': 1})
+        antiguo, *recientes = Perfil.objects.order_by('pk')
+        self.assertEqual(rotar_perfiles(conservar=2), 1)
+        self.assertFalse(ruta_archivo(antiguo).exists())
+        self.assertEqual(sorted(self.directorio.iterdir()), sorted(ruta_archivo(perfil) for perfil in recientes))
+
+
+class PromocionesTests(PruebaSocios):
+    def setUp(self):
+        super().setUp()
+        self.fecha = datetime.date(2026, 6, 1)
+        self.juvenil = Categoria.objects.create(nombre='Juvenil')
+        ReglaPromocion.objects.create(origen=self.otra_categoria, destino=self.juvenil, edad_minima=14, orden=1)
+        ReglaPromocion.objects.create(origen=self.juvenil, destino=self.categoria, edad_minima=18, orden=2)
+        self.mayor = crear_socio(10, self.otra_categoria, fecha_nacimiento=datetime.date(2000, 3, 1))
+        self.cadete = crear_socio(11, self.otra_categoria, fecha_nacimiento=datetime.date(2012, 6, 1))
+        self.menor = crear_socio(12, self.otra_categoria, fecha_nacimiento=datetime.date(2012, 6, 2))
+
+    def categorias(self):
+        return [Socio.objects.get(pk=socio.pk).categoria for socio in (self.mayor, self.cadete, self.menor)]
+
+    def test_sin_aplicar_informa_sin_modificar(self):
+        resultado = promover_socios(self.fecha)
+        self.assertEqual([movidos for _, movidos in resultado], [[self.mayor.pk, self.cadete.pk], [self.mayor.pk]])
+        self.assertEqual(self.categorias(), [self.otra_categoria] * 3)
+        self.assertFalse(Promocion.objects.exists())
+
+    def test_aplicar_encadena_las_reglas_y_registra_cada_una(self):
+        promover_socios(self.fecha, aplicar=True, tamano_lote=1, usuario=self.admin)
+        self.assertEqual(self.categorias(), [self.categoria, self.juvenil, self.otra_categoria])
+        self.assertEqual(
+            list(Promocion.objects.order_by('pk').values_list('origen', 'destino', 'condiciones', 'cantidad', 'socios')),
+            [
+                ('Cadete', 'Juvenil', 'edad ≥ 14', 2, [self.mayor.pk, self.cadete.pk]),
+                ('Juvenil', 'Activo', 'edad ≥ 18', 1, [self.mayor.pk]),
+            ],
+        )
+        # Una segunda ejecución no encuentra nada más que promover
+        promover_socios(self.fecha, aplicar=True)
+        self.assertEqual(Promocion.objects.count(), 2)
+
+    def test_antiguedad_minima(self):
+        ReglaPromocion.objects.create(origen=self.categoria, destino=self.otra_categoria, antiguedad_minima=5, orden=3)
+        Socio.objects.filter(pk=self.socios[0].pk).update(fecha_alta=datetime.date(2021, 6, 1))
+        resultado = promover_socios(self.fecha)
+        self.assertEqual(resultado[2][1], [self.socios[0].pk])
+
+    def test_restar_anios_en_29_de_febrero(self):
+        self.assertEqual(restar_anios(datetime.date(2028, 2, 29), 1), datetime.date(2027, 2, 28))
+        self.assertEqual(restar_anios(datetime.date(2028, 2, 29), 4), datetime.date(2024, 2, 29))
+
+    def test_una_regla_necesita_condiciones_y_categorias_distintas(self):
+        with self.assertRaises(ValidationError):
+            ReglaPromocion(origen=self.categoria, destino=self.juvenil).full_clean()
+        with self.assertRaises(ValidationError):
+            ReglaPromocion(origen=self.categoria, destino=self.categoria, edad_minima=18).full_clean()
+
+
+class AccionesMasivasTests(PruebaSocios):
+    def test_cambiar_categoria_con_un_solo_update(self):
+        datos = {'accion': 'cambiar_categoria', 'categoria': self.otra_categoria.pk, 'socios': [socio.pk for socio in self.socios[:2]]}
+        with CaptureQueriesContext(connections['default']) as consultas:
+            respuesta = self.client.post(reverse('socios:acciones_socios'), datos, follow=True)
+        self.assertRedirects(respuesta, reverse('socios:listar'))
+        self.assertContains(respuesta, "2 socios pasaron a la categoría Cadete")
+        actualizaciones = [consulta['sql'] for consulta in consultas if consulta['sql'].startswith('UPDATE "socios_socio"')]
+        self.assertEqual(len(actualizaciones), 1)
+        self.assertEqual(
+            list(Socio.objects.order_by('pk').values_list('categoria', flat=True)),
+            [self.otra_categoria.pk, self.otra_categoria.pk, self.categoria.pk],
+        )
+
+    def test_solo_se_cuentan_los_socios_que_cambian(self):
+        self.assertEqual(cambiar_categoria(Socio.objects.all(), self.categoria), 0)
+        self.assertEqual(cambiar_administrador(Socio.objects.filter(pk=self.socios[0].pk), True), 1)
+        self.assertEqual(cambiar_administrador(Socio.objects.all(), True), 2)
+
+    def test_cambiar_categoria_sin_categoria_no_modifica_nada(self):
+        datos = {'accion': 'cambiar_categoria', 'socios': [self.socios[0].pk]}
+        respuesta = self.client.post(reverse('socios:acciones_socios'), datos, follow=True)
+        self.assertContains(respuesta, "Indique la nueva categoría.")
+        self.assertEqual(Socio.objects.filter(categoria=self.categoria).count(), 3)
+
+    def test_aumentar_montos_redondea_a_centavos(self):
+        otro = Concepto.objects.create(nombre='Buffet', monto_sugerido=Decimal('999.99'))
+        datos = {'accion': 'aumentar_montos', 'porcentaje': '15', 'conceptos': [self.concepto.pk, otro.pk]}
+        respuesta = self.client.post(reverse('socios:acciones_conceptos'), datos, follow=True)
+        self.assertContains(respuesta, "Monto sugerido aumentado un 15% en 2 conceptos.")
+        self.assertEqual(
+            list(Concepto.objects.order_by('pk').values_list('monto_sugerido', flat=True)),
+            [Decimal('1150.00'), Decimal('1149.99')],
+        )
+
+    def test_desactivar_conceptos(self):
+        self.assertEqual(desactivar_conceptos(Concepto.objects.all()), 1)
+        self.assertEqual(desactivar_conceptos(Concepto.objects.all()), 0)
+        self.assertFalse(Concepto.objects.get().activo)
+
+
+class CuentaSocioTests(PruebaSocios):
+    def setUp(self):
+        super().setUp()
+        self.socio = self.socios[0]
+        self.hoy = timezone.localdate()
+        self.anio, self.anterior, self.archivado = self.hoy.year, self.hoy.year - 1, self.hoy.year - 2
+        self.cargo(datetime.date(self.archivado, 2, 1), 1500)
+        Pago.objects.create(
+            socio=self.socio, concepto=self.concepto, monto=1000,
+            fecha_pago=datetime.date(self.archivado, 2, 1), mes_correspondiente=f'Febrero {self.archivado}',
+        )
+        self.cargo(datetime.date(self.anterior, 1, 10), 1000)
+        Pago.objects.create(
+            socio=self.socio, concepto=self.concepto, monto=1200,
+            fecha_pago=datetime.date(self.anterior, 1, 15), mes_correspondiente=f'Enero {self.anterior}',
+        )
+        # El mismo día que el pago de los datos de prueba: el cargo va primero
+        self.cargo(self.hoy, 1000)
+        archivar_pagos(self.archivado)
+
+    def cargo(self, fecha, monto):
+        Cargo.objects.create(socio=self.socio, concepto=self.concepto, monto=monto, fecha=fecha, periodo=periodo_mes(fecha))
+
+    def test_resumen_anual_incluye_los_pagos_archivados(self):
+        self.assertEqual(resumen_anual(self.socio), [
+            {'anio': self.archivado, 'debe': Decimal('1500.00'), 'haber': Decimal('1000.00'), 'saldo': Decimal('-500.00')},
+            {'anio': self.anterior, 'debe': Decimal('1000.00'), 'haber': Decimal('1200.00'), 'saldo': Decimal('-300.00')},
+            {'anio': self.anio, 'debe': Decimal('1000.00'), 'haber': Decimal('1000.00'), 'saldo': Decimal('-300.00')},
+        ])
+
+    def test_movimientos_de_un_anio_parten_del_saldo_anterior(self):
+        resultado = movimientos_anio(self.socio, self.anterior, Decimal('-500.00'))
+        self.assertEqual([(m['tipo'], m['saldo']) for m in resultado], [('cargo', Decimal('-1500.00')), ('pago', Decimal('-300.00'))])
+        resultado = movimientos_anio(self.socio, self.anio, Decimal('-300.00'))
+        self.assertEqual([(m['tipo'], m['saldo']) for m in resultado], [('cargo', Decimal('-1300.00')), ('pago', Decimal('-300.00'))])
+
+    def test_movimientos_con_subtotales_por_anio(self):
+        resultado = movimientos(self.socio)
+        self.assertEqual([m['saldo'] for m in resultado], [Decimal(valor) for valor in ('-1500', '-500', '-1500', '-300', '-1300', '-300')])
+        self.assertEqual({(m['anio'], m['debe_anio'], m['haber_anio']) for m in resultado}, {
+            (self.archivado, Decimal('1500.00'), Decimal('1000.00')),
+            (self.anterior, Decimal('1000.00'), Decimal('1200.00')),
+            (self.anio, Decimal('1000.00'), Decimal('1000.00')),
+        })
+
+    def test_la_vista_pagina_por_anio(self):
+        url = reverse('socios:cuenta_socio', args=[self.socio.pk])
+        respuesta = self.client.get(url, {'anio': self.anterior})
+        self.assertEqual(respuesta.context['saldo_inicial'], Decimal('-500.00'))
+        self.assertEqual((respuesta.context['anio_anterior'], respuesta.context['anio_siguiente']), (self.archivado, self.anio))
+        self.assertEqual(len(respuesta.context['movimientos']), 2)
+        self.assertEqual(self.client.get(url).context['anio'], self.anio)
+        self.assertEqual(self.client.get(url, {'anio': 1990}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'anio': 'x'}).status_code, 404)
+
+    def test_exportar_csv(self):
+        respuesta = self.client.get(reverse('socios:cuenta_socio', args=[self.socio.pk]), {'formato': 'csv'})
+        self.assertEqual(respuesta['Content-Disposition'], f'attachment; filename="cuenta_{self.socio.dni}.csv"')
+        filas = list(csv.reader(respuesta.content.decode().splitlines()))
+        self.assertEqual(len(filas), 7)
+        self.assertEqual(filas[-1][4:7], ['0.00', '1000.00', '-300.00'])
+
+
+# Las entradas se acumulan al confirmarse cada transacción: las pruebas
+# confirman sus cambios para ver el registro tal como queda en producción
+@override_settings(CACHES=CACHE_PRUEBAS)
+class AuditoriaTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        crear_datos(self)
+        # Sin las altas de los datos de prueba
+        RegistroCambio.objects.all().delete()
+        self.client.force_login(self.admin)
+
+    def test_una_modificacion_guarda_solo_los_campos_cambiados(self):
+        socio = self.socios[0]
+        with agrupar_cambios(self.admin):
+            socio.email = 'nuevo@example.com'
+            socio.save()
+            socio.save()
+        entrada = historial(socio).get()
+        self.assertEqual((entrada.accion, entrada.usuario, entrada.nombre_usuario), ('modificacion', self.admin, 'admin'))
+        self.assertEqual((entrada.antes, entrada.despues), ({'email': 'socio0@example.com'}, {'email': 'nuevo@example.com'}))
+
+    def test_alta_y_baja(self):
+        socio = crear_socio(10, self.categoria)
+        socio_id = socio.pk
+        socio.delete()
+        alta, baja = RegistroCambio.objects.filter(modelo='Socio', objeto_id=socio_id).order_by('pk')
+        self.assertEqual((alta.accion, alta.antes, alta.despues['dni']), ('alta', None, '30000010'))
+        self.assertEqual((baja.accion, baja.antes['dni'], baja.despues), ('baja', '30000010', None))
+
+    def test_un_cambio_revertido_no_se_registra(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            crear_socio(10, self.categoria)
+            raise RuntimeError
+        self.assertFalse(RegistroCambio.objects.exists())
+
+    def test_una_peticion_guarda_sus_entradas_en_un_solo_insert(self):
+        datos = {'accion': 'cambiar_categoria', 'categoria': self.otra_categoria.pk, 'socios': [socio.pk for socio in self.socios]}
+        with CaptureQueriesContext(connections['default']) as consultas:
+            self.client.post(reverse('socios:acciones_socios'), datos)
+        inserciones = [consulta for consulta in consultas if consulta['sql'].startswith('INSERT INTO "socios_registrocambio"')]
+        self.assertEqual(len(inserciones), 1)
+        entradas = RegistroCambio.objects.filter(modelo='Socio')
+        self.assertEqual(sorted(entradas.values_list('objeto_id', flat=True)), [socio.pk for socio in self.socios])
+        self.assertTrue(all(
+            (entrada.nombre_usuario, entrada.antes, entrada.despues) == ('admin', {'categoria_id': self.categoria.pk}, {'categoria_id': self.otra_categoria.pk})
+            for entrada in entradas
+        ))
+
+    def test_archivar_y_restaurar_no_son_bajas(self):
+        anterior = timezone.localdate().year - 2
+        pago = Pago.objects.create(
+            socio=self.socios[0], concepto=self.concepto, monto=1000,
+            fecha_pago=datetime.date(anterior, 3, 1), mes_correspondiente=f'Marzo {anterior}',
+        )
+        archivar_pagos(anterior)
+        restaurar_pagos(anterior)
+        self.assertEqual(list(historial(pago).order_by('pk').values_list('accion', flat=True)), ['alta', 'archivo', 'restauracion'])
+
+    def test_las_entradas_no_se_modifican_ni_eliminan(self):
+        crear_socio(10, self.categoria)
+        entrada = RegistroCambio.objects.get()
+        entrada.accion = 'baja'
+        with self.assertRaises(ValueError):
+            entrada.save()
+        with self.assertRaises(ValueError):
+            entrada.delete()
+
+    def test_podar_exporta_los_meses_antiguos(self):
+        directorio = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(self.settings(AUDITORIA_DIR=directorio))
+        crear_socio(10, self.categoria)
+        antigua = timezone.make_aware(datetime.datetime(2024, 3, 5, 12))
+        RegistroCambio.objects.bulk_create([
+            RegistroCambio(fecha=antigua, modelo='Socio', objeto_id=numero, accion='alta') for numero in range(3)
+        ])
+        self.assertEqual(podar_registro(meses=6, tamano_lote=2), {'2024-03': 3})
+        self.assertEqual(RegistroCambio.objects.count(), 1)
+        with gzip.open(directorio / 'cambios-2024-03.jsonl.gz', 'rt', encoding='utf-8') as archivo:
+            self.assertEqual([json.loads(linea)['objeto_id'] for linea in archivo], [0, 1, 2])
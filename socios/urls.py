@@ -1,13 +1,14 @@
 from django.urls import path
 from .views import (
-    SocioListView, SocioCreateView, SocioUpdateView, SocioDeleteView, SocioDetailView,
+    SocioListView, SocioCreateView, SocioUpdateView, SocioDeleteView, SocioDetailView, SocioAccionMasivaView, CuentaSocioView,
     CategoriaListView, CategoriaCreateView, CategoriaUpdateView, CategoriaDeleteView,
-    PagoCreateView, PagoUpdateView, PagoDeleteView, PagoListView,
-    ConceptoListView, ConceptoCreateView, ConceptoUpdateView, ConceptoDeleteView,
-    get_concepto_monto,
+    PagoCreateView, PagoUpdateView, PagoDeleteView, PagoListView, PagoComprobanteView,
+    ConceptoListView, ConceptoCreateView, ConceptoUpdateView, ConceptoDeleteView, ConceptoAccionMasivaView,
+    get_concepto_monto, TareaListView, EnviarRecordatoriosView, BusquedaView, PanelView,
     # Vistas de autenticación
-    SocioLoginView, SocioLogoutView, RegistroView, MiPerfilView
+    SocioLoginView, SocioLogoutView, RegistroView, MiPerfilView, SaludView
 )
+from .api import SocioApiView, PagoApiView, ConceptoApiView, CategoriaApiView
 
 app_name = 'socios'
 
@@ -16,8 +17,10 @@ urlpatterns = [
     path('', SocioListView.as_view(), name='listar'),
     path('nuevo/', SocioCreateView.as_view(), name='crear'),
     path('<int:pk>/', SocioDetailView.as_view(), name='detalle_socio'),
+    path('<int:pk>/cuenta/', CuentaSocioView.as_view(), name='cuenta_socio'),
     path('editar/<int:pk>/', SocioUpdateView.as_view(), name='editar'),
     path('eliminar/<int:pk>/', SocioDeleteView.as_view(), name='eliminar'),
+    path('acciones/', SocioAccionMasivaView.as_view(), name='acciones_socios'),
     
     # URLs para categorias
     path('categorias/', CategoriaListView.as_view(), name='listar_categorias'),
@@ -31,6 +34,7 @@ urlpatterns = [
     path('pagos/nuevo/', PagoCreateView.as_view(), name='crear_pago_general'),
     path('pagos/editar/<int:pk>/', PagoUpdateView.as_view(), name='editar_pago'),
     path('pagos/eliminar/<int:pk>/', PagoDeleteView.as_view(), name='eliminar_pago'),
+    path('pagos/<int:pk>/comprobante/', PagoComprobanteView.as_view(), name='comprobante_pago'),
     path('pagos/concepto-monto/', get_concepto_monto, name='get_concepto_monto'),
     
     # URLs para conceptos
@@ -38,10 +42,30 @@ urlpatterns = [
     path('conceptos/nuevo/', ConceptoCreateView.as_view(), name='crear_concepto'),
     path('conceptos/editar/<int:pk>/', ConceptoUpdateView.as_view(), name='editar_concepto'),
     path('conceptos/eliminar/<int:pk>/', ConceptoDeleteView.as_view(), name='eliminar_concepto'),
+    path('conceptos/acciones/', ConceptoAccionMasivaView.as_view(), name='acciones_conceptos'),
+    
+    # Panel de administración
+    path('panel/', PanelView.as_view(), name='panel'),
+    
+    # Búsqueda global
+    path('buscar/', BusquedaView.as_view(), name='buscar'),
+    
+    # Estado del servicio (healthcheck del contenedor)
+    path('salud/', SaludView.as_view(), name='salud'),
+    
+    # URLs para tareas en segundo plano
+    path('tareas/', TareaListView.as_view(), name='listar_tareas'),
+    path('recordatorios/enviar/', EnviarRecordatoriosView.as_view(), name='enviar_recordatorios'),
     
     # URLs para autenticación
     path('login/', SocioLoginView.as_view(), name='login'),
     path('logout/', SocioLogoutView.as_view(), name='logout'),
     path('registro/', RegistroView.as_view(), name='registro'),
     path('mi-perfil/', MiPerfilView.as_view(), name='mi_perfil'),
+    
+    # API de solo lectura (v1)
+    path('api/v1/socios/', SocioApiView.as_view(), name='api_socios'),
+    path('api/v1/pagos/', PagoApiView.as_view(), name='api_pagos'),
+    path('api/v1/conceptos/', ConceptoApiView.as_view(), name='api_conceptos'),
+    path('api/v1/categorias/', CategoriaApiView.as_view(), name='api_categorias'),
 ]
@@ -0,0 +1,76 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import router, transaction
+from django.middleware.csrf import get_token
+from django.utils import timezone
+
+from .models import Pago
+
+# Modelos cuya modificación invalida las páginas que dependen de ellos
+MODELOS_VERSIONADOS = ('Socio', 'Pago', 'Concepto', 'Categoria', 'Cargo')
+
+PREFIJO_CLAVE = 'socios:version:'
+
+
+def _clave(nombre_modelo):
+    return f"{PREFIJO_CLAVE}{nombre_modelo.lower()}"
+
+
+def incrementar_version(*nombres_modelos, using=None):
+    """Marca los modelos indicados como modificados al confirmarse la transacción.
+
+    Una versión nueva antes del commit dejaría que una lectura intermedia
+    guarde los datos anteriores bajo el ETag nuevo, y que la réplica parezca
+    incluir un cambio que todavía no existía al copiarla. Fuera de una
+    transacción se marca en el momento.
+    """
+    def marcar():
+        ahora = time.time_ns()
+        cache.set_many({_clave(nombre): ahora for nombre in nombres_modelos}, timeout=None)
+
+    transaction.on_commit(marcar, using=using or router.db_for_write(Pago))
+
+
+def obtener_versiones(*nombres_modelos):
+    """Retorna la versión (marca de tiempo en ns) de cada modelo.
+
+    Si la versión no está en caché se inicializa con el momento actual, de
+    modo que una caché vacía nunca produce una respuesta 304 desactualizada.
+    """
+    claves = [_clave(nombre) for nombre in nombres_modelos]
+    versiones = cache.get_many(claves)
+    faltantes = [clave for clave in claves if clave not in versiones]
+    if faltantes:
+        ahora = time.time_ns()
+        for clave in faltantes:
+            cache.add(clave, ahora, timeout=None)
+        versiones.update(cache.get_many(faltantes))
+    return [versiones.get(clave, 0) for clave in claves]
+
+
+def rol_usuario(user):
+    """Retorna el rol del usuario tal como lo evalúan los permisos de las vistas"""
+    if user.is_superuser:
+        return 'superusuario'
+    if hasattr(user, 'socio') and user.socio.es_administrador:
+        return 'administrador'
+    return 'socio'
+
+
+def calcular_etag(request, nombres_modelos, *extras):
+    """ETag a partir de las versiones de los modelos, el usuario, su rol y su sesión"""
+    partes = [str(v) for v in obtener_versiones(*nombres_modelos)]
+    partes += [str(request.user.pk), rol_usuario(request.user)]
+    # Las páginas llevan el token CSRF de la sesión: al iniciar sesión de
+    # nuevo cambian la clave de sesión y el secreto CSRF, y una copia
+    # anterior haría fallar con 403 todos sus formularios. get_token() crea
+    # el secreto si la petición todavía no lo trae, como lo haría la plantilla
+    get_token(request)
+    partes += [request.session.session_key or '', request.META['CSRF_COOKIE']]
+    # El estado de pagos depende de la fecha actual
+    partes.append(timezone.localdate().isoformat())
+    partes += [str(extra) for extra in extras]
+    return hashlib.sha1('|'.join(partes).encode()).hexdigest()
+
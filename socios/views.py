@@ -1,13 +1,33 @@
+import csv
+from decimal import Decimal
+
 from django.urls import reverse_lazy, reverse
+from django.views import View
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView, FormView, TemplateView
 from django.contrib import messages
 from django.shortcuts import redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, FileResponse, Http404
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth import login
-from .models import Socio, Categoria, Pago, Concepto
-from .forms import SocioForm, CategoriaForm, PagoForm, ConceptoForm
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, IntegrityError, connections, router, transaction
+from django.db.models import Sum
+from .models import Socio, Categoria, Pago, Concepto, Tarea, PagoArchivado
+from .acciones import cambiar_categoria, cambiar_administrador, aumentar_montos, desactivar_conceptos
+from .archivo import PagosConArchivo, requiere_archivo
+from .busqueda import buscar
+from .comprobantes import datos_comprobante, hash_comprobante, obtener_comprobante
+from .cuenta import movimientos, movimientos_anio, resumen_anual
+from .recordatorios import periodo_actual
+from .replicas import en_replica
+from .resumen import obtener_historial
+from .tareas import encolar
+from .versiones import calcular_etag
+from .forms import SocioForm, CategoriaForm, PagoForm, ConceptoForm, AccionSociosForm, AccionConceptosForm
 from .auth_forms import RegistroUsuarioForm, LoginForm
 
 # Clase base para verificar si un usuario es administrador
@@ -25,8 +45,73 @@ class EsAdministradorMixin(UserPassesTestMixin):
             return redirect('socios:mi_perfil')
         return redirect('socios:login')
 
+# Clase base para responder 304 cuando los modelos mostrados no cambiaron.
+# Debe ir después de los mixins de permisos para que estos se evalúen primero.
+class VersionCondicionalMixin:
+    modelos_versionados = ('Socio', 'Pago', 'Concepto', 'Categoria')
+    
+    def _hay_mensajes_pendientes(self):
+        # Una página con mensajes pendientes debe renderizarse para mostrarlos
+        return len(messages.get_messages(self.request)) > 0
+    
+    def get_etag(self, request, *args, **kwargs):
+        if self._hay_mensajes_pendientes():
+            return None
+        return calcular_etag(request, self.modelos_versionados)
+    
+    def dispatch(self, request, *args, **kwargs):
+        # Sin Last-Modified: la página también depende del usuario, la sesión
+        # y la fecha, y If-Modified-Since solo compara las versiones
+        vista = condition(etag_func=self.get_etag)(super().dispatch)
+        response = vista(request, *args, **kwargs)
+        # Obligar al navegador a revalidar siempre, sin compartir con proxies
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+# Vistas de solo lectura que pueden consultar la réplica (socios.replicas)
+class LecturaReplicaMixin:
+    # Modelos cuya última modificación debe estar en la réplica para usarla;
+    # vacío acepta el atraso máximo configurado
+    modelos_replica = ()
+    
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with en_replica(*self.modelos_replica):
+            response = super().dispatch(request, *args, **kwargs)
+            # La plantilla se renderiza después de dispatch: las consultas
+            # perezosas deben ejecutarse dentro del bloque
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+# Panel con los indicadores precalculados del club
+class PanelView(LoginRequiredMixin, EsAdministradorMixin, TemplateView):
+    template_name = 'socios/panel.html'
+    login_url = 'socios:login'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        historial = obtener_historial()
+        resumen = historial[0]
+        context['resumen'] = resumen
+        context['datos'] = resumen.datos
+        
+        # Tendencia de recaudación del mes, del día más antiguo al más reciente
+        maximo = max((float(r.datos['recaudacion_mes']) for r in historial), default=0) or 1
+        context['tendencia'] = [
+            {
+                'fecha': r.fecha,
+                'recaudacion': r.datos['recaudacion_mes'],
+                'total_socios': r.datos['total_socios'],
+                'porcentaje': round(float(r.datos['recaudacion_mes']) * 100 / maximo),
+            }
+            for r in reversed(historial)
+        ]
+        return context
+
 # Vistas para Socios
-class SocioListView(LoginRequiredMixin, EsAdministradorMixin, ListView):
+class SocioListView(LoginRequiredMixin, EsAdministradorMixin, VersionCondicionalMixin, ListView):
     model = Socio
     template_name = 'socios/socio_list.html'
     context_object_name = 'socios'
@@ -37,8 +122,33 @@ class SocioListView(LoginRequiredMixin, EsAdministradorMixin, ListView):
         # Calcular estado de pagos para cada socio
         for socio in context['socios']:
             socio.estado = socio.get_estado_pagos()
+        context['accion_form'] = AccionSociosForm()
         return context
 
+# Acciones masivas sobre los socios marcados en la lista
+class SocioAccionMasivaView(LoginRequiredMixin, EsAdministradorMixin, FormView):
+    form_class = AccionSociosForm
+    http_method_names = ['post']
+    login_url = 'socios:login'
+    
+    def form_valid(self, form):
+        socios = form.cleaned_data['socios']
+        accion = form.cleaned_data['accion']
+        if accion == 'cambiar_categoria':
+            categoria = form.cleaned_data['categoria']
+            cantidad = cambiar_categoria(socios, categoria)
+            messages.success(self.request, f"{cantidad} socios pasaron a la categoría {categoria}.")
+        else:
+            cantidad = cambiar_administrador(socios, accion == 'hacer_administrador')
+            messages.success(self.request, f"Permiso de administrador actualizado en {cantidad} socios.")
+        return redirect('socios:listar')
+    
+    def form_invalid(self, form):
+        for errores in form.errors.values():
+            for error in errores:
+                messages.error(self.request, error)
+        return redirect('socios:listar')
+
 class SocioCreateView(LoginRequiredMixin, EsAdministradorMixin, CreateView):
     model = Socio
     form_class = SocioForm
@@ -140,6 +250,37 @@ class PagoCreateView(LoginRequiredMixin, EsAdministradorMixin, CreateView):
             context['socio'] = get_object_or_404(Socio, pk=socio_id)
         return context
     
+    def _pago_ya_registrado(self, clave):
+        try:
+            return Pago.objects.filter(clave_idempotencia=clave).first() if clave else None
+        except ValidationError:
+            return None
+    
+    def _responder_pago_existente(self, pago):
+        messages.info(self.request, "Este pago ya había sido registrado; no se creó un duplicado.")
+        return redirect('socios:detalle_socio', pk=pago.socio_id)
+    
+    def post(self, request, *args, **kwargs):
+        # Un reenvío del mismo formulario devuelve el resultado original
+        # antes de validar, sin volver a escribir
+        pago = self._pago_ya_registrado(request.POST.get('clave_idempotencia'))
+        if pago:
+            return self._responder_pago_existente(pago)
+        return super().post(request, *args, **kwargs)
+    
+    def form_valid(self, form):
+        clave = form.cleaned_data.get('clave_idempotencia')
+        form.instance.clave_idempotencia = clave
+        try:
+            with transaction.atomic(using=router.db_for_write(Pago)):
+                return super().form_valid(form)
+        except IntegrityError:
+            # Dos envíos simultáneos: el segundo choca con la clave única
+            pago = self._pago_ya_registrado(clave)
+            if pago:
+                return self._responder_pago_existente(pago)
+            raise
+    
     def get_success_url(self):
         messages.success(self.request, "Pago registrado exitosamente.")
         socio_id = self.kwargs.get('socio_id') or self.object.socio.id
@@ -164,68 +305,213 @@ class PagoDeleteView(LoginRequiredMixin, EsAdministradorMixin, DeleteView):
         messages.success(self.request, "Pago eliminado exitosamente.")
         return reverse('socios:detalle_socio', kwargs={'pk': self.object.socio.id})
 
-class SocioDetailView(LoginRequiredMixin, DetailView):
-    model = Socio
-    template_name = 'socios/socio_detail.html'
+class PagoComprobanteView(LoginRequiredMixin, DetailView):
+    model = Pago
     login_url = 'socios:login'
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['pagos'] = self.object.pagos.all().order_by('-fecha_pago')
-        context['estado_pagos'] = self.object.get_estado_pagos()
-        context['es_admin'] = self.request.user.is_superuser or (hasattr(self.request.user, 'socio') and self.request.user.socio.es_administrador)
-        return context
+    def get_queryset(self):
+        return super().get_queryset().select_related('socio', 'concepto')
+    
+    def get_object(self, queryset=None):
+        # Los pagos archivados conservan su id: el mismo enlace sigue sirviendo
+        pago = self.get_queryset().filter(pk=self.kwargs['pk']).first()
+        if pago is None:
+            pago = get_object_or_404(PagoArchivado.objects.select_related('socio', 'concepto'), pk=self.kwargs['pk'])
+        return pago
+    
+    def get(self, request, *args, **kwargs):
+        pago = self.get_object()
+        # Solo el propio socio o un administrador pueden descargar el comprobante
+        es_admin = request.user.is_superuser or (hasattr(request.user, 'socio') and request.user.socio.es_administrador)
+        if not es_admin and not (hasattr(request.user, 'socio') and request.user.socio.id == pago.socio_id):
+            messages.error(request, "No tienes permiso para descargar este comprobante.")
+            return redirect('socios:mi_perfil')
+        
+        # El hash del contenido es el ETag: si el navegador ya tiene este
+        # comprobante se responde 304 sin generar ni leer el PDF
+        hash_contenido = hash_comprobante(datos_comprobante(pago))
+        descargar = condition(etag_func=lambda request, *args, **kwargs: hash_contenido)(self.descargar)
+        response = descargar(request, pago)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
     
+    def descargar(self, request, pago):
+        ruta, _ = obtener_comprobante(pago)
+        return FileResponse(open(ruta, 'rb'), content_type='application/pdf',
+                            filename=f"comprobante_{pago.pk:06d}.pdf")
+
+# Clase base para las vistas de un socio que solo pueden ver el propio socio
+# o un administrador. Se compara la clave primaria de la URL para no consultar
+# el socio antes de saber si la respuesta puede ser un 304.
+class AccesoSocioMixin:
     def dispatch(self, request, *args, **kwargs):
-        # Solo permitir ver el detalle si es el propio socio o un administrador
-        socio = self.get_object()
-        if (hasattr(request.user, 'socio') and request.user.socio.id == socio.id) or \
+        if (hasattr(request.user, 'socio') and request.user.socio.id == self.kwargs['pk']) or \
            request.user.is_superuser or \
            (hasattr(request.user, 'socio') and request.user.socio.es_administrador):
             return super().dispatch(request, *args, **kwargs)
         else:
             messages.error(request, "No tienes permiso para ver el detalle de este socio.")
             return redirect('socios:mi_perfil')
+
+class SocioDetailView(LoginRequiredMixin, AccesoSocioMixin, VersionCondicionalMixin, DetailView):
+    model = Socio
+    template_name = 'socios/socio_detail.html'
+    login_url = 'socios:login'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.request.GET.get('archivo'):
+            # Historial completo, incluyendo los ejercicios archivados
+            context['pagos'] = list(PagosConArchivo(self.object.pagos.all(), self.object.pagos_archivados.all()))
+            context['con_archivo'] = True
+        else:
+            context['pagos'] = self.object.pagos.all().order_by('-fecha_pago')
+            context['tiene_archivo'] = self.object.pagos_archivados.exists()
+        context['estado_pagos'] = self.object.get_estado_pagos()
+        context['es_admin'] = self.request.user.is_superuser or (hasattr(self.request.user, 'socio') and self.request.user.socio.es_administrador)
+        return context
+
+# Estado de cuenta del socio, paginado por año y descargable en CSV
+class CuentaSocioView(LoginRequiredMixin, AccesoSocioMixin, VersionCondicionalMixin, LecturaReplicaMixin, DetailView):
+    model = Socio
+    template_name = 'socios/cuenta_socio.html'
+    login_url = 'socios:login'
+    modelos_versionados = ('Socio', 'Pago', 'Cargo')
+    modelos_replica = ('Pago', 'Cargo')
+    
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('formato') == 'csv':
+            self.object = self.get_object()
+            return self.exportar_csv()
+        return super().get(request, *args, **kwargs)
+    
+    def exportar_csv(self):
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="cuenta_{self.object.dni}.csv"'
+        writer = csv.writer(response)
+        writer.writerow(['Fecha', 'Tipo', 'Concepto', 'Período', 'Cargo', 'Pago', 'Saldo', 'Cargos del año', 'Pagos del año'])
+        for m in movimientos(self.object):
+            writer.writerow([m['fecha'].isoformat(), m['tipo'], m['concepto'], m['periodo'], m['debe'], m['haber'], m['saldo'], m['debe_anio'], m['haber_anio']])
+        return response
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        resumen = resumen_anual(self.object)
+        anios = [fila['anio'] for fila in resumen]
+        try:
+            anio = int(self.request.GET.get('anio') or (anios[-1] if anios else timezone.localdate().year))
+        except ValueError:
+            raise Http404("Año inválido")
+        if anios and anio not in anios:
+            raise Http404("No hay movimientos en ese año")
+        
+        posicion = anios.index(anio) if anios else 0
+        saldo_inicial = resumen[posicion - 1]['saldo'] if posicion > 0 else Decimal('0.00')
+        context['resumen'] = resumen
+        context['anio'] = anio
+        context['totales_anio'] = resumen[posicion] if resumen else None
+        context['saldo_inicial'] = saldo_inicial
+        context['movimientos'] = movimientos_anio(self.object, anio, saldo_inicial)
+        context['anio_anterior'] = anios[posicion - 1] if posicion > 0 else None
+        context['anio_siguiente'] = anios[posicion + 1] if posicion + 1 < len(anios) else None
+        return context
+
         
-class PagoListView(LoginRequiredMixin, EsAdministradorMixin, ListView):
+def filtrar_pagos(queryset, params):
+    """Aplica los filtros de la lista de pagos (socio, fecha_desde, fecha_hasta)"""
+    socio_id = params.get('socio')
+    fecha_desde = params.get('fecha_desde')
+    fecha_hasta = params.get('fecha_hasta')
+    
+    if socio_id:
+        queryset = queryset.filter(socio_id=socio_id)
+    if fecha_desde:
+        queryset = queryset.filter(fecha_pago__gte=fecha_desde)
+    if fecha_hasta:
+        queryset = queryset.filter(fecha_pago__lte=fecha_hasta)
+    
+    return queryset
+
+class PagoListView(LoginRequiredMixin, EsAdministradorMixin, VersionCondicionalMixin, LecturaReplicaMixin, ListView):
     model = Pago
+    # El listado es interactivo: solo usa la réplica si ya tiene los últimos cambios
+    modelos_replica = ('Socio', 'Pago', 'Concepto')
     template_name = 'socios/pago_list.html'
     context_object_name = 'pagos'
     paginate_by = 10
     login_url = 'socios:login'
     
+    def incluye_archivo(self):
+        # El archivo solo se consulta si el período filtrado llega a un
+        # ejercicio ya archivado
+        return requiere_archivo(self.request.GET.get('fecha_desde'))
+    
     def get_queryset(self):
         queryset = super().get_queryset().select_related('socio')
-        socio_id = self.request.GET.get('socio')
-        fecha_desde = self.request.GET.get('fecha_desde')
-        fecha_hasta = self.request.GET.get('fecha_hasta')
-        
-        if socio_id:
-            queryset = queryset.filter(socio_id=socio_id)
-        if fecha_desde:
-            queryset = queryset.filter(fecha_pago__gte=fecha_desde)
-        if fecha_hasta:
-            queryset = queryset.filter(fecha_pago__lte=fecha_hasta)
-        
-        return queryset.order_by('-fecha_pago')
+        queryset = filtrar_pagos(queryset, self.request.GET).order_by('-fecha_pago')
+        if self.incluye_archivo():
+            return PagosConArchivo(queryset, filtrar_pagos(PagoArchivado.objects.all(), self.request.GET))
+        return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['socios'] = Socio.objects.all().order_by('apellido', 'nombre')
         
-        # Calcular el total de los pagos filtrados
-        pagos = self.get_queryset()
-        total = sum(pago.monto for pago in pagos)
-        context['total_pagos'] = total
+        # Calcular el total de los pagos filtrados en la base de datos
+        pagos = self.object_list
+        if isinstance(pagos, PagosConArchivo):
+            context['total_pagos'] = pagos.total()
+        else:
+            context['total_pagos'] = pagos.aggregate(total=Sum('monto'))['total'] or 0
         
         return context
         
+# Búsqueda global de socios y comprobantes de pago
+class BusquedaView(LoginRequiredMixin, EsAdministradorMixin, TemplateView):
+    template_name = 'socios/busqueda.html'
+    login_url = 'socios:login'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        texto = self.request.GET.get('q', '').strip()
+        context['q'] = texto
+        context['resultados'] = buscar(texto, limite=50) if texto else []
+        return context
+        
 # Vistas para Conceptos
 class ConceptoListView(LoginRequiredMixin, EsAdministradorMixin, ListView):
     model = Concepto
     template_name = 'socios/concepto_list.html'
     context_object_name = 'conceptos'
     login_url = 'socios:login'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['accion_form'] = AccionConceptosForm()
+        return context
+
+# Acciones masivas sobre los conceptos marcados en la lista
+class ConceptoAccionMasivaView(LoginRequiredMixin, EsAdministradorMixin, FormView):
+    form_class = AccionConceptosForm
+    http_method_names = ['post']
+    login_url = 'socios:login'
+    
+    def form_valid(self, form):
+        conceptos = form.cleaned_data['conceptos']
+        if form.cleaned_data['accion'] == 'aumentar_montos':
+            porcentaje = form.cleaned_data['porcentaje']
+            cantidad = aumentar_montos(conceptos, porcentaje)
+            messages.success(self.request, f"Monto sugerido aumentado un {porcentaje}% en {cantidad} conceptos.")
+        else:
+            cantidad = desactivar_conceptos(conceptos)
+            messages.success(self.request, f"{cantidad} conceptos desactivados.")
+        return redirect('socios:listar_conceptos')
+    
+    def form_invalid(self, form):
+        for errores in form.errors.values():
+            for error in errores:
+                messages.error(self.request, error)
+        return redirect('socios:listar_conceptos')
 
 class ConceptoCreateView(LoginRequiredMixin, EsAdministradorMixin, CreateView):
     model = Concepto
@@ -269,19 +555,54 @@ class ConceptoDeleteView(LoginRequiredMixin, EsAdministradorMixin, DeleteView):
         messages.success(request, "Concepto eliminado exitosamente.")
         return super().delete(request, *args, **kwargs)
         
-# Vista para obtener el monto sugerido de un concepto
-def get_concepto_monto(request):
-    if not request.user.is_authenticated:
+# Verificación de administrador para vistas asíncronas. No usa user.socio
+# porque el acceso a relaciones no está permitido en contexto asíncrono.
+async def es_administrador_async(user):
+    if user.is_superuser:
+        return True
+    return await Socio.objects.filter(usuario_id=user.pk, es_administrador=True).aexists()
+
+# Vista para seguir el progreso de las tareas en segundo plano
+class TareaListView(LoginRequiredMixin, EsAdministradorMixin, ListView):
+    model = Tarea
+    template_name = 'socios/tarea_list.html'
+    context_object_name = 'tareas'
+    paginate_by = 20
+    login_url = 'socios:login'
+    
+    def get_queryset(self):
+        return super().get_queryset().select_related('creada_por')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Recargar la página mientras haya tareas sin terminar
+        context['hay_tareas_activas'] = Tarea.objects.filter(estado__in=['pendiente', 'en_curso']).exists()
+        return context
+
+# Vista para encolar el envío de recordatorios de pago del mes
+class EnviarRecordatoriosView(LoginRequiredMixin, EsAdministradorMixin, View):
+    login_url = 'socios:login'
+    
+    def post(self, request, *args, **kwargs):
+        encolar('enviar_recordatorios', usuario=request.user, periodo=periodo_actual())
+        messages.success(request, "El envío de recordatorios se está procesando en segundo plano.")
+        return redirect('socios:listar_tareas')
+
+# Vista para obtener el monto sugerido de un concepto.
+# Es asíncrona para que las consultas AJAX de pago_form.html no ocupen
+# un hilo del servidor cuando se sirve con ASGI (acftgestion/asgi.py).
+async def get_concepto_monto(request):
+    user = await request.auser()
+    if not user.is_authenticated:
         return JsonResponse({'error': 'No autorizado'}, status=401)
         
     # Verificar si es administrador
-    es_admin = request.user.is_superuser or (hasattr(request.user, 'socio') and request.user.socio.es_administrador)
-    if not es_admin:
+    if not await es_administrador_async(user):
         return JsonResponse({'error': 'No tienes permisos suficientes'}, status=403)
     
     concepto_id = request.GET.get('concepto_id')
     try:
-        concepto = Concepto.objects.get(pk=concepto_id)
+        concepto = await Concepto.objects.only('monto_sugerido').aget(pk=concepto_id)
         return JsonResponse({'monto_sugerido': float(concepto.monto_sugerido)})
     except (Concepto.DoesNotExist, ValueError):
         return JsonResponse({'monto_sugerido': 0})
@@ -293,7 +614,7 @@ class SocioLoginView(LoginView):
     
     def get_success_url(self):
         if self.request.user.is_superuser or hasattr(self.request.user, 'socio') and self.request.user.socio.es_administrador:
-            return reverse('socios:listar')
+            return reverse('socios:panel')
         elif hasattr(self.request.user, 'socio'):
             return reverse('socios:mi_perfil')
         else:
@@ -314,7 +635,7 @@ class RegistroView(FormView):
         messages.success(self.request, "¡Registro exitoso! Tu categoría inicial es 'Cadete'. Un administrador revisará tu información.")
         return super().form_valid(form)
 
-class MiPerfilView(LoginRequiredMixin, TemplateView):
+class MiPerfilView(LoginRequiredMixin, VersionCondicionalMixin, TemplateView):
     template_name = 'socios/mi_perfil.html'
     
     def get_context_data(self, **kwargs):
@@ -325,4 +646,15 @@ class MiPerfilView(LoginRequiredMixin, TemplateView):
             context['pagos'] = socio.pagos.all().order_by('-fecha_pago')
             context['estado_pagos'] = socio.get_estado_pagos()
             context['es_admin'] = socio.es_administrador or self.request.user.is_superuser
-        return context
\ No newline at end of file
+        return context
+
+class SaludView(View):
+    """Verificación de estado para el HEALTHCHECK del contenedor"""
+    
+    def get(self, request):
+        try:
+            with connections[router.db_for_read(Socio)].cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError:
+            return JsonResponse({'estado': 'error'}, status=503)
+        return JsonResponse({'estado': 'ok'})